@@ -1,17 +1,41 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, status
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, status
+from fastapi.responses import FileResponse, StreamingResponse
+from starlette.background import BackgroundTask
+from typing import List, Optional
+from datetime import datetime
+import asyncio
 import shutil
 import os
+import tempfile
 import uuid
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_async_db
 from app.services.auth_service import auth_service
 from app.services.rag_service import rag_service
+from app.services.archive_service import archive_service
+from app.services.context_cache import context_cache
+from app.services.db_writer import db_writer
+from app.services.principal_cache import principal_cache
+from app.services.password_hasher import password_hasher
+from app.services.login_throttle import login_throttle
+from app.services.credential_vault import credential_vault
+from app.services.moodle_service import moodle_service
+from app.services.scheduler_service import scheduler_service
+from app.services.assignment_tracker import assignment_tracker
+from app.services.export_service import export_service, FORMATS, MEDIA_TYPES
+from app.utils.index_snapshot import SnapshotError
 from app.models.user import User
+from app.schemas.auth import RoleUpdate, UserResponse
 
 router = APIRouter(prefix="/api/admin", tags=["Admin"])
 
 @router.post("/upload")
 async def upload_document(
     file: UploadFile = File(...),
+    programme: Optional[str] = Form(None),
+    level: Optional[str] = Form(None),
+    academic_year: Optional[str] = Form(None),
+    audience: Optional[str] = Form(None),
     current_admin: User = Depends(auth_service.get_current_admin)
 ):
     if not file.filename.endswith('.pdf'):
@@ -30,7 +54,13 @@ async def upload_document(
             
         # Indexer (Ceci est bloquant, idéalement à faire en background task)
         # Pour l'instant on le fait direct pour avoir le retour immédiat
-        chunks_count = rag_service.index_document(file_id, file_path, file.filename)
+        tags = {
+            "programme": programme,
+            "level": level,
+            "academic_year": academic_year,
+            "audience": audience
+        }
+        chunks_count = rag_service.index_document(file_id, file_path, file.filename, tags=tags)
         
         if chunks_count == 0:
             os.remove(file_path)
@@ -40,7 +70,8 @@ async def upload_document(
             "message": "Document uploadé et indexé avec succès",
             "document_id": file_id,
             "filename": file.filename,
-            "chunks_indexed": chunks_count
+            "chunks_indexed": chunks_count,
+            "tags": rag_service.normalize_tags(tags)
         }
         
     except Exception as e:
@@ -59,6 +90,31 @@ async def upload_document(
 async def list_documents(current_admin: User = Depends(auth_service.get_current_admin)):
     return rag_service.list_documents()
 
+@router.get("/search")
+async def search_documents(
+    q: str,
+    programme: Optional[str] = None,
+    level: Optional[str] = None,
+    academic_year: Optional[str] = None,
+    audience: Optional[str] = None,
+    top_k: Optional[int] = None,
+    current_admin: User = Depends(auth_service.get_current_admin)
+):
+    """Recherche RAG filtrée (vérifier ce qu'un public donné retrouve)"""
+    filters = {
+        "programme": programme,
+        "level": level,
+        "academic_year": academic_year,
+        "audience": audience
+    }
+    chunks, sources = rag_service.search(q, top_k=top_k, filters=filters)
+    return {
+        "results": [
+            {"source": source, "content": chunk}
+            for chunk, source in zip(chunks, sources)
+        ]
+    }
+
 @router.delete("/documents/{document_id}")
 async def delete_document(
     document_id: str,
@@ -68,3 +124,94 @@ async def delete_document(
     if not success:
         raise HTTPException(404, "Document introuvable ou erreur suppression")
     return {"message": "Document supprimé avec succès"}
+
+@router.get("/index/snapshot")
+async def download_index_snapshot(current_admin: User = Depends(auth_service.get_current_admin)):
+    """Télécharge un instantané de l'index vectoriel"""
+    fd, path = tempfile.mkstemp(suffix=".npz")
+    os.close(fd)
+    try:
+        header = await asyncio.to_thread(rag_service.export_snapshot, path)
+    except Exception as e:
+        os.remove(path)
+        raise HTTPException(500, f"Erreur export de l'index: {str(e)}")
+    return FileResponse(
+        path,
+        media_type="application/octet-stream",
+        filename=f"index_snapshot_{header['created_at'][:10]}.npz",
+        background=BackgroundTask(os.remove, path)
+    )
+
+@router.post("/index/snapshot")
+async def restore_index_snapshot(
+    file: UploadFile = File(...),
+    current_admin: User = Depends(auth_service.get_current_admin)
+):
+    """Remplace l'index vectoriel par un instantané"""
+    fd, path = tempfile.mkstemp(suffix=".npz")
+    try:
+        with os.fdopen(fd, "wb") as buffer:
+            shutil.copyfileobj(file.file, buffer)
+        header = await asyncio.to_thread(rag_service.import_snapshot, path)
+    except SnapshotError as e:
+        raise HTTPException(400, str(e))
+    finally:
+        os.remove(path)
+    return {
+        "message": "Index restauré avec succès",
+        "chunks_restored": header["count"],
+        "embedding_model": header["embedding_model"],
+        "created_at": header["created_at"]
+    }
+
+@router.get("/export")
+async def export_conversations(
+    format: str = "ndjson",
+    gzip: bool = False,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    user_id: Optional[str] = None,
+    current_admin: User = Depends(auth_service.get_current_admin)
+):
+    """
+    Exporte les messages (avec leur conversation) en NDJSON ou CSV, en flux :
+    filtres optionnels par période [start, end) et par utilisateur
+    """
+    if format not in FORMATS:
+        raise HTTPException(400, f"Format inconnu: {format} ({', '.join(FORMATS)})")
+    
+    filename = f"export_{datetime.utcnow():%Y%m%d_%H%M%S}.{format}" + (".gz" if gzip else "")
+    return StreamingResponse(
+        export_service.stream(format, gzip, start, end, user_id),
+        media_type="application/gzip" if gzip else MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+@router.put("/users/{user_id}/role", response_model=UserResponse)
+async def update_user_role(
+    user_id: int,
+    body: RoleUpdate,
+    current_admin: User = Depends(auth_service.get_current_admin),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Change le rôle d'un utilisateur (pris en compte immédiatement)"""
+    user = await auth_service.set_role(user_id, body.role, db)
+    if user is None:
+        raise HTTPException(404, "Utilisateur introuvable")
+    return user
+
+@router.get("/metrics")
+async def get_metrics(current_admin: User = Depends(auth_service.get_current_admin)):
+    """Métriques internes (file d'écriture, cache de contexte...)"""
+    return {
+        "db_writer": db_writer.metrics(),
+        "context_cache": context_cache.metrics(),
+        "archive": archive_service.metrics(),
+        "auth_cache": principal_cache.metrics(),
+        "password_hasher": password_hasher.metrics(),
+        "login_throttle": login_throttle.metrics(),
+        "credential_vault": credential_vault.metrics(),
+        "moodle": moodle_service.metrics(),
+        "homework_scan": scheduler_service.metrics(),
+        "assignment_changes": assignment_tracker.metrics()
+    }
@@ -1,28 +1,44 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import math
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import timedelta, datetime
-from app.database import get_db
+from app.database import get_async_db
 from app.schemas.auth import (
     UserCreate, UserResponse, Token, UserLogin,
     PasswordResetRequest, PasswordReset
 )
 from app.services.auth_service import auth_service, ACCESS_TOKEN_EXPIRE_MINUTES
 from app.services.email_service import email_service
+from app.services.login_throttle import login_throttle
 from app.models.user import User
 
 router = APIRouter(prefix="/api/auth", tags=["Authentication"])
 
+def _throttle(request: Request, email: Optional[str] = None):
+    """429 si l'IP (ou le compte) a dépassé sa limite de tentatives, avant tout calcul Argon2"""
+    wait = login_throttle.check(request.client.host if request.client else None, email)
+    if wait:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Trop de tentatives, réessayez plus tard",
+            headers={"Retry-After": str(math.ceil(wait))},
+        )
+
 @router.post("/register", response_model=UserResponse)
-async def register(user: UserCreate, db: Session = Depends(get_db)):
-    db_user = db.query(User).filter(User.email == user.email).first()
+async def register(user: UserCreate, request: Request, db: AsyncSession = Depends(get_async_db)):
+    _throttle(request)
+    result = await db.execute(select(User).where(User.email == user.email))
+    db_user = result.scalars().first()
     if db_user:
         raise HTTPException(
             status_code=400,
             detail="Email already registered"
         )
     
-    hashed_password = auth_service.get_password_hash(user.password)
+    hashed_password = await auth_service.get_password_hash(user.password)
     new_user = User(
         email=user.email,
         password_hash=hashed_password,
@@ -31,19 +47,28 @@ async def register(user: UserCreate, db: Session = Depends(get_db)):
     )
     
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
+    await db.refresh(new_user)
     return new_user
 
 @router.post("/login", response_model=Token)
-async def login(form_data: UserLogin, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.email == form_data.email).first()
-    if not user or not auth_service.verify_password(form_data.password, user.password_hash):
+async def login(form_data: UserLogin, request: Request, db: AsyncSession = Depends(get_async_db)):
+    _throttle(request, form_data.email)
+    result = await db.execute(select(User).where(User.email == form_data.email))
+    user = result.scalars().first()
+    valid, new_hash = await auth_service.verify_password(form_data.password, user.password_hash) if user else (False, None)
+    if not valid:
+        login_throttle.failure(form_data.email)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    login_throttle.success(form_data.email)
+    if new_hash:
+        # Hash calculé avec d'anciens coûts Argon2 : le remplacer
+        await db.execute(update(User).where(User.id == user.id).values(password_hash=new_hash))
+        await db.commit()
     
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = auth_service.create_access_token(
@@ -63,15 +88,18 @@ async def read_users_me(current_user: User = Depends(auth_service.get_current_us
 
 @router.post("/forgot-password")
 async def forgot_password(
-    request: PasswordResetRequest,
-    db: Session = Depends(get_db)
+    reset_request: PasswordResetRequest,
+    request: Request,
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Demande de réinitialisation de mot de passe.
     Envoie un email avec un lien de réinitialisation.
     Ne révèle pas si l'email existe ou non (sécurité).
     """
-    user = db.query(User).filter(User.email == request.email).first()
+    _throttle(request)
+    result = await db.execute(select(User).where(User.email == reset_request.email))
+    user = result.scalars().first()
     
     # Ne pas révéler si l'email existe (meilleure pratique de sécurité)
     # Toujours retourner un succès même si l'email n'existe pas
@@ -83,7 +111,7 @@ async def forgot_password(
         # Stocker le token hashé et la date d'expiration (30 minutes)
         user.reset_token = hashed_token
         user.reset_token_expires = datetime.utcnow() + timedelta(minutes=30)
-        db.commit()
+        await db.commit()
         
         # Envoyer l'email (ou logger en mode dev)
         await email_service.send_password_reset_email(
@@ -114,11 +142,13 @@ async def forgot_password(
 @router.post("/reset-password")
 async def reset_password(
     reset_data: PasswordReset,
-    db: Session = Depends(get_db)
+    request: Request,
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Réinitialise le mot de passe avec un token valide.
     """
+    _throttle(request)
     # Valider que les mots de passe correspondent
     if reset_data.new_password != reset_data.confirm_password:
         raise HTTPException(
@@ -137,10 +167,11 @@ async def reset_password(
     hashed_token = auth_service.hash_reset_token(reset_data.token)
     
     # Trouver l'utilisateur avec ce token
-    user = db.query(User).filter(
+    result = await db.execute(select(User).where(
         User.reset_token == hashed_token,
         User.reset_token_expires > datetime.utcnow()
-    ).first()
+    ))
+    user = result.scalars().first()
     
     if not user:
         raise HTTPException(
@@ -149,10 +180,12 @@ async def reset_password(
         )
     
     # Mettre à jour le mot de passe
-    user.password_hash = auth_service.get_password_hash(reset_data.new_password)
+    user.password_hash = await auth_service.get_password_hash(reset_data.new_password)
     user.reset_token = None
     user.reset_token_expires = None
-    db.commit()
+    await db.commit()
+    # Les sessions ouvertes avec l'ancien mot de passe ne restent pas en cache
+    auth_service.invalidate_user(user.email)
     
     return {
         "message": "Mot de passe réinitialisé avec succès"
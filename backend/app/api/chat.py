@@ -1,33 +1,81 @@
 from fastapi import APIRouter, Depends, HTTPException
 from fastapi.responses import StreamingResponse
-from sqlalchemy.orm import Session
-from app.database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import iterate_in_threadpool
+from app.database import get_async_db
 from app.schemas.chat import ChatRequest, ChatResponse
 from app.services.ai_service import gemini_service
+from app.services.context_cache import context_cache
 from app.services.conversation_service import conversation_service
+from app.services.archive_service import archive_service
+from app.services.db_writer import db_writer
+from app.utils.ulid import new_ulid
 import json
 import asyncio
+from datetime import datetime
 
 router = APIRouter(prefix="/api/chat", tags=["Chat"])
 
+def persist_turn(conversation_id: str, question: str, answer: str, asked_at: datetime):
+    """
+    Enregistre le tour en arrière-plan (write-behind) : ids et date de la
+    réponse sont connus tout de suite, le client n'attend pas le disque
+    """
+    user_message_id = new_ulid()
+    assistant_message_id = new_ulid()
+    answered_at = datetime.utcnow()
+    db_writer.enqueue(
+        lambda write_db: conversation_service.record_turn(
+            conversation_id=conversation_id,
+            user_content=question,
+            assistant_content=answer,
+            sources=[],
+            db=write_db,
+            asked_at=asked_at,
+            answered_at=answered_at,
+            user_message_id=user_message_id,
+            assistant_message_id=assistant_message_id,
+            commit=False
+        ),
+        key=conversation_id,
+        payload={
+            "type": "chat_turn",
+            "conversation_id": conversation_id,
+            "user_message_id": user_message_id,
+            "assistant_message_id": assistant_message_id,
+            "question": question,
+            "answer": answer,
+            "asked_at": asked_at.isoformat(),
+            "answered_at": answered_at.isoformat(),
+        }
+    )
+    # Le tour suivant lira son contexte en mémoire (entrée invalidée à
+    # l'écriture si la conversation a été supprimée entre-temps)
+    context_cache.append_turn(conversation_id, question, answer)
+    return assistant_message_id, answered_at
+
 @router.post("/stream")
-async def chat_stream(request: ChatRequest, db: Session = Depends(get_db)):
+async def chat_stream(request: ChatRequest, db: AsyncSession = Depends(get_async_db)):
     """
     Endpoint streaming avec keep-alive pour Render
     """
+    # Horodatage de la question (avant génération de la réponse)
+    asked_at = datetime.utcnow()
+    
     async def generate():
         try:
             # 1. Gérer conversation
             if request.conversation_id:
-                conversation = conversation_service.get_conversation(
+                conversation = await conversation_service.get_conversation(
                     request.conversation_id, db
                 )
                 if not conversation:
                     yield f"data: {json.dumps({'type': 'error', 'message': 'Conversation introuvable'})}\n\n"
                     return
+                await archive_service.ensure_hot(conversation, db)
             else:
-                title = gemini_service.generate_conversation_title(request.message)
-                conversation = conversation_service.create_conversation(
+                title = await asyncio.to_thread(gemini_service.generate_conversation_title, request.message)
+                conversation = await conversation_service.create_conversation(
                     title=title,
                     user_id=request.user_id,
                     db=db
@@ -37,19 +85,21 @@ async def chat_stream(request: ChatRequest, db: Session = Depends(get_db)):
             yield f"data: {json.dumps({'type': 'conversation_id', 'conversation_id': conversation.id})}\n\n"
             await asyncio.sleep(0)
             
-            # 2. Contexte
-            context = conversation_service.get_conversation_context(
+            # 2. Contexte (cache mémoire, sinon base après les écritures en file)
+            context = await conversation_service.get_conversation_context(
                 conversation.id, db, limit=6
             )
+            # Rendre la connexion au pool pendant le streaming (verrou de lecture SQLite)
+            await db.close()
             
-            # 3. Streaming Gemini avec keep-alive
+            # 3. Streaming Gemini avec keep-alive (client synchrone -> thread)
             full_response = ""
             chunk_count = 0
             
-            for chunk in gemini_service.generate_response_stream(
+            async for chunk in iterate_in_threadpool(gemini_service.generate_response_stream(
                 user_message=request.message,
                 context=context
-            ):
+            )):
                 full_response += chunk
                 chunk_count += 1
                 
@@ -62,28 +112,16 @@ async def chat_stream(request: ChatRequest, db: Session = Depends(get_db)):
                 
                 await asyncio.sleep(0)
             
-            # 4. Sauvegarder messages
-            conversation_service.add_message(
-                conversation_id=conversation.id,
-                role="user",
-                content=request.message,
-                sources=None,
-                db=db
-            )
-            
-            assistant_msg = conversation_service.add_message(
-                conversation_id=conversation.id,
-                role="assistant",
-                content=full_response,
-                sources=[],
-                db=db
+            # 4. Sauvegarder messages (en arrière-plan, une transaction par tour)
+            message_id, answered_at = persist_turn(
+                conversation.id, request.message, full_response, asked_at
             )
             
             # 5. Signal fin
             yield f"data: {json.dumps({
                 'type': 'done',
-                'message_id': assistant_msg.id,
-                'timestamp': assistant_msg.timestamp.isoformat()
+                'message_id': message_id,
+                'timestamp': answered_at.isoformat()
             })}\n\n"
             
         except Exception as e:
@@ -102,61 +140,53 @@ async def chat_stream(request: ChatRequest, db: Session = Depends(get_db)):
     )
 
 @router.post("/", response_model=ChatResponse)
-async def chat(request: ChatRequest, db: Session = Depends(get_db)):
+async def chat(request: ChatRequest, db: AsyncSession = Depends(get_async_db)):
     """
     Endpoint classique sans streaming (fallback)
     """
+    asked_at = datetime.utcnow()
     try:
         # 1. Conversation
         if request.conversation_id:
-            conversation = conversation_service.get_conversation(
+            conversation = await conversation_service.get_conversation(
                 request.conversation_id, db
             )
             if not conversation:
                 raise HTTPException(404, "Conversation introuvable")
+            await archive_service.ensure_hot(conversation, db)
         else:
-            title = gemini_service.generate_conversation_title(request.message)
-            conversation = conversation_service.create_conversation(
+            title = await asyncio.to_thread(gemini_service.generate_conversation_title, request.message)
+            conversation = await conversation_service.create_conversation(
                 title=title,
                 user_id=request.user_id,
                 db=db
             )
         
         # 2. Contexte
-        context = conversation_service.get_conversation_context(
+        context = await conversation_service.get_conversation_context(
             conversation.id, db, limit=6
         )
+        await db.close()
         
         # 3. Générer réponse
-        ai_response = gemini_service.generate_response(
+        ai_response = await asyncio.to_thread(
+            gemini_service.generate_response,
             user_message=request.message,
             context=context
         )
         
-        # 4. Sauvegarder
-        conversation_service.add_message(
-            conversation_id=conversation.id,
-            role="user",
-            content=request.message,
-            sources=None,
-            db=db
-        )
-        
-        assistant_msg = conversation_service.add_message(
-            conversation_id=conversation.id,
-            role="assistant",
-            content=ai_response,
-            sources=[],
-            db=db
+        # 4. Sauvegarder (en arrière-plan)
+        message_id, answered_at = persist_turn(
+            conversation.id, request.message, ai_response, asked_at
         )
         
         # 5. Retour
         return ChatResponse(
             response=ai_response,
             conversation_id=conversation.id,
-            message_id=assistant_msg.id,
+            message_id=message_id,
             sources=[],
-            timestamp=assistant_msg.timestamp
+            timestamp=answered_at
         )
         
     except Exception as e:
@@ -1,6 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from app.database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_async_db
 from app.services.auth_service import auth_service
 from app.models.user import User
 from app.services.moodle_service import moodle_service
@@ -58,7 +58,7 @@ async def get_announcements():
 
 @router.get("/calendar")
 async def get_calendar_events(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(auth_service.get_current_user)
 ):
     """Récupère les événements pour le calendrier (Moodle + Admin)"""
@@ -69,7 +69,7 @@ async def get_calendar_events(
         try:
             plain_pass = decrypt(current_user.uvci_password_encrypted)
             moodle_events = await moodle_service.get_assignments(
-                current_user.uvci_username, plain_pass
+                current_user.uvci_username, plain_pass, current_user.id
             )
             for i, me in enumerate(moodle_events):
                 # Tentative de conversion de date sommaire pour le calendrier
@@ -112,7 +112,7 @@ async def get_upcoming_assignments(
         try:
             plain_pass = decrypt(current_user.uvci_password_encrypted)
             moodle_events = await moodle_service.get_assignments(
-                current_user.uvci_username, plain_pass
+                current_user.uvci_username, plain_pass, current_user.id
             )
             for i, me in enumerate(moodle_events):
                 assignments.append({
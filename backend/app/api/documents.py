@@ -1,7 +1,7 @@
 #### **21. Fichier `app/api/documents.py`**
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, BackgroundTasks
-from sqlalchemy.orm import Session
-from app.database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_async_db
 from app.schemas.document import DocumentUploadResponse, DocumentSchema
 from app.services.document_service import document_service
 from app.config import settings
@@ -14,7 +14,7 @@ router = APIRouter(prefix="/api/documents", tags=["Documents"])
 async def upload_document(
     background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Upload et index un document PDF
@@ -30,10 +30,10 @@ async def upload_document(
     # Vérifier la taille (fait par FastAPI automatiquement si configuré)
     try:
         # Sauvegarder le fichier
-        document = document_service.save_uploaded_file(file, db)
+        document = await document_service.save_uploaded_file(file, db)
         
         # Lancer l'indexation en arrière-plan
-        background_tasks.add_task(document_service.index_document, document, db)
+        background_tasks.add_task(document_service.index_document, document.id)
         
         return DocumentUploadResponse(
             id=document.id,
@@ -48,15 +48,15 @@ async def upload_document(
         raise HTTPException(status_code=500, detail=f"Erreur lors de l'upload: {str(e)}")
 
 @router.get("/", response_model=List[DocumentSchema])
-async def get_documents(db: Session = Depends(get_db)):
+async def get_documents(db: AsyncSession = Depends(get_async_db)):
     """Récupère la liste de tous les documents"""
-    documents = document_service.get_all_documents(db)
+    documents = await document_service.get_all_documents(db)
     return documents
 
 @router.get("/{document_id}", response_model=DocumentSchema)
-async def get_document(document_id: str, db: Session = Depends(get_db)):
+async def get_document(document_id: str, db: AsyncSession = Depends(get_async_db)):
     """Récupère un document spécifique"""
-    document = document_service.get_document_by_id(document_id, db)
+    document = await document_service.get_document_by_id(document_id, db)
     
     if not document:
         raise HTTPException(status_code=404, detail="Document non trouvé")
@@ -64,9 +64,9 @@ async def get_document(document_id: str, db: Session = Depends(get_db)):
     return document
 
 @router.delete("/{document_id}")
-async def delete_document(document_id: str, db: Session = Depends(get_db)):
+async def delete_document(document_id: str, db: AsyncSession = Depends(get_async_db)):
     """Supprime un document"""
-    success = document_service.delete_document(document_id, db)
+    success = await document_service.delete_document(document_id, db)
     
     if not success:
         raise HTTPException(status_code=404, detail="Document non trouvé")
@@ -77,18 +77,18 @@ async def delete_document(document_id: str, db: Session = Depends(get_db)):
 async def reindex_document(
     document_id: str,
     background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Ré-indexe un document"""
-    document = document_service.get_document_by_id(document_id, db)
+    document = await document_service.get_document_by_id(document_id, db)
     
     if not document:
         raise HTTPException(status_code=404, detail="Document non trouvé")
     
     document.status = "processing"
-    db.commit()
+    await db.commit()
     
-    background_tasks.add_task(document_service.index_document, document, db)
+    background_tasks.add_task(document_service.index_document, document.id)
     
     return {"message": "Ré-indexation lancée"}
 
@@ -1,41 +1,87 @@
 #### **20. Fichier `app/api/history.py`**
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from app.database import get_db
-from app.schemas.history import ConversationSchema, ConversationDetailSchema
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_async_db
+from app.config import settings
+from app.schemas.history import (
+    ConversationSchema, ConversationDetailSchema, ConversationPageSchema, MessagePageSchema, SearchPageSchema
+)
 from app.schemas.chat import MessageSchema
 from app.services.conversation_service import conversation_service
-from typing import List
+from app.services.db_writer import db_writer
+from app.services.search_service import search_service
+from app.services.archive_service import archive_service
+from app.services.auth_service import auth_service
+from app.models.user import User
+from typing import Optional
 import json
 
 router = APIRouter(prefix="/api/history", tags=["History"])
 
-@router.get("/conversations", response_model=List[ConversationSchema])
-async def get_conversations(db: Session = Depends(get_db)):
-    """Récupère toutes les conversations"""
-    conversations = conversation_service.get_all_conversations(db)
+@router.get("/conversations", response_model=ConversationPageSchema)
+async def get_conversations(
+    limit: int = Query(settings.HISTORY_PAGE_SIZE, ge=1, le=settings.HISTORY_MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Récupère les conversations, plus récentes d'abord, par pages :
+    `cursor` = next_cursor de la page précédente
+    """
+    try:
+        conversations, next_cursor = await conversation_service.get_conversations_page(db, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
-    return [
-        ConversationSchema(
-            id=conv.id,
-            title=conv.title,
-            created_at=conv.created_at,
-            updated_at=conv.updated_at,
-            message_count=len(conv.messages)
+    return ConversationPageSchema(
+        conversations=[
+            ConversationSchema(
+                id=conv.id,
+                title=conv.title,
+                created_at=conv.created_at,
+                updated_at=conv.updated_at,
+                message_count=conv.message_count or 0,
+                last_message_preview=conv.last_message_preview
+            )
+            for conv in conversations
+        ],
+        next_cursor=next_cursor
+    )
+
+@router.get("/search", response_model=SearchPageSchema)
+async def search_history(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0, le=1000),
+    current_user: User = Depends(auth_service.get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Recherche plein texte dans les messages de l'utilisateur connecté,
+    résultats classés par pertinence avec extrait surligné (<mark>)
+    """
+    try:
+        results, next_offset = await search_service.search_messages(
+            current_user.id, q, db, limit, offset
         )
-        for conv in conversations
-    ]
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return SearchPageSchema(results=results, next_offset=next_offset)
 
 @router.get("/conversations/{conversation_id}", response_model=ConversationDetailSchema)
-async def get_conversation_detail(conversation_id: str, db: Session = Depends(get_db)):
+async def get_conversation_detail(conversation_id: str, db: AsyncSession = Depends(get_async_db)):
     """Récupère les détails d'une conversation avec tous ses messages"""
-    conversation = conversation_service.get_conversation(conversation_id, db)
+    await db_writer.wait_for(conversation_id)
+    conversation = await conversation_service.get_conversation(conversation_id, db)
     
     if not conversation:
         raise HTTPException(status_code=404, detail="Conversation non trouvée")
     
-    messages = conversation_service.get_conversation_messages(conversation_id, db)
+    # Conversation archivée : messages restaurés depuis le stockage froid
+    await archive_service.ensure_hot(conversation, db)
+    messages = await conversation_service.get_conversation_messages(conversation_id, db)
     
     message_schemas = [
         MessageSchema(
@@ -56,10 +102,51 @@ async def get_conversation_detail(conversation_id: str, db: Session = Depends(ge
         messages=message_schemas
     )
 
+@router.get("/conversations/{conversation_id}/messages", response_model=MessagePageSchema)
+async def get_conversation_messages(
+    conversation_id: str,
+    limit: int = Query(settings.MESSAGES_PAGE_SIZE, ge=1, le=settings.HISTORY_MAX_PAGE_SIZE),
+    before: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Messages d'une conversation par pages, en remontant dans le temps :
+    `before` = next_cursor de la page précédente
+    """
+    await db_writer.wait_for(conversation_id)
+    conversation = await conversation_service.get_conversation(conversation_id, db)
+    
+    if not conversation:
+        raise HTTPException(status_code=404, detail="Conversation non trouvée")
+    
+    await archive_service.ensure_hot(conversation, db)
+    try:
+        messages, next_cursor = await conversation_service.get_messages_page(
+            conversation_id, db, limit, before
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return MessagePageSchema(
+        messages=[
+            MessageSchema(
+                id=msg.id,
+                role=msg.role,
+                content=msg.content,
+                timestamp=msg.timestamp,
+                sources=json.loads(msg.sources) if msg.sources else []
+            )
+            for msg in messages
+        ],
+        next_cursor=next_cursor
+    )
+
 @router.delete("/conversations/{conversation_id}")
-async def delete_conversation(conversation_id: str, db: Session = Depends(get_db)):
+async def delete_conversation(conversation_id: str, db: AsyncSession = Depends(get_async_db)):
     """Supprime une conversation"""
-    success = conversation_service.delete_conversation(conversation_id, db)
+    # Un tour encore en file recréerait des messages orphelins
+    await db_writer.wait_for(conversation_id)
+    success = await conversation_service.delete_conversation(conversation_id, db)
     
     if not success:
         raise HTTPException(status_code=404, detail="Conversation non trouvée")
@@ -1,6 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from app.database import get_db
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_async_db
 from app.services.auth_service import auth_service
 from app.models.user import User
 from app.schemas.settings import UVCICredentialsUpdate, UVCIStatusResponse
@@ -25,14 +26,14 @@ async def get_uvci_status(
 async def update_uvci_credentials(
     creds: UVCICredentialsUpdate,
     current_user: User = Depends(auth_service.get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Enregistre les identifiants UVCI après vérification.
     Le mot de passe est chiffré avant d'être stocké.
     """
     # 1. Vérifier les identifiants auprès de Moodle (Simulation)
-    is_valid = await moodle_service.verify_credentials(creds.username, creds.password)
+    is_valid = await moodle_service.verify_credentials(creds.username, creds.password, current_user.id)
     
     if not is_valid:
         raise HTTPException(400, "Identifiants UVCI incorrects ou erreur de connexion Moodle.")
@@ -40,9 +41,14 @@ async def update_uvci_credentials(
     # 2. Chiffrer et sauvegarder
     encrypted_password = encrypt(creds.password)
     
-    current_user.uvci_username = creds.username
-    current_user.uvci_password_encrypted = encrypted_password
-    db.commit()
+    # current_user est détaché (cache d'authentification) : UPDATE explicite
+    await db.execute(
+        update(User)
+        .where(User.id == current_user.id)
+        .values(uvci_username=creds.username, uvci_password_encrypted=encrypted_password)
+    )
+    await db.commit()
+    auth_service.invalidate_user(current_user.email)
     
     return {
         "is_connected": True,
@@ -53,12 +59,17 @@ async def update_uvci_credentials(
 @router.delete("/uvci")
 async def delete_uvci_credentials(
     current_user: User = Depends(auth_service.get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Supprime la connexion UVCI"""
-    current_user.uvci_username = None
-    current_user.uvci_password_encrypted = None
-    db.commit()
+    await db.execute(
+        update(User)
+        .where(User.id == current_user.id)
+        .values(uvci_username=None, uvci_password_encrypted=None)
+    )
+    await db.commit()
+    auth_service.invalidate_user(current_user.email)
+    moodle_service.sessions.forget(current_user.id)
     
     return {"message": "Déconnexion UVCI effectuée"}
 
@@ -77,7 +88,7 @@ async def sync_moodle(
         # Scraper
         assignments = await moodle_service.get_assignments(
             current_user.uvci_username,
-            plain_password
+            plain_password, current_user.id
         )
         
         return {
@@ -102,7 +113,7 @@ async def test_assignments_email(
         # 2. Scraper Moodle
         assignments = await moodle_service.get_assignments(
             current_user.uvci_username,
-            plain_password
+            plain_password, current_user.id
         )
         
         if not assignments:
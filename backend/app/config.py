@@ -8,6 +8,14 @@ class Settings(BaseSettings):
     
     # Database
     DATABASE_URL: str = "sqlite:///./uvci_chatbot.db"
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    SQLITE_MMAP_SIZE: int = 268435456  # 256 Mo
+    SQLITE_CACHE_SIZE_KB: int = 16384
+    # Écrivain unique : petites écritures regroupées en un seul commit
+    DB_WRITER_MAX_BATCH: int = 128
+    DB_WRITER_MAX_DELAY_MS: float = 2.0
+    DB_WRITER_MAX_RETRIES: int = 5  # Écritures différées (write-behind) rejouées en cas d'échec
+    DB_WRITER_DEAD_LETTER_PATH: str = "./data/dead_letter_writes.jsonl"  # Écritures abandonnées
     
     # App
     APP_NAME: str = "Chatbot UVCI"
@@ -30,8 +38,81 @@ class Settings(BaseSettings):
     # RAG
     CHUNK_SIZE: int = 1000
     CHUNK_OVERLAP: int = 200
+    CHUNK_TOKENS: int = 256  # Taille des chunks en tokens (découpage par phrases)
+    CHUNK_OVERLAP_TOKENS: int = 48
     TOP_K_RESULTS: int = 3
     
+    # Pagination de l'historique (par clé, sans OFFSET)
+    HISTORY_PAGE_SIZE: int = 50
+    MESSAGES_PAGE_SIZE: int = 50
+    HISTORY_MAX_PAGE_SIZE: int = 200
+    
+    # Cache mémoire du contexte des conversations (derniers messages)
+    CONTEXT_CACHE_CONVERSATIONS: int = 2000  # 0 pour désactiver
+    CONTEXT_CACHE_DEPTH: int = 10
+    
+    # Archivage des conversations inactives (stockage froid compressé)
+    ARCHIVE_IDLE_DAYS: int = 180  # 0 pour désactiver le job planifié
+    ARCHIVE_BATCH_SIZE: int = 100
+    ARCHIVE_CODEC: str = "auto"  # "zstd" (si installé), "zlib" ou "auto"
+    
+    # Export NDJSON/CSV : lignes lues par lot
+    EXPORT_BATCH_SIZE: int = 1000
+    
+    # Cache des utilisateurs authentifiés (par jeton JWT)
+    AUTH_CACHE_SIZE: int = 10000  # 0 pour désactiver
+    AUTH_CACHE_TTL_SECONDS: float = 60.0
+    
+    # Argon2 : coûts du hachage (défauts = hashs existants ; un hash calculé avec
+    # d'autres coûts est recalculé à la connexion). OWASP minimum : 19456 Ko, t=2, p=1
+    ARGON2_TIME_COST: int = 3
+    ARGON2_MEMORY_COST_KB: int = 65536
+    ARGON2_PARALLELISM: int = 4
+    # Pool de hachage : threads (0 = nombre de cœurs) et calculs en attente avant 503
+    PASSWORD_HASH_WORKERS: int = 0
+    PASSWORD_HASH_MAX_PENDING: int = 32
+    # Tentatives d'authentification (fenêtres glissantes, 429 au-delà, 0 pour désactiver)
+    AUTH_IP_LIMIT: int = 120  # Toutes tentatives par IP client (campus derrière un même NAT ; IP lue dans X-Forwarded-For, cf. render.yaml)
+    AUTH_IP_WINDOW_SECONDS: float = 60.0
+    AUTH_EMAIL_FAILURES: int = 5  # Échecs de connexion par compte
+    AUTH_EMAIL_WINDOW_SECONDS: float = 300.0
+    
+    # Chiffrement des identifiants UVCI : clés Fernet séparées par des virgules,
+    # la première chiffre, les suivantes (anciennes) servent à déchiffrer et
+    # sont remplacées par la rotation planifiée
+    ENCRYPTION_KEYS: str = ""
+    CREDENTIAL_ROTATION_BATCH_SIZE: int = 500
+    
+    # Moodle UVCI : client HTTP partagé et sessions réutilisées (cookies persistés)
+    MOODLE_SESSION_TTL_HOURS: float = 6.0  # Sous le sessiontimeout Moodle (8 h par défaut)
+    MOODLE_SESSION_CACHE_SIZE: int = 5000
+    MOODLE_MAX_CONNECTIONS: int = 20
+    MOODLE_TIMEOUT_SECONDS: float = 20.0
+    # Scan des devoirs : utilisateurs traités en parallèle, délai max par utilisateur,
+    # dates de synchro écrites par lots
+    MOODLE_SCAN_CONCURRENCY: int = 10
+    MOODLE_SCAN_USER_TIMEOUT_SECONDS: float = 90.0
+    MOODLE_SCAN_COMMIT_BATCH: int = 200
+    # Rappel unique quand l'échéance d'un devoir déjà notifié approche
+    ASSIGNMENT_REMINDER_HOURS: float = 48.0
+    # Devoir sans échéance interprétable : oublié après cette absence du calendrier
+    ASSIGNMENT_MISSING_GRACE_DAYS: float = 7.0
+    
+    # Embeddings: "gemini" ou "hashing" (local, déterministe, hors ligne)
+    EMBEDDING_BACKEND: str = "gemini"
+    
+    # Stockage vectoriel: "chroma", "flat" (float32 mappé en mémoire)
+    # ou "quantized" (float16 / int8 mappé en mémoire)
+    VECTOR_STORE_BACKEND: str = "chroma"
+    VECTOR_STORE_DTYPE: str = "int8"
+    VECTOR_STORE_DIR: str = "./data/vectors"
+    CHROMA_PERSIST_DIR: str = "./data/chroma"
+    # Instantané restauré au démarrage si l'index est vide ("" pour désactiver)
+    INDEX_SNAPSHOT_PATH: str = "./data/index_snapshot.npz"
+    
+    # Cache du texte extrait des PDFs (par empreinte de fichier et page)
+    EXTRACTION_CACHE_PATH: str = "./data/extraction_cache.db"
+    
     # SMTP Settings
     SMTP_ENABLED: bool = False
     SMTP_HOST: str = "smtp.gmail.com"
@@ -1,17 +1,61 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.config import settings
 
-# Créer l'engine SQLite
+
+def configure_sqlite(engine):
+    """
+    Pragmas appliqués à chaque connexion SQLite : WAL (lecteurs et écrivain
+    concurrents), synchronous=NORMAL (pas de fsync par commit en WAL),
+    attente sur verrou au lieu de "database is locked", mmap et cache.
+    """
+    if engine.dialect.name != "sqlite":
+        return
+
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA busy_timeout={settings.SQLITE_BUSY_TIMEOUT_MS}")
+        cursor.execute(f"PRAGMA mmap_size={settings.SQLITE_MMAP_SIZE}")
+        cursor.execute(f"PRAGMA cache_size=-{settings.SQLITE_CACHE_SIZE_KB}")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.close()
+
+
+# Créer l'engine SQLite (scheduler, scripts de maintenance)
 engine = create_engine(
     settings.DATABASE_URL,
     connect_args={"check_same_thread": False}  # Nécessaire pour SQLite
 )
+configure_sqlite(engine)
 
 # Session locale
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+
+def _async_url(url: str) -> str:
+    """URL du driver asynchrone (sqlite:// -> sqlite+aiosqlite://)"""
+    if url.startswith("sqlite://"):
+        return "sqlite+aiosqlite://" + url[len("sqlite://"):]
+    return url
+
+
+# Engine asynchrone pour les routes : les requêtes ne bloquent plus la boucle d'événements
+async_engine = create_async_engine(_async_url(settings.DATABASE_URL))
+configure_sqlite(async_engine.sync_engine)
+
+# Les objets restent lisibles après commit (pas de rechargement implicite en async)
+AsyncSessionLocal = async_sessionmaker(
+    async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
 # Base pour les modèles
 Base = declarative_base()
 
@@ -21,4 +65,9 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+# Dépendance pour obtenir une session asynchrone
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -1,13 +1,10 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.config import settings
-from app.database import engine, Base
 from app.api import chat, history, auth, admin
 from datetime import datetime
-from app.models.user import User  # Import pour créer la table
-
-# Créer les tables dans la base de données
-Base.metadata.create_all(bind=engine)
+import asyncio
+from app.migrations import run_migrations
 
 # Créer l'application FastAPI
 app = FastAPI(
@@ -65,15 +62,27 @@ async def ping():
 
 # Démarrage du Scheduler
 from app.services.scheduler_service import scheduler_service
+from app.services.db_writer import db_writer
+from app.services.password_hasher import password_hasher
+from app.services.moodle_service import moodle_service
 
 @app.on_event("startup")
 async def startup_event():
-    # S'assurer que la base est à jour (migration SQLite)
-    try:
-        from migrate_db import migrate
-        migrate()
-    except Exception as e:
-        print(f"Erreur migration: {e}")
+    # Créer / mettre à jour le schéma (migrations versionnées)
+    await asyncio.to_thread(run_migrations)
+    
+    # Index vectoriel vide (disque éphémère) : restaurer l'instantané s'il existe
+    if settings.INDEX_SNAPSHOT_PATH:
+        from app.services.rag_service import rag_service
+        await asyncio.to_thread(rag_service.restore_snapshot_if_empty, settings.INDEX_SNAPSHOT_PATH)
     
+    db_writer.start()
     scheduler_service.start()
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    await moodle_service.close()
+    # Appliquer les écritures en attente avant de quitter
+    await db_writer.stop()
+    await asyncio.to_thread(password_hasher.shutdown)
+
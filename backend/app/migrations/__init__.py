@@ -0,0 +1,137 @@
+"""
+Migrations de schéma versionnées.
+
+Chaque module `vNNN_*.py` de ce package définit VERSION, DESCRIPTION et
+`upgrade(conn)` (connexion SQLAlchemy synchrone, dans une transaction).
+Sous SQLite, la transaction couvre aussi le DDL : pysqlite n'ouvre
+lui-même une transaction qu'avant INSERT/UPDATE/DELETE, les migrations
+passent donc par un engine dédié qui émet BEGIN explicitement.
+Les versions appliquées sont enregistrées dans la table `schema_migrations`.
+
+Exécutées au démarrage de l'API et en ligne de commande :
+    python migrate_db.py            # applique les migrations en attente
+    python migrate_db.py status     # versions appliquées / en attente
+"""
+import importlib
+import logging
+import pkgutil
+from datetime import datetime
+from typing import List
+
+from sqlalchemy import create_engine, event, inspect, text
+
+logger = logging.getLogger(__name__)
+
+
+def discover() -> List:
+    """Modules de migration triés par version"""
+    modules = []
+    for info in pkgutil.iter_modules(__path__):
+        if info.name.startswith("v") and info.name[1:4].isdigit():
+            modules.append(importlib.import_module(f"{__name__}.{info.name}"))
+    modules.sort(key=lambda module: module.VERSION)
+    versions = [module.VERSION for module in modules]
+    if len(set(versions)) != len(versions):
+        raise RuntimeError(f"Versions de migration dupliquées: {versions}")
+    return modules
+
+
+def _ensure_version_table(conn):
+    conn.execute(text(
+        "CREATE TABLE IF NOT EXISTS schema_migrations ("
+        "version INTEGER PRIMARY KEY, description VARCHAR(200), applied_at DATETIME)"
+    ))
+
+
+def applied_versions(conn) -> List[int]:
+    _ensure_version_table(conn)
+    return [row[0] for row in conn.execute(text("SELECT version FROM schema_migrations ORDER BY version"))]
+
+
+def column_names(conn, table: str) -> List[str]:
+    """Colonnes existantes d'une table ([] si elle n'existe pas)"""
+    inspector = inspect(conn)
+    if not inspector.has_table(table):
+        return []
+    return [column["name"] for column in inspector.get_columns(table)]
+
+
+def add_column(conn, table: str, column: str, ddl: str) -> bool:
+    """ALTER TABLE ADD COLUMN si la colonne manque (tables créées avant le modèle courant)"""
+    if column in column_names(conn, table):
+        return False
+    conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+    return True
+
+
+def transactional_engine(engine):
+    """
+    Engine SQLite où ALTER/CREATE font partie de la transaction : pysqlite
+    en mode autocommit, BEGIN émis à l'ouverture de chaque transaction.
+    Un échec au milieu d'une migration annule alors aussi ses changements
+    de schéma. Les autres dialectes sont retournés tels quels.
+    """
+    if engine.dialect.name != "sqlite":
+        return engine
+
+    from app.database import configure_sqlite
+
+    migration_engine = create_engine(engine.url, connect_args={"check_same_thread": False})
+    configure_sqlite(migration_engine)
+
+    @event.listens_for(migration_engine, "connect")
+    def disable_pysqlite_transactions(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(migration_engine, "begin")
+    def emit_begin(conn):
+        conn.exec_driver_sql("BEGIN")
+
+    return migration_engine
+
+
+def run_migrations(engine=None) -> List[int]:
+    """Applique les migrations en attente, chacune dans sa transaction ; retourne les versions appliquées"""
+    if engine is None:
+        from app.database import engine
+
+    migration_engine = transactional_engine(engine)
+    try:
+        return _apply_pending(migration_engine)
+    finally:
+        if migration_engine is not engine:
+            migration_engine.dispose()
+
+
+def _apply_pending(engine) -> List[int]:
+    with engine.begin() as conn:
+        done = set(applied_versions(conn))
+
+    applied = []
+    for module in discover():
+        if module.VERSION in done:
+            continue
+        with engine.begin() as conn:
+            # Une autre instance a pu l'appliquer entre-temps
+            if module.VERSION in applied_versions(conn):
+                continue
+            module.upgrade(conn)
+            conn.execute(
+                text("INSERT INTO schema_migrations (version, description, applied_at) VALUES (:v, :d, :t)"),
+                {"v": module.VERSION, "d": module.DESCRIPTION, "t": datetime.utcnow()}
+            )
+        logger.info(f"✅ Migration {module.VERSION:03d} appliquée: {module.DESCRIPTION}")
+        applied.append(module.VERSION)
+
+    if not applied:
+        logger.info("ℹ️ Schéma à jour")
+    return applied
+
+
+def status(engine=None):
+    """[(version, description, appliquée)]"""
+    if engine is None:
+        from app.database import engine
+    with engine.begin() as conn:
+        done = set(applied_versions(conn))
+    return [(module.VERSION, module.DESCRIPTION, module.VERSION in done) for module in discover()]
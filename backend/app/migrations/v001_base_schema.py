@@ -0,0 +1,74 @@
+"""
+Tables de base (création si absentes).
+
+DDL figé : le schéma tel qu'il était avant les migrations suivantes. Il ne
+dépend pas des modèles courants, sinon une base neuve recevrait d'emblée les
+colonnes et tables des versions ultérieures et sauterait leur travail réel.
+"""
+from sqlalchemy import text
+
+VERSION = 1
+DESCRIPTION = "Tables de base"
+
+STATEMENTS = [
+    """
+    CREATE TABLE IF NOT EXISTS conversations (
+        id VARCHAR NOT NULL,
+        user_id VARCHAR,
+        title VARCHAR(500),
+        created_at DATETIME,
+        updated_at DATETIME,
+        PRIMARY KEY (id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS documents (
+        id VARCHAR NOT NULL,
+        filename VARCHAR(500) NOT NULL,
+        original_filename VARCHAR(500) NOT NULL,
+        file_path VARCHAR(1000) NOT NULL,
+        upload_date DATETIME,
+        status VARCHAR(50),
+        chunk_count INTEGER,
+        file_size INTEGER,
+        PRIMARY KEY (id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS users (
+        id INTEGER NOT NULL,
+        email VARCHAR NOT NULL,
+        password_hash VARCHAR NOT NULL,
+        full_name VARCHAR,
+        role VARCHAR,
+        is_active BOOLEAN,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+        updated_at DATETIME,
+        reset_token VARCHAR,
+        reset_token_expires DATETIME,
+        uvci_username VARCHAR,
+        uvci_password_encrypted VARCHAR,
+        last_moodle_sync DATETIME,
+        PRIMARY KEY (id)
+    )
+    """,
+    "CREATE UNIQUE INDEX IF NOT EXISTS ix_users_email ON users (email)",
+    "CREATE INDEX IF NOT EXISTS ix_users_id ON users (id)",
+    """
+    CREATE TABLE IF NOT EXISTS messages (
+        id VARCHAR NOT NULL,
+        conversation_id VARCHAR NOT NULL,
+        role VARCHAR(50) NOT NULL,
+        content TEXT NOT NULL,
+        timestamp DATETIME,
+        sources TEXT,
+        PRIMARY KEY (id),
+        FOREIGN KEY(conversation_id) REFERENCES conversations (id)
+    )
+    """,
+]
+
+
+def upgrade(conn):
+    for statement in STATEMENTS:
+        conn.execute(text(statement))
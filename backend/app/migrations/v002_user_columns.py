@@ -0,0 +1,14 @@
+"""Colonnes ajoutées aux utilisateurs (ex migrate_db.py / migrate_add_reset_token.py)"""
+from sqlalchemy import text
+
+from app.migrations import add_column
+
+VERSION = 2
+DESCRIPTION = "Utilisateurs : last_moodle_sync, reset_token"
+
+
+def upgrade(conn):
+    add_column(conn, "users", "last_moodle_sync", "DATETIME")
+    add_column(conn, "users", "reset_token", "VARCHAR")
+    add_column(conn, "users", "reset_token_expires", "DATETIME")
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_users_reset_token ON users (reset_token)"))
@@ -0,0 +1,25 @@
+"""Compteurs dénormalisés des conversations, rattrapés depuis les messages"""
+from sqlalchemy import text
+
+from app.migrations import add_column
+
+VERSION = 3
+DESCRIPTION = "Conversations : message_count, last_message_preview"
+
+
+def upgrade(conn):
+    add_column(conn, "conversations", "message_count", "INTEGER NOT NULL DEFAULT 0")
+    add_column(conn, "conversations", "last_message_preview", "VARCHAR(200)")
+    # Rattrapage systématique, même si les colonnes existent déjà : une
+    # tentative précédente interrompue après l'ALTER doit être réparée
+    conn.execute(text("""
+        UPDATE conversations SET
+            message_count = (
+                SELECT COUNT(*) FROM messages WHERE messages.conversation_id = conversations.id
+            ),
+            last_message_preview = (
+                SELECT substr(content, 1, 200) FROM messages
+                WHERE messages.conversation_id = conversations.id
+                ORDER BY timestamp DESC LIMIT 1
+            )
+    """))
@@ -0,0 +1,21 @@
+"""Index des requêtes fréquentes : messages d'une conversation, historique trié"""
+from sqlalchemy import text
+
+VERSION = 4
+DESCRIPTION = "Index (conversation_id, timestamp), (user_id, updated_at), updated_at"
+
+
+def upgrade(conn):
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_messages_conversation_timestamp "
+        "ON messages (conversation_id, timestamp)"
+    ))
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_conversations_user_updated "
+        "ON conversations (user_id, updated_at)"
+    ))
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_conversations_updated "
+        "ON conversations (updated_at)"
+    ))
+    conn.execute(text("ANALYZE"))
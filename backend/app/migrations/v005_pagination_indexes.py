@@ -0,0 +1,18 @@
+"""Index étendus à l'id : clé de pagination (date, id) entièrement couverte"""
+from sqlalchemy import text
+
+VERSION = 5
+DESCRIPTION = "Index de pagination (updated_at, id), (user_id, updated_at, id), (conversation_id, timestamp, id)"
+
+INDEXES = {
+    "ix_conversations_updated": "conversations (updated_at, id)",
+    "ix_conversations_user_updated": "conversations (user_id, updated_at, id)",
+    "ix_messages_conversation_timestamp": "messages (conversation_id, timestamp, id)",
+}
+
+
+def upgrade(conn):
+    for name, definition in INDEXES.items():
+        conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+        conn.execute(text(f"CREATE INDEX {name} ON {definition}"))
+    conn.execute(text("ANALYZE"))
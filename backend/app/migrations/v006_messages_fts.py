@@ -0,0 +1,46 @@
+"""
+Recherche plein texte dans l'historique (SQLite FTS5).
+
+Table `messages_fts` à contenu externe : le texte n'est pas dupliqué, FTS5
+le relit dans la vue `messages_search` (snippet, reconstruction). La colonne
+`owner` (id de l'utilisateur, sans tirets pour rester un seul jeton) permet
+de restreindre la recherche à un utilisateur dans l'index lui-même.
+
+Les triggers tiennent l'index à jour à chaque insertion, modification ou
+suppression de message. Une suppression doit fournir les valeurs indexées :
+les messages sont donc supprimés avant leur conversation (cascade de l'ORM).
+"""
+from sqlalchemy import text
+
+VERSION = 6
+DESCRIPTION = "Index plein texte messages_fts (FTS5) et triggers de synchronisation"
+
+OWNER = "replace(coalesce((SELECT user_id FROM conversations WHERE id = {row}.conversation_id), ''), '-', '')"
+
+STATEMENTS = [
+    "DROP VIEW IF EXISTS messages_search",
+    "CREATE VIEW messages_search AS "
+    "SELECT m.rowid AS rowid, m.content AS content, " + OWNER.format(row="m") + " AS owner "
+    "FROM messages m",
+    "CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5("
+    "content, owner, content='messages_search', content_rowid='rowid', "
+    "tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER IF NOT EXISTS messages_fts_insert AFTER INSERT ON messages BEGIN "
+    "INSERT INTO messages_fts (rowid, content, owner) "
+    "VALUES (new.rowid, new.content, " + OWNER.format(row="new") + "); END",
+    "CREATE TRIGGER IF NOT EXISTS messages_fts_delete AFTER DELETE ON messages BEGIN "
+    "INSERT INTO messages_fts (messages_fts, rowid, content, owner) "
+    "VALUES ('delete', old.rowid, old.content, " + OWNER.format(row="old") + "); END",
+    "CREATE TRIGGER IF NOT EXISTS messages_fts_update AFTER UPDATE OF content ON messages BEGIN "
+    "INSERT INTO messages_fts (messages_fts, rowid, content, owner) "
+    "VALUES ('delete', old.rowid, old.content, " + OWNER.format(row="old") + "); "
+    "INSERT INTO messages_fts (rowid, content, owner) "
+    "VALUES (new.rowid, new.content, " + OWNER.format(row="new") + "); END",
+]
+
+
+def upgrade(conn):
+    for statement in STATEMENTS:
+        conn.execute(text(statement))
+    # Indexer l'historique existant
+    conn.execute(text("INSERT INTO messages_fts (messages_fts) VALUES ('rebuild')"))
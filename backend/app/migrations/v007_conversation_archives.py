@@ -0,0 +1,21 @@
+"""Stockage froid des conversations inactives (messages compressés par conversation)"""
+from sqlalchemy import text
+
+from app.migrations import add_column
+
+VERSION = 7
+DESCRIPTION = "Table conversation_archives, conversations.archived_at"
+
+
+def upgrade(conn):
+    add_column(conn, "conversations", "archived_at", "DATETIME")
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS conversation_archives (
+            conversation_id VARCHAR NOT NULL PRIMARY KEY REFERENCES conversations (id),
+            codec VARCHAR(10) NOT NULL,
+            payload BLOB NOT NULL,
+            message_count INTEGER NOT NULL DEFAULT 0,
+            raw_bytes INTEGER NOT NULL DEFAULT 0,
+            archived_at DATETIME
+        )
+    """))
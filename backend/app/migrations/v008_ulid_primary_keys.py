@@ -0,0 +1,162 @@
+"""
+Identifiants ULID pour les conversations et les messages.
+
+Les uuid4 existants sont remplacés par des ULID horodatés à la création de la
+ligne (created_at / timestamp) et attribués dans l'ordre chronologique : l'ordre
+des clés primaires devient l'ordre des messages. Les références
+(messages.conversation_id, conversation_archives, ids des messages archivés)
+sont réécrites. L'index (conversation_id, timestamp, id) devient (conversation_id, id).
+
+Le format des ULID et celui des blobs d'archive (codecs zstd / zlib) sont
+recopiés ici tels qu'ils étaient à cette version : la migration ne dépend ni
+de app.utils.ulid ni du service d'archivage, qui peuvent évoluer.
+"""
+import json
+import os
+import zlib
+from datetime import datetime, timezone
+
+from sqlalchemy import text
+
+VERSION = 8
+DESCRIPTION = "ULID pour conversations.id et messages.id, index (conversation_id, id)"
+
+CHUNK = 5000
+
+CROCKFORD = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+ULID_LENGTH = 26
+
+# Format des archives à la version 7 (voir docstring)
+ZSTD_LEVEL = 10
+ZLIB_LEVEL = 9
+
+
+def _encode(value: int) -> str:
+    chars = []
+    for _ in range(ULID_LENGTH):
+        chars.append(CROCKFORD[value & 31])
+        value >>= 5
+    return "".join(reversed(chars))
+
+
+def _decode(value: str) -> int:
+    number = 0
+    for char in value.upper():
+        number = (number << 5) | CROCKFORD.index(char)
+    return number
+
+
+def ulid_from_datetime(moment, previous=None) -> str:
+    """ULID horodaté à `moment` (naïf = UTC), strictement supérieur à `previous`"""
+    if moment is None:
+        timestamp_ms = 0
+    else:
+        if moment.tzinfo is None:
+            moment = moment.replace(tzinfo=timezone.utc)
+        timestamp_ms = max(0, int(moment.timestamp() * 1000))
+    number = (timestamp_ms << 80) | int.from_bytes(os.urandom(10), "big")
+    if previous is not None:
+        number = max(number, _decode(previous) + 1)
+    return _encode(number)
+
+
+def _zstandard():
+    try:
+        import zstandard
+    except ImportError:
+        raise RuntimeError("Archive zstd illisible : installer 'zstandard' avant de migrer")
+    return zstandard
+
+
+def _decompress(codec: str, payload: bytes) -> bytes:
+    if codec == "zstd":
+        return _zstandard().ZstdDecompressor().decompress(payload)
+    if codec == "zlib":
+        return zlib.decompress(payload)
+    raise ValueError(f"Codec d'archive inconnu: {codec}")
+
+
+def _compress(codec: str, data: bytes) -> bytes:
+    """Recompresse avec le codec d'origine de l'archive"""
+    if codec == "zstd":
+        return _zstandard().ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    if codec == "zlib":
+        return zlib.compress(data, ZLIB_LEVEL)
+    raise ValueError(f"Codec d'archive inconnu: {codec}")
+
+
+def _parse(value):
+    if value is None or isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(value)
+
+
+def _build_map(conn, table: str, moment_column: str):
+    """Table temporaire ancien id -> ULID, pour les ids qui ne sont pas déjà des ULID"""
+    conn.execute(text(f"DROP TABLE IF EXISTS temp.{table}_id_map"))
+    conn.execute(text(f"CREATE TEMP TABLE {table}_id_map (old TEXT PRIMARY KEY, new TEXT NOT NULL)"))
+    rows = conn.execute(text(
+        f"SELECT id, {moment_column} FROM {table} "
+        f"WHERE length(id) != {ULID_LENGTH} ORDER BY {moment_column}, rowid"
+    ))
+    previous = None
+    batch = []
+    count = 0
+    for old_id, moment in rows:
+        previous = ulid_from_datetime(_parse(moment), previous)
+        batch.append({"old": old_id, "new": previous})
+        if len(batch) == CHUNK:
+            conn.execute(text(f"INSERT INTO {table}_id_map (old, new) VALUES (:old, :new)"), batch)
+            count += len(batch)
+            batch = []
+    if batch:
+        conn.execute(text(f"INSERT INTO {table}_id_map (old, new) VALUES (:old, :new)"), batch)
+        count += len(batch)
+    return count
+
+
+def _rewrite_archives(conn):
+    """Ids des messages contenus dans les blobs d'archive"""
+    archives = conn.execute(text("SELECT conversation_id, codec, payload FROM conversation_archives")).all()
+    for conversation_id, codec, payload in archives:
+        messages = json.loads(_decompress(codec, payload))
+        if all(len(item["id"]) == ULID_LENGTH for item in messages):
+            continue
+        previous = None
+        for item in messages:
+            previous = ulid_from_datetime(_parse(item["timestamp"]), previous)
+            item["id"] = previous
+        raw = json.dumps(messages, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        payload = _compress(codec, raw)
+        conn.execute(
+            text("UPDATE conversation_archives SET payload = :payload, raw_bytes = :raw WHERE conversation_id = :id"),
+            {"payload": payload, "raw": len(raw), "id": conversation_id}
+        )
+
+
+def upgrade(conn):
+    if _build_map(conn, "conversations", "created_at"):
+        for table, column in (
+            ("conversations", "id"),
+            ("messages", "conversation_id"),
+            ("conversation_archives", "conversation_id"),
+        ):
+            conn.execute(text(
+                f"UPDATE {table} SET {column} = "
+                f"(SELECT new FROM conversations_id_map WHERE old = {table}.{column}) "
+                f"WHERE {column} IN (SELECT old FROM conversations_id_map)"
+            ))
+
+    if _build_map(conn, "messages", "timestamp"):
+        conn.execute(text(
+            "UPDATE messages SET id = (SELECT new FROM messages_id_map WHERE old = messages.id) "
+            "WHERE id IN (SELECT old FROM messages_id_map)"
+        ))
+
+    _rewrite_archives(conn)
+    conn.execute(text("DROP TABLE temp.conversations_id_map"))
+    conn.execute(text("DROP TABLE temp.messages_id_map"))
+
+    conn.execute(text("DROP INDEX IF EXISTS ix_messages_conversation_timestamp"))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_messages_conversation_id ON messages (conversation_id, id)"))
+    conn.execute(text("ANALYZE"))
@@ -0,0 +1,10 @@
+"""Session Moodle persistée (cookies chiffrés) par utilisateur"""
+from app.migrations import add_column
+
+VERSION = 9
+DESCRIPTION = "Utilisateurs : moodle_session_encrypted, moodle_session_expires"
+
+
+def upgrade(conn):
+    add_column(conn, "users", "moodle_session_encrypted", "VARCHAR")
+    add_column(conn, "users", "moodle_session_expires", "DATETIME")
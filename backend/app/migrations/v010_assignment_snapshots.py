@@ -0,0 +1,22 @@
+"""Dernier état connu des devoirs Moodle par utilisateur (notifications sur changement)"""
+from sqlalchemy import text
+
+VERSION = 10
+DESCRIPTION = "Table assignment_snapshots"
+
+
+def upgrade(conn):
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS assignment_snapshots (
+            id INTEGER NOT NULL PRIMARY KEY,
+            user_id INTEGER NOT NULL REFERENCES users (id) ON DELETE CASCADE,
+            fingerprint VARCHAR(40) NOT NULL,
+            title VARCHAR NOT NULL,
+            link VARCHAR,
+            due_date VARCHAR,
+            due_at DATETIME,
+            first_seen DATETIME,
+            reminded_at DATETIME,
+            CONSTRAINT uq_assignment_snapshots_user_fingerprint UNIQUE (user_id, fingerprint)
+        )
+    """))
@@ -0,0 +1,9 @@
+"""Délai de grâce avant d'oublier un devoir sans échéance interprétable"""
+from app.migrations import add_column
+
+VERSION = 11
+DESCRIPTION = "Devoirs suivis : missing_since"
+
+
+def upgrade(conn):
+    add_column(conn, "assignment_snapshots", "missing_since", "DATETIME")
@@ -1,5 +1,8 @@
 from app.models.conversation import Conversation
 from app.models.message import Message
 from app.models.document import Document
+from app.models.conversation_archive import ConversationArchive
+from app.models.user import User
+from app.models.assignment_snapshot import AssignmentSnapshot
 
-__all__ = ["Conversation", "Message", "Document"]
\ No newline at end of file
+__all__ = ["Conversation", "Message", "Document", "ConversationArchive", "User", "AssignmentSnapshot"]
\ No newline at end of file
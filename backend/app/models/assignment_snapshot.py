@@ -0,0 +1,24 @@
+from sqlalchemy import Column, String, DateTime, Integer, ForeignKey, UniqueConstraint
+from app.database import Base
+from datetime import datetime
+
+class AssignmentSnapshot(Base):
+    """Dernier état connu d'un devoir Moodle pour un utilisateur (détection des changements)"""
+    __tablename__ = "assignment_snapshots"
+    __table_args__ = (
+        UniqueConstraint("user_id", "fingerprint", name="uq_assignment_snapshots_user_fingerprint"),
+    )
+    
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    fingerprint = Column(String(40), nullable=False)  # SHA-1 du lien (ou du titre normalisé)
+    title = Column(String, nullable=False)
+    link = Column(String, nullable=True)
+    due_date = Column(String, nullable=True)  # Texte affiché par Moodle
+    due_at = Column(DateTime, nullable=True)  # Échéance interprétée (si possible)
+    first_seen = Column(DateTime, default=datetime.utcnow)
+    reminded_at = Column(DateTime, nullable=True)  # Rappel « échéance proche » envoyé
+    missing_since = Column(DateTime, nullable=True)  # Absent du calendrier depuis (échéance non interprétée)
+    
+    def __repr__(self):
+        return f"<AssignmentSnapshot {self.user_id}: {self.title}>"
@@ -1,17 +1,29 @@
-from sqlalchemy import Column, String, DateTime, Text
+from sqlalchemy import Column, String, DateTime, Text, Integer, Index
 from sqlalchemy.orm import relationship
 from app.database import Base
 from datetime import datetime
-import uuid
+from app.utils.ulid import new_ulid
+
+# Longueur de l'aperçu du dernier message
+PREVIEW_CHARS = 200
 
 class Conversation(Base):
     __tablename__ = "conversations"
+    __table_args__ = (
+        Index("ix_conversations_user_updated", "user_id", "updated_at", "id"),
+        Index("ix_conversations_updated", "updated_at", "id"),
+    )
     
-    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    id = Column(String, primary_key=True, default=new_ulid)
     user_id = Column(String, nullable=True)  # Null pour accès libre
     title = Column(String(500), default="Nouvelle conversation")
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Compteurs dénormalisés, tenus à jour à l'ajout des messages (liste d'historique sans jointure)
+    message_count = Column(Integer, nullable=False, default=0, server_default="0")
+    last_message_preview = Column(String(200), nullable=True)
+    # Messages déplacés dans conversation_archives (réhydratés à l'ouverture)
+    archived_at = Column(DateTime, nullable=True)
     
     # Relation avec les messages
     messages = relationship("Message", back_populates="conversation", cascade="all, delete-orphan")
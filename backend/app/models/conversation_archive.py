@@ -0,0 +1,17 @@
+from sqlalchemy import Column, String, DateTime, Integer, LargeBinary, ForeignKey
+from app.database import Base
+from datetime import datetime
+
+class ConversationArchive(Base):
+    """Messages d'une conversation inactive, compressés en un seul blob (stockage froid)"""
+    __tablename__ = "conversation_archives"
+    
+    conversation_id = Column(String, ForeignKey("conversations.id"), primary_key=True)
+    codec = Column(String(10), nullable=False)  # 'zstd' ou 'zlib'
+    payload = Column(LargeBinary, nullable=False)  # JSON compressé des messages
+    message_count = Column(Integer, nullable=False, default=0)
+    raw_bytes = Column(Integer, nullable=False, default=0)
+    archived_at = Column(DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f"<ConversationArchive {self.conversation_id}: {self.message_count} messages>"
@@ -1,13 +1,17 @@
-from sqlalchemy import Column, String, DateTime, Text, ForeignKey
+from sqlalchemy import Column, String, DateTime, Text, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from app.database import Base
 from datetime import datetime
-import uuid
+from app.utils.ulid import new_ulid
 
 class Message(Base):
     __tablename__ = "messages"
+    __table_args__ = (
+        # Ids ULID : l'ordre de la clé primaire est l'ordre chronologique
+        Index("ix_messages_conversation_id", "conversation_id", "id"),
+    )
     
-    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    id = Column(String, primary_key=True, default=new_ulid)
     conversation_id = Column(String, ForeignKey("conversations.id"), nullable=False)
     role = Column(String(50), nullable=False)  # 'user' ou 'assistant'
     content = Column(Text, nullable=False)
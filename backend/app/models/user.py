@@ -21,3 +21,6 @@ class User(Base):
     uvci_username = Column(String, nullable=True)
     uvci_password_encrypted = Column(String, nullable=True)
     last_moodle_sync = Column(DateTime(timezone=True), nullable=True)
+    # Session Moodle réutilisable (cookies chiffrés, voir moodle_session)
+    moodle_session_encrypted = Column(String, nullable=True)
+    moodle_session_expires = Column(DateTime(timezone=True), nullable=True)
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr
-from typing import Optional
+from typing import Literal, Optional
 from datetime import datetime
 
 class UserBase(BaseModel):
@@ -27,6 +27,9 @@ class Token(BaseModel):
     token_type: str
     user: UserResponse
 
+class RoleUpdate(BaseModel):
+    role: Literal["student", "admin"]
+
 class TokenData(BaseModel):
     email: Optional[str] = None
     role: Optional[str] = None
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import List
+from typing import List, Optional
 from datetime import datetime
 from app.schemas.chat import MessageSchema
 
@@ -9,6 +9,7 @@ class ConversationSchema(BaseModel):
     created_at: datetime
     updated_at: datetime
     message_count: int
+    last_message_preview: Optional[str] = None
     
     class Config:
         from_attributes = True
@@ -21,4 +22,26 @@ class ConversationDetailSchema(BaseModel):
     messages: List[MessageSchema]
     
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class ConversationPageSchema(BaseModel):
+    conversations: List[ConversationSchema]
+    next_cursor: Optional[str] = None
+
+class MessagePageSchema(BaseModel):
+    messages: List[MessageSchema]
+    next_cursor: Optional[str] = None
+
+
+class SearchResultSchema(BaseModel):
+    message_id: str
+    conversation_id: str
+    conversation_title: str
+    role: str
+    timestamp: datetime
+    snippet: str
+    score: float
+
+class SearchPageSchema(BaseModel):
+    results: List[SearchResultSchema]
+    next_offset: Optional[int] = None
@@ -1,6 +1,16 @@
-from app.services.ai_service import gemini_service
 # RAG désactivé pour limiter l'utilisation de mémoire
 # from app.services.rag_service import rag_service
-from app.services.conversation_service import conversation_service
 
 __all__ = ["gemini_service", "conversation_service"]
+
+
+def __getattr__(name):
+    # Imports paresseux : charger un sous-module (ex. rag_service) ne doit pas
+    # initialiser Gemini, dont ai_service interroge l'API dès l'import
+    if name == "gemini_service":
+        from app.services.ai_service import gemini_service
+        return gemini_service
+    if name == "conversation_service":
+        from app.services.conversation_service import conversation_service
+        return conversation_service
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,304 @@
+"""
+Archivage des conversations inactives (stockage froid).
+
+Les messages d'une conversation sans activité depuis ARCHIVE_IDLE_DAYS jours
+sont sérialisés en JSON, compressés (zstd si `zstandard` est installé, zlib
+sinon) dans un seul blob de `conversation_archives`, puis supprimés de la
+table `messages` : la table chaude, ses index et l'index plein texte ne
+contiennent plus que l'historique récent. La conversation reste dans la liste
+(compteurs dénormalisés) et ses messages sont réhydratés à son ouverture.
+"""
+import asyncio
+import json
+import logging
+import time
+import zlib
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import delete, select, text, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.models.conversation import Conversation
+from app.models.conversation_archive import ConversationArchive
+from app.models.message import Message
+from app.services.db_writer import db_writer
+
+try:
+    import zstandard
+except ImportError:  # dépendance optionnelle
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+CODEC_ZSTD = "zstd"
+CODEC_ZLIB = "zlib"
+ZSTD_LEVEL = 10
+ZLIB_LEVEL = 9
+
+
+def default_codec() -> str:
+    if settings.ARCHIVE_CODEC == "auto":
+        return CODEC_ZSTD if zstandard is not None else CODEC_ZLIB
+    return settings.ARCHIVE_CODEC
+
+
+def compress(data: bytes, codec: Optional[str] = None) -> Tuple[str, bytes]:
+    """(codec, données compressées)"""
+    codec = codec or default_codec()
+    if codec == CODEC_ZSTD:
+        if zstandard is None:
+            raise RuntimeError("Codec zstd demandé mais 'zstandard' n'est pas installé")
+        return codec, zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    if codec == CODEC_ZLIB:
+        return codec, zlib.compress(data, ZLIB_LEVEL)
+    raise ValueError(f"Codec d'archive inconnu: {codec}")
+
+
+def decompress(codec: str, payload: bytes) -> bytes:
+    if codec == CODEC_ZSTD:
+        if zstandard is None:
+            raise RuntimeError("Archive zstd illisible : installer 'zstandard'")
+        return zstandard.ZstdDecompressor().decompress(payload)
+    if codec == CODEC_ZLIB:
+        return zlib.decompress(payload)
+    raise ValueError(f"Codec d'archive inconnu: {codec}")
+
+
+def serialize_messages(messages: List[Message]) -> bytes:
+    return json.dumps(
+        [
+            {
+                "id": msg.id,
+                "role": msg.role,
+                "content": msg.content,
+                "timestamp": msg.timestamp.isoformat() if msg.timestamp else None,
+                "sources": msg.sources,
+            }
+            for msg in messages
+        ],
+        ensure_ascii=False,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+def deserialize_messages(conversation_id: str, data: bytes) -> List[Message]:
+    return [
+        Message(
+            id=item["id"],
+            conversation_id=conversation_id,
+            role=item["role"],
+            content=item["content"],
+            timestamp=datetime.fromisoformat(item["timestamp"]) if item["timestamp"] else None,
+            sources=item["sources"],
+        )
+        for item in json.loads(data)
+    ]
+
+
+class ArchiveService:
+    """Déplace les conversations inactives en stockage froid et les réhydrate à la demande"""
+
+    def __init__(self):
+        self.last_report: Optional[Dict] = None
+        self.stats = {"runs": 0, "archived": 0, "rehydrated": 0}
+
+    async def archive_idle_conversations(
+        self,
+        idle_days: Optional[int] = None,
+        batch_size: Optional[int] = None
+    ) -> Dict:
+        """
+        Archive les conversations sans activité depuis `idle_days` jours,
+        par lots ; retourne le rapport (octets récupérés, taille de la table chaude)
+        """
+        idle_days = settings.ARCHIVE_IDLE_DAYS if idle_days is None else idle_days
+        batch_size = batch_size or settings.ARCHIVE_BATCH_SIZE
+        cutoff = datetime.utcnow() - timedelta(days=idle_days)
+        start = time.perf_counter()
+        hot_before = await self.hot_table_stats()
+        report = {
+            "idle_days": idle_days,
+            "codec": default_codec(),
+            "conversations": 0,
+            "messages": 0,
+            "raw_bytes": 0,
+            "archive_bytes": 0,
+        }
+
+        after = None
+        while True:
+            batch = await self._read_batch(cutoff, after, batch_size)
+            if batch is None:
+                break
+            after, conversations = batch
+            archives = await asyncio.to_thread(self._pack, conversations)
+            if archives:
+                archived = await db_writer.submit(
+                    lambda session, archives=archives: self._store(session, archives)
+                )
+                for archive in archived:
+                    report["conversations"] += 1
+                    report["messages"] += archive["message_count"]
+                    report["raw_bytes"] += archive["raw_bytes"]
+                    report["archive_bytes"] += len(archive["payload"])
+
+        hot_after = await self.hot_table_stats()
+        report["hot_messages"] = hot_after["messages"]
+        report["hot_table_bytes"] = hot_after["bytes"]
+        report["bytes_reclaimed"] = (
+            hot_before["bytes"] - hot_after["bytes"]
+            if hot_before["bytes"] is not None and hot_after["bytes"] is not None
+            else report["raw_bytes"] - report["archive_bytes"]
+        )
+        report["free_bytes"] = hot_after["free_bytes"]
+        report["duration_s"] = round(time.perf_counter() - start, 2)
+
+        self.stats["runs"] += 1
+        self.stats["archived"] += report["conversations"]
+        self.last_report = {**report, "finished_at": datetime.utcnow().isoformat()}
+        logger.info(
+            f"🗄️ Archivage: {report['conversations']} conversations, {report['messages']} messages, "
+            f"{report['bytes_reclaimed']} octets récupérés, table chaude {report['hot_table_bytes']} octets"
+        )
+        return report
+
+    async def _read_batch(self, cutoff: datetime, after, batch_size: int):
+        """Prochain lot de conversations inactives et leurs messages (parcours par clé)"""
+        async with AsyncSessionLocal() as db:
+            query = select(Conversation.id, Conversation.updated_at).where(
+                Conversation.updated_at < cutoff,
+                Conversation.archived_at.is_(None)
+            )
+            if after is not None:
+                query = query.where(tuple_(Conversation.updated_at, Conversation.id) > tuple_(*after))
+            rows = (await db.execute(
+                query.order_by(Conversation.updated_at, Conversation.id).limit(batch_size)
+            )).all()
+            if not rows:
+                return None
+
+            messages = (await db.execute(
+                select(Message)
+                .where(Message.conversation_id.in_([row.id for row in rows]))
+                .order_by(Message.conversation_id, Message.id)
+            )).scalars().all()
+
+        by_conversation: Dict[str, List[Message]] = {}
+        for msg in messages:
+            by_conversation.setdefault(msg.conversation_id, []).append(msg)
+        conversations = [
+            (row.id, row.updated_at, by_conversation[row.id])
+            for row in rows if row.id in by_conversation
+        ]
+        return (rows[-1].updated_at, rows[-1].id), conversations
+
+    @staticmethod
+    def _pack(conversations) -> List[Dict]:
+        """Sérialise et compresse (hors boucle d'événements)"""
+        archives = []
+        for conversation_id, updated_at, messages in conversations:
+            raw = serialize_messages(messages)
+            codec, payload = compress(raw)
+            archives.append({
+                "conversation_id": conversation_id,
+                "updated_at": updated_at,
+                "codec": codec,
+                "payload": payload,
+                "message_count": len(messages),
+                "raw_bytes": len(raw),
+            })
+        return archives
+
+    @staticmethod
+    async def _store(session: AsyncSession, archives: List[Dict]) -> List[Dict]:
+        """Écrit les blobs et supprime les messages (dans la transaction de l'écrivain)"""
+        now = datetime.utcnow()
+        stored = []
+        for archive in archives:
+            # Conversation reprise depuis la lecture : on la laisse chaude
+            result = await session.execute(
+                update(Conversation)
+                .where(
+                    Conversation.id == archive["conversation_id"],
+                    Conversation.updated_at == archive["updated_at"],
+                    Conversation.archived_at.is_(None)
+                )
+                .values(archived_at=now, updated_at=Conversation.updated_at)
+                .execution_options(synchronize_session=False)
+            )
+            if result.rowcount == 0:
+                continue
+            session.add(ConversationArchive(
+                conversation_id=archive["conversation_id"],
+                codec=archive["codec"],
+                payload=archive["payload"],
+                message_count=archive["message_count"],
+                raw_bytes=archive["raw_bytes"],
+                archived_at=now,
+            ))
+            await session.execute(
+                delete(Message)
+                .where(Message.conversation_id == archive["conversation_id"])
+                .execution_options(synchronize_session=False)
+            )
+            stored.append(archive)
+        return stored
+
+    async def ensure_hot(self, conversation: Optional[Conversation], db: AsyncSession) -> bool:
+        """Réhydrate les messages d'une conversation archivée avant lecture ; True si restaurée"""
+        if conversation is None or conversation.archived_at is None:
+            return False
+        restored = await db_writer.submit(
+            lambda session: self._rehydrate(session, conversation.id)
+        )
+        await db.refresh(conversation)
+        if restored:
+            self.stats["rehydrated"] += 1
+            logger.info(f"♻️ Conversation {conversation.id} réhydratée ({restored} messages)")
+        return restored > 0
+
+    @staticmethod
+    async def _rehydrate(session: AsyncSession, conversation_id: str) -> int:
+        restored = 0
+        # Absente si une requête concurrente l'a déjà restaurée
+        archive = await session.get(ConversationArchive, conversation_id)
+        if archive is not None:
+            messages = deserialize_messages(conversation_id, decompress(archive.codec, archive.payload))
+            session.add_all(messages)
+            await session.delete(archive)
+            restored = len(messages)
+        await session.execute(
+            update(Conversation)
+            .where(Conversation.id == conversation_id)
+            .values(archived_at=None, updated_at=Conversation.updated_at)
+            .execution_options(synchronize_session=False)
+        )
+        return restored
+
+    @staticmethod
+    async def hot_table_stats() -> Dict:
+        """Messages en table chaude, octets occupés (table, index, plein texte) et pages libres"""
+        async with AsyncSessionLocal() as db:
+            count = (await db.execute(text("SELECT COUNT(*) FROM messages"))).scalar()
+            page_size = (await db.execute(text("PRAGMA page_size"))).scalar()
+            free_pages = (await db.execute(text("PRAGMA freelist_count"))).scalar()
+            try:
+                hot_bytes = (await db.execute(text(
+                    "SELECT SUM(pgsize) FROM dbstat WHERE name IN ("
+                    "SELECT name FROM sqlite_master "
+                    "WHERE tbl_name = 'messages' OR name LIKE 'messages_fts_%')"
+                ))).scalar() or 0
+            except Exception:
+                # SQLite compilé sans dbstat
+                hot_bytes = None
+        return {"messages": count, "bytes": hot_bytes, "free_bytes": free_pages * page_size}
+
+    def metrics(self) -> Dict:
+        return {**self.stats, "last_run": self.last_report}
+
+
+# Instance globale
+archive_service = ArchiveService()
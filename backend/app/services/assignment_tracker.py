@@ -0,0 +1,216 @@
+"""
+Détection des changements de devoirs Moodle.
+
+Chaque scan renvoyait par email la liste complète des devoirs. Le dernier état
+connu de chaque devoir est gardé par utilisateur (table assignment_snapshots),
+identifié par une empreinte stable : le lien Moodle du devoir, à défaut son
+titre normalisé. Un scan ne notifie que :
+- les nouveaux devoirs ;
+- les devoirs dont l'échéance affichée a changé ;
+- les devoirs dont l'échéance (interprétée au mieux depuis le texte français)
+  tombe dans les ASSIGNMENT_REMINDER_HOURS prochaines heures, une seule fois.
+Seules les lignes concernées sont écrites, et seulement une fois la
+notification envoyée (`commit`) : un envoi raté laisse l'état inchangé et les
+mêmes devoirs sont proposés au scan suivant. Les devoirs disparus du calendrier
+sont supprimés une fois leur échéance passée ; ceux dont l'échéance n'a pas pu
+être interprétée, après ASSIGNMENT_MISSING_GRACE_DAYS d'absence.
+"""
+import hashlib
+import re
+import unicodedata
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import delete, select, update
+
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.models.assignment_snapshot import AssignmentSnapshot
+from app.services.db_writer import db_writer
+
+MONTHS = {
+    "janvier": 1, "fevrier": 2, "mars": 3, "avril": 4, "mai": 5, "juin": 6, "juillet": 7,
+    "aout": 8, "septembre": 9, "octobre": 10, "novembre": 11, "decembre": 12,
+    "janv": 1, "fevr": 2, "avr": 4, "juil": 7, "sept": 9, "oct": 10, "nov": 11, "dec": 12,
+}
+_DATE_RE = re.compile(r"(\d{1,2})(?:er)?\s+([a-z]+)\.?(?:\s+(\d{4}))?")
+_TIME_RE = re.compile(r"(\d{1,2})\s*[:h]\s*(\d{2})")
+
+
+def _normalize(text: str) -> str:
+    """Minuscules, sans accents, espaces réduits"""
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return " ".join(text.split())
+
+
+def fingerprint(assignment: Dict) -> str:
+    """Empreinte stable d'un devoir : son lien Moodle, sinon son titre"""
+    link = (assignment.get("link") or "").strip()
+    key = link if link and link != "#" else "title:" + _normalize(assignment.get("title") or "")
+    return hashlib.sha1(key.encode()).hexdigest()
+
+
+def parse_due_date(text: Optional[str], now: Optional[datetime] = None) -> Optional[datetime]:
+    """
+    Échéance depuis le texte du calendrier Moodle (« Vendredi 20 décembre,
+    23:59 », « Demain, 14:00 »...). None si le format n'est pas reconnu.
+    Sans année, la date la plus proche (au plus deux mois dans le passé).
+    """
+    if not text:
+        return None
+    now = now or datetime.now()
+    normalized = _normalize(text)
+    time_match = _TIME_RE.search(normalized)
+    hour, minute = (int(time_match.group(1)), int(time_match.group(2))) if time_match else (23, 59)
+    if hour > 23 or minute > 59:
+        return None
+
+    if "aujourd'hui" in normalized or "aujourd’hui" in normalized:
+        day = now.date()
+    elif "apres-demain" in normalized:
+        day = (now + timedelta(days=2)).date()
+    elif "demain" in normalized:
+        day = (now + timedelta(days=1)).date()
+    elif "hier" in normalized:
+        day = (now - timedelta(days=1)).date()
+    else:
+        for match in _DATE_RE.finditer(normalized):
+            month = MONTHS.get(match.group(2))
+            if month is None:
+                continue
+            year = int(match.group(3)) if match.group(3) else now.year
+            try:
+                candidate = datetime(year, month, int(match.group(1)), hour, minute)
+            except ValueError:
+                return None
+            if not match.group(3) and candidate < now - timedelta(days=60):
+                candidate = candidate.replace(year=year + 1)
+            return candidate
+        return None
+    return datetime(day.year, day.month, day.day, hour, minute)
+
+
+class PendingSnapshots:
+    """Écritures calculées par `diff`, appliquées par `AssignmentTracker.commit`"""
+
+    def __init__(self, user_id: int):
+        self.user_id = user_id
+        self.inserts: List[AssignmentSnapshot] = []
+        self.updates: List[Tuple[int, Dict]] = []
+        self.removed: List[int] = []
+
+    def __bool__(self):
+        return bool(self.inserts or self.updates or self.removed)
+
+
+class AssignmentTracker:
+    """Compare les devoirs d'un scan au dernier état connu de l'utilisateur"""
+
+    def __init__(self, reminder_hours: Optional[float] = None):
+        self.reminder = timedelta(hours=settings.ASSIGNMENT_REMINDER_HOURS if reminder_hours is None else reminder_hours)
+        self.missing_grace = timedelta(days=settings.ASSIGNMENT_MISSING_GRACE_DAYS)
+        self.stats = {"diffs": 0, "new": 0, "changed": 0, "due_soon": 0, "removed": 0, "unchanged": 0, "commits": 0}
+
+    async def diff(
+        self, user_id: int, assignments: List[Dict], now: Optional[datetime] = None
+    ) -> Tuple[List[Dict], PendingSnapshots]:
+        """
+        Devoirs à notifier (copies avec `change` = "new", "changed" ou
+        "due_soon", et `previous_due_date` si l'échéance a changé) et écritures
+        en attente. Rien n'est enregistré : appeler `commit` une fois la
+        notification envoyée.
+        """
+        now = now or datetime.now()
+        async with AsyncSessionLocal() as db:
+            known = {
+                row.fingerprint: row
+                for row in (await db.execute(
+                    select(
+                        AssignmentSnapshot.id, AssignmentSnapshot.fingerprint, AssignmentSnapshot.due_date,
+                        AssignmentSnapshot.due_at, AssignmentSnapshot.reminded_at, AssignmentSnapshot.missing_since,
+                    ).where(AssignmentSnapshot.user_id == user_id)
+                )).all()
+            }
+
+        pending = PendingSnapshots(user_id)
+        notify, seen = [], set()
+        for assignment in assignments:
+            key = fingerprint(assignment)
+            if key in seen:
+                continue
+            seen.add(key)
+            due_at = parse_due_date(assignment.get("due_date"), now)
+            due_soon = due_at is not None and now <= due_at <= now + self.reminder
+            previous = known.get(key)
+
+            if previous is None:
+                change = "new"
+                pending.inserts.append(AssignmentSnapshot(
+                    user_id=user_id, fingerprint=key, title=assignment.get("title") or "",
+                    link=assignment.get("link"), due_date=assignment.get("due_date"), due_at=due_at,
+                    first_seen=now, reminded_at=now if due_soon else None,
+                ))
+            elif previous.due_date != assignment.get("due_date"):
+                change = "changed"
+                pending.updates.append((previous.id, {
+                    "title": assignment.get("title") or "", "link": assignment.get("link"),
+                    "due_date": assignment.get("due_date"), "due_at": due_at,
+                    "reminded_at": now if due_soon else None, "missing_since": None,
+                }))
+            elif due_soon and previous.reminded_at is None:
+                change = "due_soon"
+                pending.updates.append((previous.id, {"reminded_at": now, "missing_since": None}))
+            else:
+                if previous.missing_since is not None:
+                    # Réapparu avant la fin du délai de grâce
+                    pending.updates.append((previous.id, {"missing_since": None}))
+                self.stats["unchanged"] += 1
+                continue
+
+            self.stats[change] += 1
+            item = dict(assignment, change=change)
+            if change == "changed":
+                item["previous_due_date"] = previous.due_date
+            notify.append(item)
+
+        # Devoirs disparus : oubliés une fois l'échéance passée (un calendrier vide
+        # par erreur ne doit pas renvoyer tous les devoirs à venir comme nouveaux).
+        # Sans échéance interprétable, seulement après le délai de grâce.
+        for key, row in known.items():
+            if key in seen:
+                continue
+            if row.due_at is not None:
+                if row.due_at < now:
+                    pending.removed.append(row.id)
+            elif row.missing_since is None:
+                pending.updates.append((row.id, {"missing_since": now}))
+            elif now - row.missing_since >= self.missing_grace:
+                pending.removed.append(row.id)
+        self.stats["diffs"] += 1
+        self.stats["removed"] += len(pending.removed)
+        return notify, pending
+
+    async def commit(self, pending: PendingSnapshots):
+        """Enregistre le nouvel état (après envoi de la notification)"""
+        if not pending:
+            return
+
+        async def apply(session):
+            session.add_all(pending.inserts)
+            for snapshot_id, values in pending.updates:
+                await session.execute(
+                    update(AssignmentSnapshot).where(AssignmentSnapshot.id == snapshot_id).values(**values)
+                )
+            if pending.removed:
+                await session.execute(delete(AssignmentSnapshot).where(AssignmentSnapshot.id.in_(pending.removed)))
+
+        await db_writer.submit(apply)
+        self.stats["commits"] += 1
+
+    def metrics(self) -> Dict:
+        return dict(self.stats)
+
+
+# Instance globale
+assignment_tracker = AssignmentTracker()
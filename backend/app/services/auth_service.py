@@ -3,11 +3,13 @@ from typing import Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
-from passlib.context import CryptContext
-from sqlalchemy.orm import Session
-from app.database import get_db
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_async_db
 from app.models.user import User
 from app.config import settings
+from app.services.principal_cache import principal_cache
+from app.services.password_hasher import password_hasher, HasherSaturated
 import os
 import secrets
 import hashlib
@@ -17,15 +19,34 @@ SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-should-be-long-and-secure"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24  # 24 heures
 
-pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/auth/login")
 
+# Colonnes gardées en cache pour l'utilisateur courant (pas de hash de mot de passe)
+PRINCIPAL_FIELDS = (
+    "id", "email", "full_name", "role", "is_active", "created_at", "updated_at",
+    "uvci_username", "uvci_password_encrypted", "last_moodle_sync",
+)
+
 class AuthService:
-    def verify_password(self, plain_password, hashed_password):
-        return pwd_context.verify(plain_password, hashed_password)
+    async def verify_password(self, plain_password, hashed_password):
+        """(valide, nouveau_hash si les coûts Argon2 ont changé), calculé dans le pool de hachage"""
+        try:
+            return await password_hasher.verify(plain_password, hashed_password)
+        except HasherSaturated:
+            raise self._busy()
 
-    def get_password_hash(self, password):
-        return pwd_context.hash(password)
+    async def get_password_hash(self, password):
+        try:
+            return await password_hasher.hash(password)
+        except HasherSaturated:
+            raise self._busy()
+
+    def _busy(self):
+        return HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Serveur d'authentification saturé, réessayez dans quelques secondes",
+            headers={"Retry-After": "2"},
+        )
 
     def create_access_token(self, data: dict, expires_delta: Optional[timedelta] = None):
         to_encode = data.copy()
@@ -37,7 +58,16 @@ class AuthService:
         encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
         return encoded_jwt
 
-    async def get_current_user(self, token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+    async def get_current_user(self, token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)):
+        """
+        Utilisateur du jeton, depuis le cache si possible. L'objet rendu est
+        détaché de la session : les modifications passent par des UPDATE
+        suivis de `invalidate_user`.
+        """
+        fields = principal_cache.get(token)
+        if fields is not None:
+            return User(**fields)
+        
         credentials_exception = HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials",
@@ -51,12 +81,32 @@ class AuthService:
         except JWTError:
             raise credentials_exception
         
-        user = db.query(User).filter(User.email == email).first()
+        result = await db.execute(select(User).where(User.email == email))
+        user = result.scalars().first()
         if user is None:
             raise credentials_exception
+        
+        fields = {name: getattr(user, name) for name in PRINCIPAL_FIELDS}
+        principal_cache.put(token, email, fields, payload.get("exp"))
+        return User(**fields)
+    
+    def invalidate_user(self, email: str):
+        """À appeler après toute modification d'un utilisateur (mot de passe, rôle, identifiants UVCI)"""
+        principal_cache.invalidate_subject(email)
+    
+    async def set_role(self, user_id: int, role: str, db: AsyncSession) -> Optional[User]:
+        """Change le rôle d'un utilisateur"""
+        user = await db.get(User, user_id)
+        if user is None:
+            return None
+        await db.execute(update(User).where(User.id == user_id).values(role=role))
+        await db.commit()
+        self.invalidate_user(user.email)
+        await db.refresh(user)
         return user
 
-    async def get_current_admin(self, current_user: User = Depends(get_current_user)):
+    async def get_current_admin(self, token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)):
+        current_user = await self.get_current_user(token, db)
         if current_user.role != "admin":
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -0,0 +1,74 @@
+"""
+Cache mémoire du contexte récent des conversations.
+
+Chaque tour relisait en base les derniers messages que le serveur venait
+lui-même d'écrire. Le cache garde, par conversation, une file bornée des
+derniers messages ({role, content}) ; les conversations les moins récemment
+utilisées sont évincées (LRU). Il est alimenté à l'écriture des tours et
+invalidé à la suppression ; en cas d'absence, on relit la base.
+"""
+from collections import OrderedDict, deque
+from typing import Dict, List, Optional
+
+from app.config import settings
+
+
+class ContextCache:
+    """LRU de files bornées de messages, une par conversation"""
+
+    def __init__(self, capacity: Optional[int] = None, depth: Optional[int] = None):
+        self.capacity = settings.CONTEXT_CACHE_CONVERSATIONS if capacity is None else capacity
+        self.depth = depth or settings.CONTEXT_CACHE_DEPTH
+        self._entries: "OrderedDict[str, deque]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, conversation_id: str, limit: int) -> Optional[List[dict]]:
+        """Les `limit` derniers messages (ordre chronologique), None si absent"""
+        entry = self._entries.get(conversation_id) if limit <= self.depth else None
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(conversation_id)
+        self.hits += 1
+        return list(entry)[-limit:] if limit else []
+
+    def put(self, conversation_id: str, messages: List[dict]):
+        """Remplace le contexte d'une conversation (messages chronologiques, les plus récents)"""
+        if self.capacity <= 0:
+            return
+        self._entries[conversation_id] = deque(messages, maxlen=self.depth)
+        self._entries.move_to_end(conversation_id)
+        while len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+
+    def append_turn(self, conversation_id: str, question: str, answer: str):
+        """Ajoute un tour à une conversation déjà en cache (sinon la prochaine lecture ira en base)"""
+        entry = self._entries.get(conversation_id)
+        if entry is None:
+            return
+        entry.append({"role": "user", "content": question})
+        entry.append({"role": "assistant", "content": answer})
+        self._entries.move_to_end(conversation_id)
+
+    def invalidate(self, conversation_id: str):
+        self._entries.pop(conversation_id, None)
+
+    def clear(self):
+        self._entries.clear()
+
+    def metrics(self) -> Dict:
+        """Taille et taux de succès"""
+        lookups = self.hits + self.misses
+        return {
+            "conversations": len(self._entries),
+            "capacity": self.capacity,
+            "depth": self.depth,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
+
+
+# Instance globale
+context_cache = ContextCache()
@@ -1,9 +1,15 @@
 
 #### **18. Fichier `app/services/conversation_service.py`**
-from sqlalchemy.orm import Session
-from app.models.conversation import Conversation
+from sqlalchemy import delete, select, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.conversation import Conversation, PREVIEW_CHARS
 from app.models.message import Message
-from typing import List, Optional
+from app.models.conversation_archive import ConversationArchive
+from app.services.context_cache import context_cache
+from app.services.db_writer import db_writer
+from app.utils.ulid import new_ulid, is_ulid
+from app.utils.pagination import encode_cursor, decode_cursor
+from typing import List, Optional, Tuple
 from datetime import datetime
 import json
 
@@ -11,38 +17,70 @@ class ConversationService:
     """Service pour gérer les conversations"""
     
     @staticmethod
-    def create_conversation(title: str, user_id: Optional[str], db: Session) -> Conversation:
+    async def create_conversation(title: str, user_id: Optional[str], db: AsyncSession) -> Conversation:
         """Crée une nouvelle conversation"""
         conversation = Conversation(
             title=title,
             user_id=user_id
         )
         db.add(conversation)
-        db.commit()
-        db.refresh(conversation)
+        await db.commit()
+        await db.refresh(conversation)
+        # Conversation neuve : contexte vide connu, pas de lecture au premier tour
+        context_cache.put(conversation.id, [])
         return conversation
     
     @staticmethod
-    def get_conversation(conversation_id: str, db: Session) -> Optional[Conversation]:
+    async def get_conversation(conversation_id: str, db: AsyncSession) -> Optional[Conversation]:
         """Récupère une conversation par ID"""
-        return db.query(Conversation).filter(Conversation.id == conversation_id).first()
+        return await db.get(Conversation, conversation_id)
     
     @staticmethod
-    def get_all_conversations(db: Session, limit: int = 50) -> List[Conversation]:
-        """Récupère toutes les conversations"""
-        return db.query(Conversation).order_by(
-            Conversation.updated_at.desc()
-        ).limit(limit).all()
+    async def get_all_conversations(db: AsyncSession, limit: int = 50) -> List[Conversation]:
+        """Récupère toutes les conversations (une requête, compteurs dénormalisés)"""
+        result = await db.execute(
+            select(Conversation)
+            .order_by(Conversation.updated_at.desc())
+            .limit(limit)
+        )
+        return list(result.scalars().all())
+    
+    @staticmethod
+    async def get_conversations_page(
+        db: AsyncSession,
+        limit: int,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[Conversation], Optional[str]]:
+        """
+        Page de conversations (plus récentes d'abord), pagination par clé
+        (updated_at, id) : parcours de l'index, sans OFFSET
+        """
+        query = select(Conversation)
+        after = decode_cursor(cursor)
+        if after:
+            query = query.where(tuple_(Conversation.updated_at, Conversation.id) < tuple_(*after))
+        result = await db.execute(
+            query.order_by(Conversation.updated_at.desc(), Conversation.id.desc()).limit(limit + 1)
+        )
+        conversations = list(result.scalars().all())
+        
+        next_cursor = None
+        if len(conversations) > limit:
+            conversations = conversations[:limit]
+            last = conversations[-1]
+            next_cursor = encode_cursor(last.updated_at, last.id)
+        return conversations, next_cursor
     
     @staticmethod
-    def add_message(
+    async def add_message(
         conversation_id: str,
         role: str,
         content: str,
         sources: Optional[List[str]],
-        db: Session
+        db: AsyncSession,
+        commit: bool = True
     ) -> Message:
-        """Ajoute un message à une conversation"""
+        """Ajoute un message à une conversation (commit=False : écriture groupée par db_writer)"""
         message = Message(
             conversation_id=conversation_id,
             role=role,
@@ -51,50 +89,158 @@ class ConversationService:
         )
         db.add(message)
         
-        # Mettre à jour la date de la conversation
-        conversation = ConversationService.get_conversation(conversation_id, db)
+        # Mettre à jour la date et les compteurs de la conversation
+        conversation = await ConversationService.get_conversation(conversation_id, db)
         if conversation:
             conversation.updated_at = datetime.utcnow()
+            conversation.message_count = (conversation.message_count or 0) + 1
+            conversation.last_message_preview = content[:PREVIEW_CHARS]
         
-        db.commit()
-        db.refresh(message)
+        if commit:
+            await db.commit()
+            await db.refresh(message)
         return message
     
     @staticmethod
-    def get_conversation_messages(conversation_id: str, db: Session) -> List[Message]:
+    async def record_turn(
+        conversation_id: str,
+        user_content: str,
+        assistant_content: str,
+        sources: Optional[List[str]],
+        db: AsyncSession,
+        asked_at: Optional[datetime] = None,
+        answered_at: Optional[datetime] = None,
+        user_message_id: Optional[str] = None,
+        assistant_message_id: Optional[str] = None,
+        commit: bool = True
+    ) -> Optional[Tuple[Message, Message]]:
+        """
+        Enregistre un tour complet (question, réponse, date et compteurs de la
+        conversation) dans une seule transaction : ids (ULID) et dates fixés
+        côté client, conversation mise à jour sans la relire, pas de refresh.
+        None si la conversation n'existe plus (supprimée pendant la génération
+        d'une réponse écrite en différé) : aucun message orphelin n'est inséré.
+        """
+        answered_at = answered_at or datetime.utcnow()
+        result = await db.execute(
+            update(Conversation)
+            .where(Conversation.id == conversation_id)
+            .values(
+                updated_at=answered_at,
+                message_count=Conversation.message_count + 2,
+                last_message_preview=assistant_content[:PREVIEW_CHARS]
+            )
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount == 0:
+            # Le tour a pu être ajouté au cache avant l'écriture
+            context_cache.invalidate(conversation_id)
+            return None
+        
+        user_message = Message(
+            id=user_message_id or new_ulid(),
+            conversation_id=conversation_id,
+            role="user",
+            content=user_content,
+            timestamp=asked_at or answered_at
+        )
+        assistant_message = Message(
+            id=assistant_message_id or new_ulid(),
+            conversation_id=conversation_id,
+            role="assistant",
+            content=assistant_content,
+            timestamp=answered_at,
+            sources=json.dumps(sources) if sources else None
+        )
+        db.add_all([user_message, assistant_message])
+        
+        if commit:
+            await db.commit()
+        return user_message, assistant_message
+    
+    @staticmethod
+    async def get_conversation_messages(conversation_id: str, db: AsyncSession) -> List[Message]:
         """Récupère tous les messages d'une conversation"""
-        return db.query(Message).filter(
-            Message.conversation_id == conversation_id
-        ).order_by(Message.timestamp.asc()).all()
+        result = await db.execute(
+            select(Message)
+            .where(Message.conversation_id == conversation_id)
+            .order_by(Message.id.asc())
+        )
+        return list(result.scalars().all())
     
     @staticmethod
-    def get_conversation_context(conversation_id: str, db: Session, limit: int = 10) -> List[dict]:
+    async def get_messages_page(
+        conversation_id: str,
+        db: AsyncSession,
+        limit: int,
+        before: Optional[str] = None
+    ) -> Tuple[List[Message], Optional[str]]:
+        """
+        Messages d'une conversation par page, des plus récents aux plus anciens
+        (défilement vers le haut) ; chaque page est rendue dans l'ordre chronologique.
+        Le curseur est l'id (ULID, ordonné dans le temps) du plus ancien message rendu.
+        """
+        query = select(Message).where(Message.conversation_id == conversation_id)
+        if before:
+            if not is_ulid(before):
+                raise ValueError("Curseur de pagination invalide")
+            query = query.where(Message.id < before)
+        result = await db.execute(query.order_by(Message.id.desc()).limit(limit + 1))
+        messages = list(result.scalars().all())
+        
+        next_cursor = None
+        if len(messages) > limit:
+            messages = messages[:limit]
+            next_cursor = messages[-1].id
+        messages.reverse()
+        return messages, next_cursor
+    
+    @staticmethod
+    async def get_conversation_context(conversation_id: str, db: AsyncSession, limit: int = 10) -> List[dict]:
         """
         Récupère le contexte récent d'une conversation pour l'IA
+        (cache mémoire d'abord, base de données sinon)
         """
-        messages = db.query(Message).filter(
-            Message.conversation_id == conversation_id
-        ).order_by(Message.timestamp.desc()).limit(limit).all()
+        cached = context_cache.get(conversation_id, limit)
+        if cached is not None:
+            return cached
+        
+        # Relire après les tours encore en file d'écriture
+        await db_writer.wait_for(conversation_id)
+        depth = max(limit, context_cache.depth)
+        result = await db.execute(
+            select(Message)
+            .where(Message.conversation_id == conversation_id)
+            .order_by(Message.id.desc())
+            .limit(depth)
+        )
+        messages = result.scalars().all()
         
         # Inverser pour avoir l'ordre chronologique
         messages = reversed(messages)
         
-        return [
+        context = [
             {
                 "role": msg.role,
                 "content": msg.content
             }
             for msg in messages
         ]
+        context_cache.put(conversation_id, context)
+        return context[-limit:] if limit else []
     
     @staticmethod
-    def delete_conversation(conversation_id: str, db: Session) -> bool:
+    async def delete_conversation(conversation_id: str, db: AsyncSession) -> bool:
         """Supprime une conversation et ses messages"""
         try:
-            conversation = ConversationService.get_conversation(conversation_id, db)
+            conversation = await ConversationService.get_conversation(conversation_id, db)
             if conversation:
-                db.delete(conversation)
-                db.commit()
+                await db.execute(
+                    delete(ConversationArchive).where(ConversationArchive.conversation_id == conversation_id)
+                )
+                await db.delete(conversation)
+                await db.commit()
+                context_cache.invalidate(conversation_id)
                 return True
             return False
         except:
@@ -0,0 +1,198 @@
+"""
+Coffre des identifiants UVCI (mots de passe Moodle chiffrés en base).
+
+Le chiffrement Fernet était reconstruit (dérivation de clé comprise) à chaque
+appel. Le coffre construit une seule fois un `MultiFernet` :
+- ENCRYPTION_KEYS : clés Fernet séparées par des virgules, la première
+  chiffre, les suivantes ne servent plus qu'à déchiffrer (rotation) ;
+- ENCRYPTION_KEY (ancien réglage) reste acceptée en déchiffrement ;
+- sans aucune clé configurée, seule la clé de développement dérivée de
+  SECRET_KEY est utilisée (comportement historique). Elle n'est jamais
+  acceptée à côté de clés explicites : pour migrer des secrets chiffrés avec
+  elle, l'ajouter en dernière position de ENCRYPTION_KEYS le temps de la
+  rotation.
+`rotate_stored_secrets` rechiffre en tâche de fond les secrets encore
+chiffrés avec une ancienne clé ; `decrypt_many` déchiffre d'un coup les mots
+de passe de tout un scan du scheduler.
+"""
+import base64
+import hashlib
+import logging
+import os
+from typing import Dict, Iterable, List, Optional
+
+from cryptography.fernet import Fernet, InvalidToken, MultiFernet
+from sqlalchemy import select, update
+
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.models.user import User
+from app.services.db_writer import db_writer
+from app.services.principal_cache import principal_cache
+
+logger = logging.getLogger(__name__)
+
+
+def configured_keys() -> List[bytes]:
+    """Clés dans l'ordre : primaire d'abord, puis anciennes clés (sans doublons)"""
+    keys = [key.strip() for key in settings.ENCRYPTION_KEYS.split(",") if key.strip()]
+    legacy = os.getenv("ENCRYPTION_KEY")
+    if legacy:
+        keys.append(legacy)
+    if not keys:
+        # Clé de développement dérivée de SECRET_KEY (comportement historique)
+        secret = os.getenv("SECRET_KEY", "dev-secret-key").encode()
+        keys.append(base64.urlsafe_b64encode(hashlib.sha256(secret).digest()).decode())
+    return [key.encode() for key in dict.fromkeys(keys)]
+
+
+class CredentialVault:
+    """Chiffrement des secrets avec rotation de clés"""
+
+    def __init__(self, keys: Optional[List[bytes]] = None):
+        self._keys = keys
+        self._primary: Optional[Fernet] = None
+        self._cipher: Optional[MultiFernet] = None
+        self._key_count = 0
+        self.stats = {"encrypted": 0, "decrypted": 0, "failures": 0, "rotated": 0}
+
+    def _build(self):
+        # Construit une seule fois (les clés ne changent qu'au redémarrage ou via reload)
+        if self._cipher is None:
+            fernets = [Fernet(key) for key in (self._keys or configured_keys())]
+            self._primary = fernets[0]
+            self._key_count = len(fernets)
+            self._cipher = MultiFernet(fernets)
+
+    @property
+    def cipher(self) -> MultiFernet:
+        self._build()
+        return self._cipher
+
+    @property
+    def primary(self) -> Fernet:
+        self._build()
+        return self._primary
+
+    @property
+    def key_count(self) -> int:
+        self._build()
+        return self._key_count
+
+    def reload(self, keys: Optional[List[bytes]] = None):
+        """Reconstruit le chiffrement (nouvelles clés)"""
+        self._keys = keys
+        self._primary = self._cipher = None
+
+    def encrypt(self, text: Optional[str]) -> Optional[str]:
+        if not text:
+            return None
+        self.stats["encrypted"] += 1
+        return self.cipher.encrypt(text.encode()).decode()
+
+    def decrypt(self, token: Optional[str]) -> Optional[str]:
+        """Déchiffre un secret ; InvalidToken si aucune clé ne convient"""
+        if not token:
+            return None
+        try:
+            plain = self.cipher.decrypt(token.encode()).decode()
+        except InvalidToken:
+            self.stats["failures"] += 1
+            raise
+        self.stats["decrypted"] += 1
+        return plain
+
+    def decrypt_many(self, tokens: Iterable[Optional[str]]) -> List[Optional[str]]:
+        """Déchiffre une liste de secrets ; None pour un secret vide ou illisible"""
+        cipher = self.cipher
+        plains = []
+        for token in tokens:
+            if not token:
+                plains.append(None)
+                continue
+            try:
+                plains.append(cipher.decrypt(token.encode()).decode())
+            except InvalidToken:
+                plains.append(None)
+                self.stats["failures"] += 1
+        self.stats["decrypted"] += sum(1 for plain in plains if plain is not None)
+        return plains
+
+    def needs_rotation(self, token: str) -> bool:
+        """Vrai si le secret n'est pas chiffré avec la clé primaire"""
+        try:
+            self.primary.decrypt(token.encode())
+            return False
+        except InvalidToken:
+            return True
+
+    def rotate(self, token: str) -> str:
+        """Rechiffre un secret avec la clé primaire (InvalidToken si illisible)"""
+        return self.cipher.rotate(token.encode()).decode()
+
+    async def rotate_stored_secrets(self, batch_size: Optional[int] = None) -> Dict:
+        """
+        Rechiffre avec la clé primaire les mots de passe UVCI encore chiffrés
+        avec une ancienne clé, par lots (parcours par id). La mise à jour ne
+        s'applique que si le secret n'a pas changé entre-temps.
+        """
+        batch_size = batch_size or settings.CREDENTIAL_ROTATION_BATCH_SIZE
+        report = {"scanned": 0, "rotated": 0, "unreadable": 0}
+        if self.key_count < 2:
+            return report
+
+        last_id = 0
+        while True:
+            async with AsyncSessionLocal() as db:
+                rows = (await db.execute(
+                    select(User.id, User.email, User.uvci_password_encrypted)
+                    .where(User.id > last_id, User.uvci_password_encrypted.is_not(None))
+                    .order_by(User.id)
+                    .limit(batch_size)
+                )).all()
+            if not rows:
+                break
+            last_id = rows[-1].id
+            report["scanned"] += len(rows)
+
+            changes = []
+            for row in rows:
+                if not self.needs_rotation(row.uvci_password_encrypted):
+                    continue
+                try:
+                    changes.append((row, self.rotate(row.uvci_password_encrypted)))
+                except InvalidToken:
+                    report["unreadable"] += 1
+            if not changes:
+                continue
+
+            async def apply(session, changes=changes):
+                updated = []
+                for row, token in changes:
+                    result = await session.execute(
+                        update(User)
+                        .where(User.id == row.id, User.uvci_password_encrypted == row.uvci_password_encrypted)
+                        .values(uvci_password_encrypted=token, updated_at=User.updated_at)
+                    )
+                    if result.rowcount:
+                        updated.append(row.email)
+                return updated
+
+            for email in await db_writer.submit(apply):
+                report["rotated"] += 1
+                principal_cache.invalidate_subject(email)
+
+        self.stats["rotated"] += report["rotated"]
+        if report["rotated"] or report["unreadable"]:
+            logger.info(
+                f"🔑 Rotation des secrets UVCI : {report['rotated']} rechiffrés, "
+                f"{report['unreadable']} illisibles sur {report['scanned']}"
+            )
+        return report
+
+    def metrics(self) -> Dict:
+        return {"keys": self.key_count, **self.stats}
+
+
+# Instance globale
+credential_vault = CredentialVault()
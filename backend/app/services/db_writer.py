@@ -0,0 +1,278 @@
+"""
+Écrivain unique pour SQLite.
+
+SQLite n'accepte qu'un écrivain à la fois : plutôt que de laisser chaque
+requête se disputer le verrou (et payer un commit par message), les petites
+écritures sont envoyées à une tâche dédiée qui les applique par lots dans une
+seule transaction (group commit).
+
+Une opération est une coroutine `op(session) -> résultat` qui ajoute ou modifie
+des objets sans committer :
+- `submit(op)` attend le commit et rend le résultat ;
+- `enqueue(op, key, payload)` rend la main tout de suite (write-behind) :
+  l'écriture est rejouée en cas d'échec, puis, après DB_WRITER_MAX_RETRIES
+  tentatives, son `payload` (description JSON de l'écriture) est ajouté au
+  fichier DB_WRITER_DEAD_LETTER_PATH pour être rejoué à la main ;
+  `wait_for(key)` permet de relire ses propres écritures (ex. contexte d'une
+  conversation avant le tour suivant).
+"""
+import asyncio
+import json
+import logging
+import os
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Optional, Set
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.database import AsyncSessionLocal
+
+logger = logging.getLogger(__name__)
+
+WriteOp = Callable[[AsyncSession], Awaitable[Any]]
+
+
+class _WriteItem:
+    __slots__ = ("op", "future", "key", "payload", "enqueued_at", "attempts")
+
+    def __init__(
+        self, op: WriteOp, future: Optional[asyncio.Future], key: Optional[str], payload: Optional[Dict] = None
+    ):
+        self.op = op
+        self.future = future
+        self.key = key
+        self.payload = payload
+        self.enqueued_at = time.perf_counter()
+        self.attempts = 0
+
+
+class DBWriter:
+    """File d'écritures consommée par une seule tâche, commit par lot"""
+
+    def __init__(
+        self,
+        session_factory=None,
+        max_batch: Optional[int] = None,
+        max_delay: Optional[float] = None,
+        max_retries: Optional[int] = None,
+        dead_letter_path: Optional[str] = None
+    ):
+        self.session_factory = session_factory or AsyncSessionLocal
+        self.max_batch = max_batch or settings.DB_WRITER_MAX_BATCH
+        self.max_delay = settings.DB_WRITER_MAX_DELAY_MS / 1000 if max_delay is None else max_delay
+        self.max_retries = settings.DB_WRITER_MAX_RETRIES if max_retries is None else max_retries
+        self.dead_letter_path = dead_letter_path or settings.DB_WRITER_DEAD_LETTER_PATH
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._loop = None
+        self._retrying: Set[asyncio.Task] = set()
+        # Écritures write-behind non encore committées, par clé (conversation)
+        self._pending: Dict[str, int] = {}
+        self.stats = {
+            "ops": 0,
+            "batches": 0,
+            "failed_batches": 0,
+            "enqueued": 0,
+            "retries": 0,
+            "dropped": 0,
+            "dead_lettered": 0,
+            "last_lag_ms": 0.0,
+            "max_lag_ms": 0.0,
+        }
+
+    def start(self):
+        """Démarre la tâche d'écriture sur la boucle courante (idempotent)"""
+        loop = asyncio.get_running_loop()
+        if self._task is not None and not self._task.done() and self._loop is loop:
+            return
+        self._loop = loop
+        self._queue = asyncio.Queue()
+        self._pending = {}
+        self._retrying = set()
+        self._task = loop.create_task(self._run())
+
+    async def stop(self):
+        """Applique les écritures en attente (y compris les rejeux) puis arrête la tâche"""
+        if self._task is None or self._task.done():
+            return
+        while True:
+            while self._retrying:
+                await asyncio.gather(*list(self._retrying), return_exceptions=True)
+            await self.flush()
+            if not self._retrying:
+                break
+        await self._queue.put(None)
+        await self._task
+        self._task = None
+
+    async def submit(self, op: WriteOp) -> Any:
+        """Met une écriture en file et attend son commit"""
+        self.start()
+        item = _WriteItem(op, self._loop.create_future(), None)
+        self._queue.put_nowait(item)
+        return await item.future
+
+    def enqueue(self, op: WriteOp, key: Optional[str] = None, payload: Optional[Dict] = None):
+        """
+        Met une écriture en file sans attendre son commit (write-behind).
+        `payload` (JSON) est conservé en lettre morte si l'écriture est abandonnée.
+        """
+        self.start()
+        item = _WriteItem(op, None, key, payload)
+        if key is not None:
+            self._pending[key] = self._pending.get(key, 0) + 1
+        self.stats["enqueued"] += 1
+        self._queue.put_nowait(item)
+
+    async def flush(self):
+        """Attend que toutes les écritures déjà en file soient committées"""
+        if self._task is None or self._task.done():
+            return
+        await self.submit(_noop)
+
+    async def wait_for(self, key: str):
+        """Attend les écritures write-behind en attente pour `key` (lecture de ses propres écritures)"""
+        while self._pending.get(key):
+            if self._task is None or self._task.done():
+                # Plus personne pour appliquer ces écritures (arrêt, tâche tombée)
+                logger.warning(f"⚠️ Écrivain arrêté, écritures en attente ignorées pour {key}")
+                return
+            if self._retrying:
+                await asyncio.sleep(0.05)
+            await self.flush()
+            await asyncio.sleep(0)
+
+    def metrics(self) -> Dict:
+        """Profondeur de file, retard d'écriture et compteurs"""
+        return {
+            "queue_depth": self._queue.qsize() if self._queue else 0,
+            "pending_keys": len(self._pending),
+            "retrying": len(self._retrying),
+            **{k: round(v, 2) if isinstance(v, float) else v for k, v in self.stats.items()},
+        }
+
+    async def _next_batch(self, first):
+        """Regroupe les écritures arrivées pendant le commit précédent (et max_delay)"""
+        batch = [first]
+        deadline = self._loop.time() + self.max_delay
+        while len(batch) < self.max_batch:
+            try:
+                item = self._queue.get_nowait()
+            except asyncio.QueueEmpty:
+                remaining = deadline - self._loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), remaining)
+                except asyncio.TimeoutError:
+                    break
+            if item is None:
+                # Arrêt demandé : le remettre après ce lot
+                self._queue.put_nowait(None)
+                break
+            batch.append(item)
+        return batch
+
+    async def _run(self):
+        while True:
+            item = await self._queue.get()
+            if item is None:
+                return
+            batch = await self._next_batch(item)
+            try:
+                await self._apply(batch)
+            except Exception as e:
+                # Un lot en échec est rejoué écriture par écriture pour isoler la fautive
+                self.stats["failed_batches"] += 1
+                logger.warning(f"⚠️ Lot d'écritures en échec ({len(batch)}), rejeu unitaire: {e}")
+                for single in batch:
+                    try:
+                        await self._apply([single])
+                    except Exception as single_error:
+                        self._failed(single, single_error)
+
+    async def _apply(self, batch):
+        async with self.session_factory() as session:
+            results = []
+            try:
+                for item in batch:
+                    results.append(await item.op(session))
+                await session.commit()
+            except Exception:
+                await session.rollback()
+                raise
+
+        now = time.perf_counter()
+        lag_ms = (now - min(item.enqueued_at for item in batch)) * 1000
+        self.stats["ops"] += len(batch)
+        self.stats["batches"] += 1
+        self.stats["last_lag_ms"] = lag_ms
+        self.stats["max_lag_ms"] = max(self.stats["max_lag_ms"], lag_ms)
+        for item, result in zip(batch, results):
+            if item.future is not None:
+                if not item.future.done():
+                    item.future.set_result(result)
+            else:
+                self._release(item)
+
+    def _failed(self, item: _WriteItem, error: Exception):
+        if item.future is not None:
+            if not item.future.done():
+                item.future.set_exception(error)
+            return
+        item.attempts += 1
+        if item.attempts > self.max_retries:
+            self.stats["dropped"] += 1
+            self._release(item)
+            logger.error(f"❌ Écriture abandonnée après {self.max_retries} tentatives: {error}")
+            self._dead_letter(item, error)
+            return
+        # Rejeu avec attente exponentielle (verrou, disque plein temporaire...)
+        self.stats["retries"] += 1
+        delay = min(5.0, 0.1 * 2 ** (item.attempts - 1))
+        task = self._loop.create_task(self._retry(item, delay))
+        self._retrying.add(task)
+        task.add_done_callback(self._retrying.discard)
+
+    async def _retry(self, item: _WriteItem, delay: float):
+        await asyncio.sleep(delay)
+        self._queue.put_nowait(item)
+
+    def _dead_letter(self, item: _WriteItem, error: Exception):
+        """Conserve l'écriture abandonnée (une ligne JSON) pour la rejouer plus tard"""
+        if item.payload is None:
+            return
+        record = {
+            "failed_at": datetime.utcnow().isoformat(),
+            "key": item.key,
+            "attempts": item.attempts,
+            "error": str(error),
+            "payload": item.payload,
+        }
+        try:
+            os.makedirs(os.path.dirname(self.dead_letter_path) or ".", exist_ok=True)
+            with open(self.dead_letter_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+            self.stats["dead_lettered"] += 1
+            logger.error(f"📮 Écriture conservée dans {self.dead_letter_path} (clé {item.key})")
+        except OSError as e:
+            logger.error(f"❌ Écriture perdue, lettre morte impossible ({self.dead_letter_path}): {e}")
+
+    def _release(self, item: _WriteItem):
+        if item.key is None:
+            return
+        remaining = self._pending.get(item.key, 1) - 1
+        if remaining > 0:
+            self._pending[item.key] = remaining
+        else:
+            self._pending.pop(item.key, None)
+
+
+async def _noop(session: AsyncSession):
+    return None
+
+
+# Instance globale
+db_writer = DBWriter()
@@ -1,6 +1,8 @@
 
 #### **17. Fichier `app/services/document_service.py`**
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import AsyncSessionLocal
 from app.models.document import Document
 from app.services.rag_service import rag_service
 from app.config import settings
@@ -9,12 +11,13 @@ import shutil
 from datetime import datetime
 from typing import List
 import uuid
+import asyncio
 
 class DocumentService:
     """Service pour gérer les documents"""
     
     @staticmethod
-    def save_uploaded_file(file, db: Session) -> Document:
+    async def save_uploaded_file(file, db: AsyncSession) -> Document:
         """
         Sauvegarde un fichier uploadé et crée l'entrée DB
         """
@@ -29,12 +32,13 @@ class DocumentService:
         # Chemin complet
         file_path = os.path.join(settings.UPLOAD_DIR, unique_filename)
         
-        # Sauvegarder le fichier
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        # Sauvegarder le fichier (hors de la boucle d'événements)
+        def write_file():
+            with open(file_path, "wb") as buffer:
+                shutil.copyfileobj(file.file, buffer)
+            return os.path.getsize(file_path)
         
-        # Obtenir la taille du fichier
-        file_size = os.path.getsize(file_path)
+        file_size = await asyncio.to_thread(write_file)
         
         # Créer l'entrée dans la DB
         document = Document(
@@ -47,56 +51,63 @@ class DocumentService:
         )
         
         db.add(document)
-        db.commit()
-        db.refresh(document)
+        await db.commit()
         
         return document
     
     @staticmethod
-    def index_document(document: Document, db: Session) -> bool:
+    async def index_document(document_id: str) -> bool:
         """
-        Index un document dans le système RAG
+        Index un document dans le système RAG (tâche de fond : session propre,
+        celle de la requête est déjà fermée)
         """
-        try:
-            # Indexer avec RAG
-            chunk_count = rag_service.index_document(
-                document.id,
-                document.file_path,
-                document.original_filename
-            )
+        async with AsyncSessionLocal() as db:
+            document = await db.get(Document, document_id)
+            if not document:
+                return False
             
-            if chunk_count > 0:
-                # Mettre à jour le statut
-                document.status = "indexed"
-                document.chunk_count = chunk_count
-                db.commit()
-                return True
-            else:
+            try:
+                # Indexer avec RAG (extraction et embeddings bloquants -> thread)
+                chunk_count = await asyncio.to_thread(
+                    rag_service.index_document,
+                    document.id,
+                    document.file_path,
+                    document.original_filename
+                )
+                
+                if chunk_count > 0:
+                    # Mettre à jour le statut
+                    document.status = "indexed"
+                    document.chunk_count = chunk_count
+                    await db.commit()
+                    return True
+                else:
+                    document.status = "error"
+                    await db.commit()
+                    return False
+                    
+            except Exception as e:
+                print(f"❌ Erreur indexation document: {str(e)}")
                 document.status = "error"
-                db.commit()
+                await db.commit()
                 return False
-                
-        except Exception as e:
-            print(f"❌ Erreur indexation document: {str(e)}")
-            document.status = "error"
-            db.commit()
-            return False
     
     @staticmethod
-    def get_all_documents(db: Session) -> List[Document]:
+    async def get_all_documents(db: AsyncSession) -> List[Document]:
         """Récupère tous les documents"""
-        return db.query(Document).order_by(Document.upload_date.desc()).all()
+        result = await db.execute(select(Document).order_by(Document.upload_date.desc()))
+        return list(result.scalars().all())
     
     @staticmethod
-    def get_document_by_id(document_id: str, db: Session) -> Document:
+    async def get_document_by_id(document_id: str, db: AsyncSession) -> Document:
         """Récupère un document par son ID"""
-        return db.query(Document).filter(Document.id == document_id).first()
+        return await db.get(Document, document_id)
     
     @staticmethod
-    def delete_document(document_id: str, db: Session) -> bool:
+    async def delete_document(document_id: str, db: AsyncSession) -> bool:
         """Supprime un document"""
         try:
-            document = DocumentService.get_document_by_id(document_id, db)
+            document = await DocumentService.get_document_by_id(document_id, db)
             
             if not document:
                 return False
@@ -106,11 +117,11 @@ class DocumentService:
                 os.remove(document.file_path)
             
             # Supprimer les chunks du RAG
-            rag_service.delete_document_chunks(document_id)
+            await asyncio.to_thread(rag_service.delete_document_chunks, document_id)
             
             # Supprimer de la DB
-            db.delete(document)
-            db.commit()
+            await db.delete(document)
+            await db.commit()
             
             return True
             
@@ -61,15 +61,30 @@ class EmailService:
         return await self._send_smtp_email(email, subject, text_body, html_body)
 
     async def send_assignment_notification(self, email: str, assignments: list) -> bool:
-        """Envoie une notification de devoirs ultra-pro (HTML)"""
-        subject = f"📚 {len(assignments)} Nouveaux Devoirs détectés - Vision 360"
+        """
+        Envoie une notification de devoirs ultra-pro (HTML).
+        Un devoir peut porter `change` ("new", "changed", "due_soon") : le motif est affiché.
+        """
+        only_new = all(assign.get('change', 'new') == 'new' for assign in assignments)
+        headline = "Nouveaux Devoirs Détectés" if only_new else "Mise à jour de vos Devoirs"
+        if only_new:
+            subject = f"📚 {len(assignments)} Nouveaux Devoirs détectés - Vision 360"
+        else:
+            subject = f"📚 {len(assignments)} mise(s) à jour de vos devoirs - Vision 360"
         
         # Construction des lignes de devoirs
         assignment_items_html = ""
         for assign in assignments:
-            priority_color = "#ef4444" if "termine" in assign['title'].lower() else "#f59e0b"
+            priority_color = "#ef4444" if "termine" in assign['title'].lower() or assign.get('change') == 'due_soon' else "#f59e0b"
+            change_label = {
+                "new": "🆕 Nouveau",
+                "changed": f"✏️ Échéance modifiée (avant : {assign.get('previous_due_date')})",
+                "due_soon": "⏰ Échéance proche",
+            }.get(assign.get('change'), "")
+            change_html = f'<p style="margin: 0 0 4px 0; color: #4c1d95; font-size: 12px; font-weight: bold;">{change_label}</p>' if change_label else ""
             assignment_items_html += f"""
             <div style="padding: 16px; background-color: #f9fafb; border-radius: 12px; border-left: 4px solid {priority_color}; margin-bottom: 12px;">
+                {change_html}
                 <h4 style="margin: 0; color: #111827; font-size: 16px;">{assign['title']}</h4>
                 <p style="margin: 4px 0 0 0; color: #6b7280; font-size: 13px;">
                     📅 <strong>Échéance :</strong> {assign['due_date']}
@@ -88,7 +103,7 @@ class EmailService:
                     <div style="display: inline-block; padding: 10px; background-color: rgba(255,255,255,0.1); border-radius: 50%; margin-bottom: 15px;">
                         <span style="font-size: 30px;">🚀</span>
                     </div>
-                    <h1 style="color: #ffffff; margin: 0; font-size: 24px; letter-spacing: -0.5px;">Nouveaux Devoirs Détectés</h1>
+                    <h1 style="color: #ffffff; margin: 0; font-size: 24px; letter-spacing: -0.5px;">{headline}</h1>
                     <p style="color: #a5b4fc; margin: 5px 0 0 0;">Votre Vision 360 est à jour</p>
                 </div>
                 <div style="padding: 30px;">
@@ -112,7 +127,8 @@ class EmailService:
         </html>
         """
         
-        text_body = f"Bonjour, {len(assignments)} nouveaux devoirs ont été détectés sur Moodle. Connectez-vous à votre dashboard Vision 360 pour les voir."
+        detected = "nouveaux devoirs ont été détectés" if only_new else "devoirs ont été ajoutés ou modifiés"
+        text_body = f"Bonjour, {len(assignments)} {detected} sur Moodle. Connectez-vous à votre dashboard Vision 360 pour les voir."
 
         return await self._send_smtp_email(email, subject, text_body, html_body)
 
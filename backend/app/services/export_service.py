@@ -0,0 +1,186 @@
+"""
+Export des conversations et de leurs messages (NDJSON ou CSV, gzip optionnel)
+pour l'analyse qualité.
+
+Le flux est produit par lots de taille fixe parcourus par clé : conversations
+sur (updated_at, id), messages sur (conversation_id, id), chaque
+lot dans sa propre courte transaction de lecture. La mémoire reste bornée par
+la taille d'un lot quel que soit le volume exporté, et l'export ne garde pas
+d'instantané de lecture ouvert pendant des minutes (checkpoints WAL).
+Les conversations archivées sont exportées depuis leur blob.
+"""
+import csv
+import io
+import json
+import zlib
+from datetime import datetime
+from typing import AsyncIterator, Dict, List, Optional
+
+from sqlalchemy import select, tuple_
+
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.models.conversation import Conversation
+from app.models.conversation_archive import ConversationArchive
+from app.models.message import Message
+from app.services.archive_service import decompress
+
+FORMATS = ("ndjson", "csv")
+COLUMNS = [
+    "conversation_id",
+    "conversation_title",
+    "user_id",
+    "message_id",
+    "role",
+    "content",
+    "timestamp",
+    "sources",
+]
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+class ExportService:
+    """Export en flux des messages, mémoire constante"""
+
+    @staticmethod
+    async def iter_rows(
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        user_id: Optional[str] = None,
+        batch_size: Optional[int] = None
+    ) -> AsyncIterator[List[Dict]]:
+        """Lots de lignes (une par message) : messages de `start` (inclus) à `end` (exclu)"""
+        batch_size = batch_size or settings.EXPORT_BATCH_SIZE
+        after = None
+        while True:
+            async with AsyncSessionLocal() as db:
+                # Une conversation dont un message est postérieur à `start` a été mise à jour après `start`
+                query = select(Conversation)
+                if start is not None:
+                    query = query.where(Conversation.updated_at >= start)
+                if end is not None:
+                    query = query.where(Conversation.created_at < end)
+                if user_id is not None:
+                    query = query.where(Conversation.user_id == user_id)
+                if after is not None:
+                    query = query.where(tuple_(Conversation.updated_at, Conversation.id) > tuple_(*after))
+                conversations = (await db.execute(
+                    query.order_by(Conversation.updated_at, Conversation.id).limit(batch_size)
+                )).scalars().all()
+            if not conversations:
+                return
+            after = (conversations[-1].updated_at, conversations[-1].id)
+
+            by_id = {conversation.id: conversation for conversation in conversations}
+            hot_ids = [c.id for c in conversations if c.archived_at is None]
+            async for rows in ExportService._hot_messages(hot_ids, by_id, start, end, batch_size):
+                yield rows
+            for conversation in conversations:
+                if conversation.archived_at is not None:
+                    rows = await ExportService._archived_messages(conversation, start, end)
+                    if rows:
+                        yield rows
+
+    @staticmethod
+    async def _hot_messages(conversation_ids, by_id, start, end, batch_size) -> AsyncIterator[List[Dict]]:
+        """Messages d'un lot de conversations, par lots (index conversation_id, id)"""
+        if not conversation_ids:
+            return
+        after = None
+        while True:
+            # Colonnes seules : pas d'objets ORM à construire ni à suivre dans la session
+            query = select(
+                Message.conversation_id, Message.timestamp, Message.id,
+                Message.role, Message.content, Message.sources
+            ).where(Message.conversation_id.in_(conversation_ids))
+            if start is not None:
+                query = query.where(Message.timestamp >= start)
+            if end is not None:
+                query = query.where(Message.timestamp < end)
+            if after is not None:
+                query = query.where(
+                    tuple_(Message.conversation_id, Message.id) > tuple_(*after)
+                )
+            async with AsyncSessionLocal() as db:
+                messages = (await db.execute(
+                    query.order_by(Message.conversation_id, Message.id).limit(batch_size)
+                )).all()
+            if not messages:
+                return
+            last = messages[-1]
+            after = (last.conversation_id, last.id)
+            yield [
+                _row(by_id[msg.conversation_id], msg.id, msg.role, msg.content, msg.timestamp, msg.sources)
+                for msg in messages
+            ]
+
+    @staticmethod
+    async def _archived_messages(conversation: Conversation, start, end) -> List[Dict]:
+        """Messages d'une conversation archivée, lus depuis son blob"""
+        async with AsyncSessionLocal() as db:
+            archive = await db.get(ConversationArchive, conversation.id)
+        if archive is None:
+            return []
+        rows = []
+        for item in json.loads(decompress(archive.codec, archive.payload)):
+            timestamp = datetime.fromisoformat(item["timestamp"]) if item["timestamp"] else None
+            if start is not None and (timestamp is None or timestamp < start):
+                continue
+            if end is not None and (timestamp is None or timestamp >= end):
+                continue
+            rows.append(_row(conversation, item["id"], item["role"], item["content"], timestamp, item["sources"]))
+        return rows
+
+    async def stream(
+        self,
+        fmt: str = "ndjson",
+        compress: bool = False,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        user_id: Optional[str] = None,
+        batch_size: Optional[int] = None
+    ) -> AsyncIterator[bytes]:
+        """Octets de l'export (NDJSON ou CSV), compressés en gzip à la volée si demandé"""
+        if fmt not in FORMATS:
+            raise ValueError(f"Format d'export inconnu: {fmt} ({', '.join(FORMATS)})")
+        # wbits=31 : en-tête et somme de contrôle gzip
+        gzip = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+
+        def encode(text: str) -> bytes:
+            data = text.encode("utf-8")
+            return gzip.compress(data) if gzip else data
+
+        if fmt == "csv":
+            yield encode(_csv_lines([COLUMNS]))
+        async for rows in self.iter_rows(start, end, user_id, batch_size):
+            if fmt == "csv":
+                chunk = encode(_csv_lines([[row[column] for column in COLUMNS] for row in rows]))
+            else:
+                chunk = encode("".join(json.dumps(row, ensure_ascii=False) + "\n" for row in rows))
+            if chunk:
+                yield chunk
+        if gzip:
+            yield gzip.flush()
+
+
+def _row(conversation: Conversation, message_id, role, content, timestamp, sources) -> Dict:
+    return {
+        "conversation_id": conversation.id,
+        "conversation_title": conversation.title,
+        "user_id": conversation.user_id,
+        "message_id": message_id,
+        "role": role,
+        "content": content,
+        "timestamp": timestamp.isoformat() if timestamp else None,
+        "sources": sources,
+    }
+
+
+def _csv_lines(rows) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue()
+
+
+# Instance globale
+export_service = ExportService()
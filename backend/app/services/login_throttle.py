@@ -0,0 +1,96 @@
+"""
+Limitation des tentatives d'authentification (fenêtres glissantes).
+
+Vérifiée avant tout calcul Argon2 : une rafale de tentatives depuis une même
+adresse (ou contre un même compte) est refusée en 429 sans consommer le pool
+de hachage.
+- par IP : toutes les tentatives (connexion, inscription, réinitialisation) ;
+- par email : les échecs de connexion, remis à zéro après un succès.
+Les compteurs sont locaux au processus et bornés en nombre de clés (LRU).
+"""
+import time
+from collections import OrderedDict, deque
+from typing import Deque, Dict, Optional
+
+from app.config import settings
+
+
+class SlidingWindowLimiter:
+    """Au plus `limit` événements par clé sur les `window` dernières secondes"""
+
+    def __init__(self, limit: int, window: float, max_keys: int = 50000):
+        self.limit = limit
+        self.window = window
+        self.max_keys = max_keys
+        self._events: "OrderedDict[str, Deque[float]]" = OrderedDict()
+        self.rejected = 0
+
+    def retry_after(self, key: str) -> float:
+        """Secondes avant la prochaine tentative autorisée (0 si autorisée)"""
+        if self.limit <= 0:
+            return 0.0
+        events = self._events.get(key)
+        if not events:
+            return 0.0
+        now = time.monotonic()
+        while events and now - events[0] >= self.window:
+            events.popleft()
+        if not events:
+            del self._events[key]
+            return 0.0
+        if len(events) < self.limit:
+            return 0.0
+        self.rejected += 1
+        return self.window - (now - events[0])
+
+    def hit(self, key: str):
+        if self.limit <= 0:
+            return
+        events = self._events.get(key)
+        if events is None:
+            events = self._events[key] = deque(maxlen=self.limit)
+            while len(self._events) > self.max_keys:
+                self._events.popitem(last=False)
+        else:
+            self._events.move_to_end(key)
+        events.append(time.monotonic())
+
+    def reset(self, key: str):
+        self._events.pop(key, None)
+
+
+class LoginThrottle:
+    """Limites par IP et par email pour les routes d'authentification"""
+
+    def __init__(self):
+        self.per_ip = SlidingWindowLimiter(settings.AUTH_IP_LIMIT, settings.AUTH_IP_WINDOW_SECONDS)
+        self.per_email = SlidingWindowLimiter(settings.AUTH_EMAIL_FAILURES, settings.AUTH_EMAIL_WINDOW_SECONDS)
+
+    def check(self, ip: Optional[str], email: Optional[str] = None) -> float:
+        """Compte la tentative de `ip` ; rend le délai d'attente si l'IP ou l'email est bloqué"""
+        if ip:
+            wait = self.per_ip.retry_after(ip)
+            if wait:
+                return wait
+            self.per_ip.hit(ip)
+        if email:
+            return self.per_email.retry_after(email.lower())
+        return 0.0
+
+    def failure(self, email: str):
+        self.per_email.hit(email.lower())
+
+    def success(self, email: str):
+        self.per_email.reset(email.lower())
+
+    def metrics(self) -> Dict:
+        return {
+            "tracked_ips": len(self.per_ip._events),
+            "tracked_emails": len(self.per_email._events),
+            "rejected_ip": self.per_ip.rejected,
+            "rejected_email": self.per_email.rejected,
+        }
+
+
+# Instance globale
+login_throttle = LoginThrottle()
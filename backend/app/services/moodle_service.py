@@ -2,6 +2,7 @@ import httpx
 from bs4 import BeautifulSoup
 import logging
 from typing import List, Dict, Optional
+from app.services.moodle_session import MoodleSessionManager
 
 logger = logging.getLogger(__name__)
 
@@ -12,136 +13,116 @@ class MoodleService:
     LOGIN_URL = f"{BASE_URL}/login/index.php"
     CALENDAR_URL = f"{BASE_URL}/calendar/view.php?view=upcoming"
     
-    async def verify_credentials(self, username: str, password: str) -> bool:
+    def __init__(self, transport: Optional[httpx.AsyncBaseTransport] = None):
+        # Client partagé et sessions réutilisées (une connexion par session Moodle, pas par vérification)
+        self.sessions = MoodleSessionManager(self.BASE_URL, transport=transport)
+    
+    async def verify_credentials(self, username: str, password: str, user_id: Optional[int] = None) -> bool:
         """
-        Vérifie les identifiants en tentant une connexion réelle
+        Vérifie les identifiants en tentant une connexion réelle.
+        Avec `user_id`, la session ouverte est gardée pour les vérifications suivantes.
         """
-        async with httpx.AsyncClient() as client:
-            try:
-                # 1. Récupérer le token de login (nécessaire pour Moodle)
-                login_page = await client.get(self.LOGIN_URL)
-                soup = BeautifulSoup(login_page.text, 'html.parser')
-                login_token = soup.find('input', {'name': 'logintoken'})
-                
-                if not login_token:
-                    logger.error("❌ Impossible de trouver le logintoken Moodle")
-                    return False
-                    
-                token_value = login_token['value']
-                
-                # 2. Tenter la connexion
-                payload = {
-                    'username': username,
-                    'password': password,
-                    'logintoken': token_value
-                }
-                
-                response = await client.post(self.LOGIN_URL, data=payload, follow_redirects=True)
-                
-                # 3. Vérifier succès (Si on est redirigé vers le dashboard ou si on ne voit plus le form de login)
-                if "login/index.php" not in str(response.url) and "Déconnexion" in response.text:
-                    logger.info(f"✅ Connexion Moodle réussie pour {username}")
-                    return True
-                else:
-                    logger.warning(f"❌ Échec connexion Moodle pour {username}")
-                    return False
-                    
-            except Exception as e:
-                logger.error(f"❌ Erreur connexion Moodle: {str(e)}")
+        try:
+            cookies = httpx.Cookies()
+            if await self.sessions.login(cookies, username, password) is None:
+                logger.warning(f"❌ Échec connexion Moodle pour {username}")
                 return False
+            logger.info(f"✅ Connexion Moodle réussie pour {username}")
+            if user_id is not None:
+                self.sessions.save(user_id, username, cookies)
+            return True
+        except Exception as e:
+            logger.error(f"❌ Erreur connexion Moodle: {str(e)}")
+            return False
 
-    async def get_assignments(self, username: str, password_encrypted: str) -> List[Dict]:
+    async def get_assignments(self, username: str, password: str, user_id: Optional[int] = None) -> List[Dict]:
         """
-        Récupère les devoirs à venir via scraping du calendrier
+        Récupère les devoirs à venir via scraping du calendrier.
+        `password` est le mot de passe en clair (déchiffré par l'appelant) ; avec
+        `user_id`, la session Moodle de l'utilisateur est réutilisée.
         """
-        # Note: password_encrypted doit être déchiffré avant appel (ici on suppose qu'on reçoit le mdp clair ou qu'on le déchiffre)
-        # Pour simplifier l'intégration avec le Scheduler qui déchiffre déjà, on va assumer que l'appelant a passé le MDP CLAIR.
-        # FIX: Le scheduler passe le MDP crypté, il faut le déchiffrer ICI ou l'appelant le fait.
-        # Convention: Le scheduler déchiffre. Donc ici 'password_encrypted' est en fait le password clair.
-        password = password_encrypted 
+        try:
+            return await self.fetch_assignments(username, password, user_id) or []
+        except Exception as e:
+            logger.error(f"❌ Erreur Scraping Moodle: {str(e)}")
+            return []
 
-        async with httpx.AsyncClient() as client:
-            try:
-                # --- ÉTAPE 1: LOGIN ---
-                login_page = await client.get(self.LOGIN_URL)
-                soup = BeautifulSoup(login_page.text, 'html.parser')
-                token_input = soup.find('input', {'name': 'logintoken'})
-                if not token_input: return []
-                
-                payload = {
-                    'username': username,
-                    'password': password,
-                    'logintoken': token_input['value']
-                }
-                await client.post(self.LOGIN_URL, data=payload, follow_redirects=True)
-                
-                # --- ÉTAPE 2: SCRAPING CALENDRIER ---
-                response = await client.get(self.CALENDAR_URL)
-                soup = BeautifulSoup(response.text, 'html.parser')
-                
-                assignments = []
-                
-                # Sélecteurs basés sur le screenshot (Standard Moodle Boost Theme)
-                # Les événements sont souvent dans des div class="event"
-                events = soup.find_all('div', class_='event')
-                
-                for event in events:
-                    title_elem = event.find('h3', class_='name')
-                    
-                    # Tentative 1: Selecteur standard .date
-                    date_elem = event.find('div', class_='date')
-                    
-                    # Tentative 2: Si échec, chercher dans les colonnes Bootstrap (souvent col-11 contient le texte)
-                    if not date_elem:
-                        # Chercher tous les divs qui pourraient contenir le texte
-                        rows = event.find_all('div', class_='row')
-                        for row in rows:
-                            # Souvent la date est juste du texte dans une row
-                            text = row.get_text(strip=True)
-                            # Heuristique simple : contient un chiffre et ":" (heure)
-                            if any(c.isdigit() for c in text) and ":" in text:
-                                date_text = text
-                                break
-                        else:
-                            date_text = "Date inconnue (Format non reconnu)"
-                            # DEBUG: Afficher le HTML pour comprendre la structure
-                            logger.warning(f"⚠️ Date introuvable pour '{title_elem.get_text(strip=True)}'. HTML: {event.prettify()[:200]}...")
-                    else:
-                        date_text = date_elem.get_text(strip=True)
+    async def fetch_assignments(self, username: str, password: str, user_id: Optional[int] = None) -> Optional[List[Dict]]:
+        """Comme get_assignments, mais None si la connexion est refusée et les erreurs réseau remontent"""
+        html = await self.sessions.fetch(user_id, username, password, self.CALENDAR_URL)
+        if html is None:
+            return None
+        return self.parse_assignments(html)
 
-                    if title_elem:
-                        title = title_elem.get_text(strip=True)
-                        
-                        assignments.append({
-                            "title": title,
-                            "course": "Moodle Event",
-                            "due_date": date_text,
-                            "link": title_elem.find('a')['href'] if title_elem.find('a') else "#"
-                        })
+    def parse_assignments(self, html: str) -> List[Dict]:
+        """Devoirs et échéances de la page calendrier (vue « à venir »)"""
+        soup = BeautifulSoup(html, 'html.parser')
+        
+        assignments = []
+        
+        # Sélecteurs basés sur le screenshot (Standard Moodle Boost Theme)
+        # Les événements sont souvent dans des div class="event"
+        events = soup.find_all('div', class_='event')
+        
+        for event in events:
+            title_elem = event.find('h3', class_='name')
+            
+            # Tentative 1: Selecteur standard .date
+            date_elem = event.find('div', class_='date')
+            
+            # Tentative 2: Si échec, chercher dans les colonnes Bootstrap (souvent col-11 contient le texte)
+            if not date_elem:
+                # Chercher tous les divs qui pourraient contenir le texte
+                rows = event.find_all('div', class_='row')
+                for row in rows:
+                    # Souvent la date est juste du texte dans une row
+                    text = row.get_text(strip=True)
+                    # Heuristique simple : contient un chiffre et ":" (heure)
+                    if any(c.isdigit() for c in text) and ":" in text:
+                        date_text = text
+                        break
+                else:
+                    date_text = "Date inconnue (Format non reconnu)"
+                    # DEBUG: Afficher le HTML pour comprendre la structure
+                    logger.warning(f"⚠️ Date introuvable pour '{title_elem.get_text(strip=True)}'. HTML: {event.prettify()[:200]}...")
+            else:
+                date_text = date_elem.get_text(strip=True)
+
+            if title_elem:
+                title = title_elem.get_text(strip=True)
                 
-                # Fallback: Si pas de classe 'event', chercher les cartes standard 'card' (Moodle 4.0+)
-                if not assignments:
-                    cards = soup.find_all('div', class_='card')
-                    for card in cards:
-                        # Chercher une date dans la carte
-                        date_possible = card.find('div', class_='text-muted') # Souvent la date est en gris
-                        if date_possible:
-                            date_text = date_possible.get_text(strip=True)
-                        else:
-                            date_text = "Date non trouvée"
+                assignments.append({
+                    "title": title,
+                    "course": "Moodle Event",
+                    "due_date": date_text,
+                    "link": title_elem.find('a')['href'] if title_elem.find('a') else "#"
+                })
+        
+        # Fallback: Si pas de classe 'event', chercher les cartes standard 'card' (Moodle 4.0+)
+        if not assignments:
+            cards = soup.find_all('div', class_='card')
+            for card in cards:
+                # Chercher une date dans la carte
+                date_possible = card.find('div', class_='text-muted') # Souvent la date est en gris
+                if date_possible:
+                    date_text = date_possible.get_text(strip=True)
+                else:
+                    date_text = "Date non trouvée"
+
+                if "se termine" in card.get_text() or "s'ouvre" in card.get_text():
+                     assignments.append({
+                        "title": card.find('h3').get_text(strip=True) if card.find('h3') else "Activité",
+                        "course": "UVCI",
+                        "due_date": date_text,
+                        "link": "#"
+                    })
 
-                        if "se termine" in card.get_text() or "s'ouvre" in card.get_text():
-                             assignments.append({
-                                "title": card.find('h3').get_text(strip=True) if card.find('h3') else "Activité",
-                                "course": "UVCI",
-                                "due_date": date_text,
-                                "link": "#"
-                            })
+        return assignments
 
-                return assignments
+    async def close(self):
+        await self.sessions.close()
 
-            except Exception as e:
-                logger.error(f"❌ Erreur Scraping Moodle: {str(e)}")
-                return []
+    def metrics(self) -> Dict:
+        return self.sessions.metrics()
 
 moodle_service = MoodleService()
@@ -0,0 +1,239 @@
+"""
+Sessions Moodle réutilisables.
+
+Chaque vérification ouvrait un nouveau client HTTP puis se reconnectait
+(page de login, POST, redirections) avant de lire le calendrier. Ici :
+- un seul `httpx.AsyncClient` (connexions keep-alive partagées) dont le
+  propre magasin de cookies refuse tout : les cookies de chaque utilisateur
+  vivent dans son `httpx.Cookies`, les redirections sont suivies à la main ;
+- la session d'un utilisateur (cookies + identifiant UVCI) est gardée en
+  mémoire et persistée chiffrée en base avec une expiration
+  (MOODLE_SESSION_TTL_HOURS), pour survivre aux redémarrages ;
+- la session est réutilisée tant que Moodle ne redirige pas vers la page de
+  login ; alors seulement on se reconnecte.
+"""
+import asyncio
+import json
+import logging
+import weakref
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from http.cookiejar import CookieJar, DefaultCookiePolicy
+from typing import Dict, Optional, Tuple
+from urllib.parse import urljoin
+
+import httpx
+from bs4 import BeautifulSoup
+from cryptography.fernet import InvalidToken
+from sqlalchemy import select, update
+
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.models.user import User
+from app.services.credential_vault import credential_vault
+from app.services.db_writer import db_writer
+
+logger = logging.getLogger(__name__)
+
+MAX_REDIRECTS = 10
+LOGIN_PATH = "/login/index.php"
+
+
+def _reject_all_jar() -> CookieJar:
+    """Magasin du client partagé : n'accepte aucun cookie (ils sont par utilisateur)"""
+    return CookieJar(policy=DefaultCookiePolicy(allowed_domains=[]))
+
+
+def dump_cookies(cookies: httpx.Cookies) -> list:
+    return [[c.name, c.value, c.domain, c.path] for c in cookies.jar]
+
+
+def load_cookies(items: list) -> httpx.Cookies:
+    cookies = httpx.Cookies()
+    for name, value, domain, path in items:
+        cookies.set(name, value, domain=domain, path=path)
+    return cookies
+
+
+class MoodleSessionManager:
+    """Client HTTP partagé et sessions Moodle par utilisateur"""
+
+    def __init__(self, base_url: str, transport: Optional[httpx.AsyncBaseTransport] = None,
+                 ttl_hours: Optional[float] = None, cache_size: Optional[int] = None):
+        self.base_url = base_url
+        self.login_url = f"{base_url}{LOGIN_PATH}"
+        self.transport = transport
+        self.ttl = timedelta(hours=settings.MOODLE_SESSION_TTL_HOURS if ttl_hours is None else ttl_hours)
+        self.cache_size = settings.MOODLE_SESSION_CACHE_SIZE if cache_size is None else cache_size
+        self._client: Optional[httpx.AsyncClient] = None
+        # user_id -> (identifiant UVCI, cookies, expiration)
+        self._sessions: "OrderedDict[int, Tuple[str, httpx.Cookies, datetime]]" = OrderedDict()
+        self._locks: "weakref.WeakValueDictionary[int, asyncio.Lock]" = weakref.WeakValueDictionary()
+        self.stats = {"requests": 0, "logins": 0, "login_failures": 0, "reused": 0, "expired": 0, "restored": 0}
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                cookies=_reject_all_jar(),
+                follow_redirects=False,
+                timeout=settings.MOODLE_TIMEOUT_SECONDS,
+                limits=httpx.Limits(
+                    max_connections=settings.MOODLE_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.MOODLE_MAX_CONNECTIONS,
+                ),
+                transport=self.transport,
+            )
+        return self._client
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    # --- HTTP avec cookies par utilisateur ---
+
+    async def request(self, cookies: httpx.Cookies, method: str, url: str,
+                      stop_at_login: bool = False, **kwargs) -> httpx.Response:
+        """
+        Requête avec les cookies de `cookies`, redirections suivies à la main.
+        `stop_at_login` : ne pas suivre une redirection vers la page de login
+        (session expirée), la réponse de redirection est rendue telle quelle.
+        """
+        request = self.client.build_request(method, url, **kwargs)
+        for _ in range(MAX_REDIRECTS + 1):
+            cookies.set_cookie_header(request)
+            self.stats["requests"] += 1
+            response = await self.client.send(request)
+            cookies.extract_cookies(response)
+            if not response.is_redirect or response.next_request is None:
+                return response
+            if stop_at_login and self.is_login_redirect(response):
+                return response
+            await response.aclose()
+            request = response.next_request
+            # En-tête Cookie recalculé depuis le magasin de l'utilisateur
+            request.headers.pop("Cookie", None)
+        raise httpx.TooManyRedirects("Trop de redirections Moodle", request=request)
+
+    def is_login_redirect(self, response: httpx.Response) -> bool:
+        location = urljoin(str(response.url), response.headers.get("Location", ""))
+        return response.is_redirect and LOGIN_PATH in location
+
+    async def login(self, cookies: httpx.Cookies, username: str, password: str) -> Optional[httpx.Response]:
+        """Connexion (page de login puis POST) ; rend la page d'arrivée, None si refusée"""
+        self.stats["logins"] += 1
+        login_page = await self.request(cookies, "GET", self.login_url)
+        soup = BeautifulSoup(login_page.text, "html.parser")
+        token_input = soup.find("input", {"name": "logintoken"})
+        if not token_input:
+            logger.error("❌ Impossible de trouver le logintoken Moodle")
+            self.stats["login_failures"] += 1
+            return None
+
+        payload = {"username": username, "password": password, "logintoken": token_input["value"]}
+        response = await self.request(cookies, "POST", self.login_url, data=payload)
+        if LOGIN_PATH in str(response.url) or "Déconnexion" not in response.text:
+            self.stats["login_failures"] += 1
+            return None
+        return response
+
+    # --- Sessions persistées ---
+
+    async def fetch(self, user_id: Optional[int], username: str, password: str, url: str) -> Optional[str]:
+        """
+        Page `url` pour cet utilisateur : session existante si Moodle l'accepte,
+        sinon nouvelle connexion. None si la connexion est refusée.
+        """
+        if user_id is None:
+            cookies = httpx.Cookies()
+            if await self.login(cookies, username, password) is None:
+                return None
+            return (await self.request(cookies, "GET", url)).text
+
+        lock = self._locks.get(user_id)
+        if lock is None:
+            lock = self._locks[user_id] = asyncio.Lock()
+        async with lock:
+            session = await self._load(user_id, username)
+            if session is not None:
+                cookies, expires_at = session
+                response = await self.request(cookies, "GET", url, stop_at_login=True)
+                if not self.is_login_redirect(response) and LOGIN_PATH not in str(response.url):
+                    self.stats["reused"] += 1
+                    # Moodle prolonge la session à chaque requête : prolonger aussi la nôtre
+                    if expires_at - datetime.utcnow() < self.ttl / 2:
+                        self.save(user_id, username, cookies)
+                    return response.text
+                self.stats["expired"] += 1
+
+            cookies = httpx.Cookies()
+            if await self.login(cookies, username, password) is None:
+                self.forget(user_id)
+                return None
+            response = await self.request(cookies, "GET", url)
+            self.save(user_id, username, cookies)
+            return response.text
+
+    def save(self, user_id: int, username: str, cookies: httpx.Cookies):
+        """Garde la session en mémoire et l'écrit chiffrée en base (write-behind)"""
+        expires_at = datetime.utcnow() + self.ttl
+        self._remember(user_id, (username, cookies, expires_at))
+        blob = credential_vault.encrypt(json.dumps({"username": username, "cookies": dump_cookies(cookies)}))
+
+        async def store(session):
+            await session.execute(
+                update(User)
+                .where(User.id == user_id)
+                .values(moodle_session_encrypted=blob, moodle_session_expires=expires_at, updated_at=User.updated_at)
+            )
+
+        db_writer.enqueue(store)
+
+    def forget(self, user_id: int):
+        """Oublie la session (identifiants changés ou refusés)"""
+        self._sessions.pop(user_id, None)
+
+        async def clear(session):
+            await session.execute(
+                update(User)
+                .where(User.id == user_id, User.moodle_session_encrypted.is_not(None))
+                .values(moodle_session_encrypted=None, moodle_session_expires=None, updated_at=User.updated_at)
+            )
+
+        db_writer.enqueue(clear)
+
+    async def _load(self, user_id: int, username: str) -> Optional[Tuple[httpx.Cookies, datetime]]:
+        entry = self._sessions.get(user_id)
+        if entry is None:
+            async with AsyncSessionLocal() as db:
+                row = (await db.execute(
+                    select(User.moodle_session_encrypted, User.moodle_session_expires).where(User.id == user_id)
+                )).first()
+            if row is None or not row.moodle_session_encrypted or row.moodle_session_expires is None:
+                return None
+            try:
+                data = json.loads(credential_vault.decrypt(row.moodle_session_encrypted))
+            except (InvalidToken, ValueError):
+                return None
+            expires_at = row.moodle_session_expires.replace(tzinfo=None)
+            entry = (data["username"], load_cookies(data["cookies"]), expires_at)
+            self._remember(user_id, entry)
+            self.stats["restored"] += 1
+        else:
+            self._sessions.move_to_end(user_id)
+
+        session_username, cookies, expires_at = entry
+        if session_username != username or expires_at <= datetime.utcnow():
+            self._sessions.pop(user_id, None)
+            return None
+        return cookies, expires_at
+
+    def _remember(self, user_id: int, entry):
+        self._sessions[user_id] = entry
+        self._sessions.move_to_end(user_id)
+        while len(self._sessions) > self.cache_size:
+            self._sessions.popitem(last=False)
+
+    def metrics(self) -> Dict:
+        return {"sessions": len(self._sessions), **self.stats}
@@ -0,0 +1,125 @@
+"""
+Hachage Argon2 hors de la boucle d'événements.
+
+Argon2 est volontairement coûteux (dizaines de ms de CPU, dizaines de Mo de
+mémoire) : exécuté dans un handler `async`, chaque connexion bloquait toutes
+les autres requêtes. Les calculs passent par un pool de threads dédié (argon2
+relâche le GIL) de PASSWORD_HASH_WORKERS threads. Au-delà de
+PASSWORD_HASH_MAX_PENDING calculs en attente, la demande est refusée tout de
+suite (`HasherSaturated` -> 503) plutôt que de s'empiler derrière les autres.
+"""
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, Tuple
+
+from passlib.context import CryptContext
+
+from app.config import settings
+
+
+class HasherSaturated(Exception):
+    """File d'attente du pool de hachage pleine"""
+
+
+def build_context(time_cost: Optional[int] = None, memory_cost: Optional[int] = None,
+                  parallelism: Optional[int] = None) -> CryptContext:
+    """Contexte passlib Argon2 avec les coûts de la configuration"""
+    return CryptContext(
+        schemes=["argon2"],
+        deprecated="auto",
+        argon2__time_cost=time_cost or settings.ARGON2_TIME_COST,
+        argon2__memory_cost=memory_cost or settings.ARGON2_MEMORY_COST_KB,
+        argon2__parallelism=parallelism or settings.ARGON2_PARALLELISM,
+    )
+
+
+class PasswordHasher:
+    """Pool borné pour les hachages et vérifications de mots de passe"""
+
+    def __init__(self, context: Optional[CryptContext] = None, workers: Optional[int] = None,
+                 max_pending: Optional[int] = None):
+        self.context = context or build_context()
+        self.workers = workers or settings.PASSWORD_HASH_WORKERS or os.cpu_count() or 1
+        self.max_pending = settings.PASSWORD_HASH_MAX_PENDING if max_pending is None else max_pending
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self.stats = {"completed": 0, "rejected": 0, "rehashed": 0, "wait_ms": 0.0, "hash_ms": 0.0}
+
+    async def hash(self, password: str) -> str:
+        return await self._run(self.context.hash, password)
+
+    async def verify(self, password: str, password_hash: Optional[str]) -> Tuple[bool, Optional[str]]:
+        """
+        (valide, nouveau_hash) : `nouveau_hash` est fourni quand le hash stocké
+        a été calculé avec d'autres coûts Argon2 et doit être remplacé.
+        """
+        if not password_hash:
+            return False, None
+        valid, new_hash = await self._run(self.context.verify_and_update, password, password_hash)
+        if new_hash:
+            self.stats["rehashed"] += 1
+        return valid, new_hash
+
+    async def _run(self, func, *args):
+        with self._lock:
+            # Admission : refuser tout de suite plutôt que d'allonger la file
+            if self._in_flight >= self.workers + self.max_pending:
+                self.stats["rejected"] += 1
+                raise HasherSaturated()
+            self._in_flight += 1
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="argon2")
+        submitted = time.perf_counter()
+
+        def timed():
+            started = time.perf_counter()
+            try:
+                return func(*args)
+            finally:
+                # Compté à la fin du calcul, même si la requête a été annulée entre-temps
+                with self._lock:
+                    self._in_flight -= 1
+                    self.stats["completed"] += 1
+                    self.stats["wait_ms"] += (started - submitted) * 1000
+                    self.stats["hash_ms"] += (time.perf_counter() - started) * 1000
+
+        try:
+            future = self._executor.submit(timed)
+        except RuntimeError:
+            with self._lock:
+                self._in_flight -= 1
+            raise
+        future.add_done_callback(self._release_cancelled)
+        return await asyncio.wrap_future(future)
+
+    def _release_cancelled(self, future):
+        # Requête abandonnée avant le début du calcul : `timed` ne s'exécutera pas
+        if future.cancelled():
+            with self._lock:
+                self._in_flight -= 1
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def metrics(self) -> Dict:
+        completed = self.stats["completed"]
+        return {
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "in_flight": self._in_flight,
+            "completed": completed,
+            "rejected": self.stats["rejected"],
+            "rehashed": self.stats["rehashed"],
+            "avg_wait_ms": round(self.stats["wait_ms"] / completed, 2) if completed else 0.0,
+            "avg_hash_ms": round(self.stats["hash_ms"] / completed, 2) if completed else 0.0,
+        }
+
+
+# Instance globale
+password_hasher = PasswordHasher()
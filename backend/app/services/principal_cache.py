@@ -0,0 +1,93 @@
+"""
+Cache des utilisateurs authentifiés (principal résolu depuis le jeton JWT).
+
+Chaque requête authentifiée décodait le jeton puis relisait l'utilisateur en
+base. Le cache garde, par jeton, un instantané des colonnes de l'utilisateur
+pendant AUTH_CACHE_TTL_SECONDS (sans dépasser l'expiration du jeton), borné
+en nombre d'entrées (LRU). Un index par sujet (email) permet d'invalider tous
+les jetons d'un utilisateur quand son mot de passe, son rôle ou ses
+identifiants UVCI changent. Le cache est local au processus : avec plusieurs
+workers, le TTL borne le retard des autres.
+"""
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Set, Tuple
+
+from app.config import settings
+
+
+class PrincipalCache:
+    """LRU à durée de vie : jeton -> colonnes de l'utilisateur"""
+
+    def __init__(self, capacity: Optional[int] = None, ttl: Optional[float] = None):
+        self.capacity = settings.AUTH_CACHE_SIZE if capacity is None else capacity
+        self.ttl = settings.AUTH_CACHE_TTL_SECONDS if ttl is None else ttl
+        self._entries: "OrderedDict[str, Tuple[float, str, Dict]]" = OrderedDict()
+        self._by_subject: Dict[str, Set[str]] = {}
+        self.stats = {"hits": 0, "misses": 0, "expired": 0, "evictions": 0, "invalidations": 0}
+
+    def get(self, token: str) -> Optional[Dict]:
+        entry = self._entries.get(token)
+        if entry is None:
+            self.stats["misses"] += 1
+            return None
+        expires_at, subject, fields = entry
+        if time.monotonic() >= expires_at:
+            self._remove(token)
+            self.stats["expired"] += 1
+            self.stats["misses"] += 1
+            return None
+        self._entries.move_to_end(token)
+        self.stats["hits"] += 1
+        return fields
+
+    def put(self, token: str, subject: str, fields: Dict, token_expires: Optional[float] = None):
+        """`token_expires` : claim `exp` du jeton (secondes epoch)"""
+        if self.capacity <= 0 or self.ttl <= 0:
+            return
+        ttl = self.ttl
+        if token_expires is not None:
+            ttl = min(ttl, token_expires - time.time())
+            if ttl <= 0:
+                return
+        self._remove(token)
+        self._entries[token] = (time.monotonic() + ttl, subject, fields)
+        self._by_subject.setdefault(subject, set()).add(token)
+        while len(self._entries) > self.capacity:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.stats["evictions"] += 1
+
+    def invalidate_subject(self, subject: str):
+        """Oublie tous les jetons d'un utilisateur"""
+        for token in list(self._by_subject.get(subject, ())):
+            self._remove(token)
+        self.stats["invalidations"] += 1
+
+    def clear(self):
+        self._entries.clear()
+        self._by_subject.clear()
+
+    def _remove(self, token: str):
+        entry = self._entries.pop(token, None)
+        if entry is None:
+            return
+        tokens = self._by_subject.get(entry[1])
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._by_subject[entry[1]]
+
+    def metrics(self) -> Dict:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            "entries": len(self._entries),
+            "capacity": self.capacity,
+            "ttl_seconds": self.ttl,
+            **self.stats,
+            "hit_rate": round(self.stats["hits"] / lookups, 3) if lookups else 0.0,
+        }
+
+
+# Instance globale
+principal_cache = PrincipalCache()
@@ -1,98 +1,83 @@
-import chromadb
-import google.generativeai as genai
-from typing import List, Dict, Tuple
+from typing import List, Dict, Tuple, Optional
 from app.config import settings
 from app.utils.pdf_processor import pdf_processor
-import os
+from app.utils.embeddings import Embedder, create_embedder
+from app.utils.vector_store import VectorStore, create_vector_store
+from app.utils import index_snapshot
 import logging
 import asyncio
+import os
 
 logger = logging.getLogger(__name__)
 
+# Étiquettes de document recopiées dans les métadonnées de chaque chunk
+TAG_KEYS = ("programme", "level", "academic_year", "audience")
+# Valeur d'un document non étiqueté : il correspond à tous les filtres
+ALL_TAG = "all"
+
 class RAGService:
     """Service pour Retrieval Augmented Generation"""
     
-    def __init__(self):
-        # Configurer Gemini
-        if settings.GOOGLE_API_KEY:
-            genai.configure(api_key=settings.GOOGLE_API_KEY)
-        else:
-            logger.warning("⚠️ GOOGLE_API_KEY manquant. Le RAG ne fonctionnera pas.")
+    def __init__(self, embedder: Optional[Embedder] = None, store: Optional[VectorStore] = None):
+        # Générateur d'embeddings (Gemini par défaut, local pour les benchmarks)
+        self.embedder = embedder or create_embedder(
+            settings.EMBEDDING_BACKEND,
+            api_key=settings.GOOGLE_API_KEY
+        )
 
-        # Créer le dossier de persistance s'il n'existe pas
-        persist_directory = "./data/chroma"
-        os.makedirs(persist_directory, exist_ok=True)
-        
-        # Initialiser ChromaDB
-        self.chroma_client = chromadb.PersistentClient(path=persist_directory)
+        # Le backend vectoriel est ouvert au premier usage (pas au démarrage)
+        self._store = store
         
-        # Créer ou récupérer la collection
-        try:
-            self.collection = self.chroma_client.get_collection("uvci_documents")
-            logger.info("✅ Collection ChromaDB existante récupérée")
-        except:
-            self.collection = self.chroma_client.create_collection(
-                name="uvci_documents",
-                metadata={"description": "Documents UVCI pour RAG"}
-            )
-            logger.info("✅ Nouvelle collection ChromaDB créée")
-        
-        logger.info("✅ RAG Service initialisé (Gemini Embeddings)")
+        logger.info(f"✅ RAG Service initialisé (embeddings {self.embedder.model_id}, backend {settings.VECTOR_STORE_BACKEND})")
     
-    def _get_embedding(self, text: str) -> List[float]:
-        """Génère un embedding avec Gemini"""
-        try:
-            # Nettoyer et tronquer si nécessaire (limite Gemini)
-            if len(text) > 9000:
-                text = text[:9000]
-            
-            # Utiliser le modèle d'embedding le plus récent
-            result = genai.embed_content(
-                model="models/text-embedding-004",
-                content=text,
-                task_type="retrieval_document",
-                title="Document chunk"
+    @property
+    def store(self) -> VectorStore:
+        """Backend vectoriel configuré (ChromaDB, index plat ou quantifié)"""
+        if self._store is None:
+            self._store = create_vector_store(
+                settings.VECTOR_STORE_BACKEND,
+                chroma_directory=settings.CHROMA_PERSIST_DIR,
+                directory=settings.VECTOR_STORE_DIR,
+                dtype=settings.VECTOR_STORE_DTYPE
             )
-            return result['embedding']
-        except Exception as e:
-            logger.warning(f"⚠️ Erreur embedding text-embedding-004, essai embedding-001: {str(e)}")
-            try:
-                # Fallback sur l'ancien modèle
-                result = genai.embed_content(
-                    model="models/embedding-001",
-                    content=text,
-                    task_type="retrieval_document",
-                    title="Document chunk"
-                )
-                return result['embedding']
-            except Exception as e2:
-                logger.error(f"❌ Erreur embedding persistante: {str(e2)}")
-                return []
-
-    def _get_query_embedding(self, text: str) -> List[float]:
-        """Génère un embedding pour une requête"""
-        try:
-            result = genai.embed_content(
-                model="models/text-embedding-004",
-                content=text,
-                task_type="retrieval_query"
-            )
-            return result['embedding']
-        except Exception as e:
-            try:
-                result = genai.embed_content(
-                    model="models/embedding-001",
-                    content=text,
-                    task_type="retrieval_query"
-                )
-                return result['embedding']
-            except Exception as e2:
-                logger.error(f"❌ Erreur embedding requête Gemini: {str(e2)}")
-                return []
-
-    def index_document(self, document_id: str, file_path: str, filename: str) -> int:
+        return self._store
+    
+    @staticmethod
+    def normalize_tags(tags: Optional[Dict[str, str]]) -> Dict[str, str]:
+        """Étiquettes complètes et normalisées d'un document (ALL_TAG si absente)"""
+        tags = tags or {}
+        return {
+            key: (tags.get(key) or ALL_TAG).strip().lower()
+            for key in TAG_KEYS
+        }
+    
+    @staticmethod
+    def build_filter(filters: Optional[Dict[str, str]]) -> Optional[Dict[str, List[str]]]:
+        """
+        Filtre vectoriel {clé: [valeurs]} : un document étiqueté ALL_TAG
+        correspond à toutes les valeurs de la clé
+        """
+        if not filters:
+            return None
+        where = {}
+        for key, value in filters.items():
+            if key not in TAG_KEYS or not value:
+                continue
+            where[key] = [value.strip().lower(), ALL_TAG]
+        return where or None
+    
+    def index_document(
+        self,
+        document_id: str,
+        file_path: str,
+        filename: str,
+        tags: Optional[Dict[str, str]] = None
+    ) -> int:
         """
         Index un document PDF dans la base vectorielle
+        
+        Args:
+            tags: programme, level, academic_year, audience du document
         """
         try:
             # 1. Extraire le texte du PDF
@@ -106,17 +91,17 @@ class RAGService:
             # 2. Nettoyer le texte
             clean_text = pdf_processor.clean_text(raw_text)
             
-            # 3. Découper en chunks
-            # Augmenter la taille des chunks pour Gemini (il gère mieux le contexte)
+            # 3. Découper en chunks (budget en tokens, structure préservée)
             chunks = pdf_processor.chunk_text(
                 clean_text,
-                chunk_size=1000, 
-                overlap=200
+                chunk_size=settings.CHUNK_TOKENS,
+                overlap=settings.CHUNK_OVERLAP_TOKENS
             )
             
             logger.info(f"✂️  {len(chunks)} chunks créés pour {filename}")
             
-            # 4. Créer les embeddings et ajouter à ChromaDB
+            # 4. Créer les embeddings et ajouter au backend vectoriel
+            document_tags = self.normalize_tags(tags)
             ids = []
             embeddings = []
             valid_chunks = []
@@ -126,7 +111,9 @@ class RAGService:
                 # Pause pour éviter de spammer l'API (Rate limit)
                 # Note: Sur la version synchrone on ne peut pas await, mais c'est rapide.
                 
-                embedding = self._get_embedding(chunk)
+                # Modèle effectivement utilisé (repli possible) : un index ne doit
+                # pas mélanger deux espaces d'embedding sans le savoir
+                embedding, model_id = self.embedder.embed_document_with_model(chunk)
                 if embedding:
                     ids.append(f"{document_id}_chunk_{i}")
                     embeddings.append(embedding)
@@ -135,15 +122,17 @@ class RAGService:
                         "document_id": document_id,
                         "filename": filename,
                         "chunk_index": i,
-                        "total_chunks": len(chunks)
+                        "total_chunks": len(chunks),
+                        "embedding_model": model_id,
+                        **document_tags
                     })
             
             if not ids:
                 logger.warning("Aucun embedding généré.")
                 return 0
 
-            # 5. Ajouter à ChromaDB par lots (batch)
-            self.collection.add(
+            # 5. Ajouter au backend vectoriel par lots (batch)
+            self.store.add(
                 ids=ids,
                 embeddings=embeddings,
                 documents=valid_chunks,
@@ -157,32 +146,41 @@ class RAGService:
             logger.error(f"❌ Erreur lors de l'indexation: {str(e)}")
             return 0
     
-    def search(self, query: str, top_k: int = None) -> Tuple[List[str], List[str]]:
+    def search(
+        self,
+        query: str,
+        top_k: int = None,
+        filters: Optional[Dict[str, str]] = None
+    ) -> Tuple[List[str], List[str]]:
         """
         Recherche les chunks pertinents pour une requête
+        
+        Args:
+            filters: ex. {"level": "licence", "audience": "student"}, appliqués
+                     dans la requête vectorielle (pas après coup)
         """
         if top_k is None:
             top_k = settings.TOP_K_RESULTS
         
         try:
             # 1. Créer l'embedding de la requête
-            query_embedding = self._get_query_embedding(query)
+            query_embedding = self.embedder.embed_query(query)
             
             if not query_embedding:
                 return [], []
 
-            # 2. Rechercher dans ChromaDB
-            results = self.collection.query(
-                query_embeddings=[query_embedding],
-                n_results=top_k
+            # 2. Rechercher dans le backend vectoriel
+            chunks, metadatas = self.store.query(
+                query_embedding,
+                n_results=top_k,
+                where=self.build_filter(filters)
             )
             
-            if not results['documents'] or not results['documents'][0]:
+            if not chunks:
                 return [], []
             
-            # 3. Extraire les chunks et sources
-            chunks = results['documents'][0]
-            sources = [meta['filename'] for meta in results['metadatas'][0]]
+            # 3. Extraire les sources
+            sources = [meta['filename'] for meta in metadatas]
             
             return chunks, sources
             
@@ -190,14 +188,18 @@ class RAGService:
             logger.error(f"❌ Erreur lors de la recherche RAG: {str(e)}")
             return [], []
     
-    def get_rag_context(self, query: str) -> Tuple[str, List[str]]:
+    def get_rag_context(
+        self,
+        query: str,
+        filters: Optional[Dict[str, str]] = None
+    ) -> Tuple[str, List[str]]:
         """
         Récupère le contexte RAG formaté pour Gemini
         
         Returns:
             (context_text, sources) - Contexte formaté et liste des sources
         """
-        chunks, sources = self.search(query)
+        chunks, sources = self.search(query, filters=filters)
         
         if not chunks:
             return "", []
@@ -216,8 +218,7 @@ class RAGService:
     def list_documents(self) -> List[Dict]:
         """Liste tous les documents indexés (uniques)"""
         try:
-            results = self.collection.get(include=['metadatas'])
-            metadatas = results['metadatas']
+            metadatas = self.store.get_metadatas()
             
             docs_map = {}
             for meta in metadatas:
@@ -228,7 +229,8 @@ class RAGService:
                             "id": doc_id,
                             "filename": meta.get('filename', 'Inconnu'),
                             "chunk_count": meta.get('total_chunks', 0),
-                            "upload_date": meta.get('upload_date', None)
+                            "upload_date": meta.get('upload_date', None),
+                            "tags": {key: meta[key] for key in TAG_KEYS if key in meta}
                         }
             
             return list(docs_map.values())
@@ -239,19 +241,37 @@ class RAGService:
     def delete_document_chunks(self, document_id: str):
         """Supprime tous les chunks d'un document"""
         try:
-            # Récupérer tous les IDs des chunks du document
-            results = self.collection.get(
-                where={"document_id": document_id}
-            )
+            deleted = self.store.delete_document(document_id)
             
-            if results['ids']:
-                self.collection.delete(ids=results['ids'])
-                logger.info(f"🗑️  {len(results['ids'])} chunks supprimés")
+            if deleted:
+                logger.info(f"🗑️  {deleted} chunks supprimés")
                 return True
             return False
         except Exception as e:
             logger.error(f"❌ Erreur suppression chunks: {str(e)}")
             return False
 
+    def export_snapshot(self, path: str) -> Dict:
+        """Exporte l'index vectoriel dans un instantané compressé"""
+        return index_snapshot.export_snapshot(self.store, path, self.embedder.model_id)
+
+    def import_snapshot(self, path: str) -> Dict:
+        """Remplace l'index par un instantané (même modèle d'embedding requis)"""
+        return index_snapshot.import_snapshot(self.store, path, self.embedder.model_id)
+
+    def restore_snapshot_if_empty(self, path: str) -> bool:
+        """Au démarrage : restaure l'instantané si l'index est vide (disque éphémère)"""
+        if not path or not os.path.exists(path):
+            return False
+        try:
+            if self.store.count() > 0:
+                return False
+            header = self.import_snapshot(path)
+            logger.info(f"✅ Index restauré au démarrage ({header['count']} chunks)")
+            return True
+        except Exception as e:
+            logger.error(f"❌ Restauration de l'instantané impossible: {str(e)}")
+            return False
+
 # Instance globale
 rag_service = RAGService()
\ No newline at end of file
@@ -1,19 +1,31 @@
+import asyncio
 import logging
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
-from sqlalchemy.orm import Session
-from app.database import SessionLocal
+from sqlalchemy import select, update
+from app.config import settings
+from app.database import AsyncSessionLocal
 from app.models.user import User
 from app.services.moodle_service import moodle_service
+from app.services.archive_service import archive_service
+from app.services.principal_cache import principal_cache
+from app.services.credential_vault import credential_vault
+from app.services.db_writer import db_writer
+from app.services.email_service import email_service
+from app.services.assignment_tracker import assignment_tracker
 
 logger = logging.getLogger(__name__)
 
 class SchedulerService:
     def __init__(self):
         self.scheduler = AsyncIOScheduler()
+        self.last_scan: Optional[Dict] = None
+        self.scans = 0
         
     def start(self):
         """Démarrer le planificateur"""
-        from datetime import datetime
         # Ajouter le job périodique (5 heures pour la production)
         # next_run_time=datetime.now() force une exécution immédiate au démarrage/réveil
         self.scheduler.add_job(
@@ -23,56 +35,142 @@ class SchedulerService:
             next_run_time=datetime.now(),
             misfire_grace_time=3600
         )
+        if settings.ARCHIVE_IDLE_DAYS > 0:
+            # Archivage quotidien des conversations inactives
+            self.scheduler.add_job(
+                archive_service.archive_idle_conversations,
+                'interval',
+                hours=24,
+                misfire_grace_time=3600
+            )
+        if credential_vault.key_count > 1:
+            # Anciennes clés configurées : rechiffrer les secrets avec la clé primaire
+            self.scheduler.add_job(
+                credential_vault.rotate_stored_secrets,
+                'interval',
+                hours=24,
+                next_run_time=datetime.now(),
+                misfire_grace_time=3600
+            )
         self.scheduler.start()
         logger.info("⏰ Scheduler démarré (Check immédiat + Intervalle 5h)")
 
     async def check_all_homeworks(self):
-        """Vérifie les devoirs pour tous les utilisateurs connectés"""
+        """
+        Vérifie les devoirs pour tous les utilisateurs connectés.
+        MOODLE_SCAN_CONCURRENCY utilisateurs en parallèle, chacun isolé (erreur
+        ou dépassement de MOODLE_SCAN_USER_TIMEOUT_SECONDS) ; les dates de
+        synchro sont écrites par lots de MOODLE_SCAN_COMMIT_BATCH.
+        """
         logger.info("⏰ Début du scan des devoirs UVCI...")
+        started = time.perf_counter()
+        report = {"users": 0, "synced": 0, "notified": 0, "failed": 0, "timeouts": 0, "login_refused": 0}
+        synced: List = []
         
-        db = SessionLocal()
         try:
-            users = db.query(User).filter(User.uvci_username != None).all()
+            async with AsyncSessionLocal() as db:
+                users = (await db.execute(
+                    select(User.id, User.email, User.full_name, User.uvci_username, User.uvci_password_encrypted)
+                    .where(User.uvci_username != None, User.uvci_password_encrypted != None)
+                    .order_by(User.id)
+                )).all()
+            report["users"] = len(users)
             logger.info(f"👥 Scan pour {len(users)} utilisateurs connectés.")
             
-            for user in users:
-                if not user.uvci_password_encrypted:
-                    continue
-                    
-                from app.utils.crypto import decrypt
-                
-                # Déchiffrer le mot de passe pour le scraper
-                try:
-                    plain_password = decrypt(user.uvci_password_encrypted)
-                except Exception:
-                    logger.error(f"❌ Échec déchiffrement MDP pour {user.email}")
-                    continue
-
-                assignments = await moodle_service.get_assignments(
-                    user.uvci_username, 
-                    plain_password
-                )
-                
-                if assignments:
-                    logger.info(f"🚨 NOUVEAU DEVOIR pour {user.full_name or user.email} !")
-                    for assign in assignments:
-                        logger.info(f"   📝 {assign['title']} (Pour le {assign['due_date']})")
-                        
-                    # Envoyer Notification Email
-                    from app.services.email_service import email_service
-                    await email_service.send_assignment_notification(user.email, assignments)
-                    logger.info(f"📧 Notification envoyée à {user.email}")
-                
-                # Mettre à jour la date de dernière synchro (Même si 0 devoirs)
-                from datetime import datetime
-                user.last_moodle_sync = datetime.now()
-                db.commit()
-                if not assignments:
-                    logger.info(f"✅ Rien à signaler pour {user.email}")
-                    
+            # Déchiffrer d'un coup les mots de passe pour le scraper
+            passwords = credential_vault.decrypt_many(user.uvci_password_encrypted for user in users)
+            queue = iter(zip(users, passwords))
+            
+            async def worker():
+                # Itérateur partagé : chaque worker prend l'utilisateur suivant
+                for user, plain_password in queue:
+                    status = await self._scan_user(user, plain_password)
+                    if status not in ("synced", "notified"):
+                        report[status] += 1
+                        continue
+                    report["synced"] += 1
+                    if status == "notified":
+                        report["notified"] += 1
+                    synced.append(user)
+                    if len(synced) >= settings.MOODLE_SCAN_COMMIT_BATCH:
+                        batch = synced[:]
+                        synced.clear()
+                        await self._record_sync(batch)
+            
+            await asyncio.gather(*(worker() for _ in range(max(1, settings.MOODLE_SCAN_CONCURRENCY))))
+            await self._record_sync(synced)
         except Exception as e:
             logger.error(f"❌ Erreur Scheduler: {e}")
-        finally:
-            db.close()
+        
+        duration = time.perf_counter() - started
+        report["duration_s"] = round(duration, 2)
+        report["users_per_s"] = round(report["users"] / duration, 2) if duration else 0.0
+        report["finished_at"] = datetime.now().isoformat()
+        self.last_scan = report
+        self.scans += 1
+        logger.info(
+            f"✅ Scan terminé en {report['duration_s']} s : {report['synced']}/{report['users']} synchronisés, "
+            f"{report['notified']} notifiés, {report['failed']} échecs, {report['timeouts']} délais dépassés "
+            f"({report['users_per_s']} utilisateurs/s)"
+        )
+        return report
+
+    async def _scan_user(self, user, plain_password: Optional[str]) -> str:
+        """Vérifie un utilisateur ; rend son statut sans jamais interrompre le scan"""
+        if plain_password is None:
+            logger.error(f"❌ Échec déchiffrement MDP pour {user.email}")
+            return "failed"
+        try:
+            assignments = await asyncio.wait_for(
+                moodle_service.fetch_assignments(user.uvci_username, plain_password, user.id),
+                settings.MOODLE_SCAN_USER_TIMEOUT_SECONDS
+            )
+            if assignments is None:
+                logger.warning(f"🔒 Connexion Moodle refusée pour {user.email}")
+                return "login_refused"
+            # Ne notifier que les nouveautés (nouveaux devoirs, échéance modifiée ou proche)
+            changes, pending = await assignment_tracker.diff(user.id, assignments)
+            if not changes:
+                await assignment_tracker.commit(pending)
+                logger.info(f"✅ Rien à signaler pour {user.email}")
+                return "synced"
+            
+            logger.info(f"🚨 {len(changes)} changement(s) pour {user.full_name or user.email} !")
+            for assign in changes:
+                logger.info(f"   📝 [{assign['change']}] {assign['title']} (Pour le {assign['due_date']})")
+            # Envoyer Notification Email ; l'état n'est enregistré qu'après l'envoi
+            if not await email_service.send_assignment_notification(user.email, changes):
+                logger.error(f"❌ Échec d'envoi de la notification à {user.email} (réessai au prochain scan)")
+                return "failed"
+            await assignment_tracker.commit(pending)
+            logger.info(f"📧 Notification envoyée à {user.email}")
+            return "notified"
+        except asyncio.TimeoutError:
+            logger.error(f"⏱️ Délai dépassé pour {user.email} ({settings.MOODLE_SCAN_USER_TIMEOUT_SECONDS} s)")
+            return "timeouts"
+        except Exception as e:
+            logger.error(f"❌ Erreur scan Moodle pour {user.email}: {e}")
+            return "failed"
+
+    async def _record_sync(self, users: List):
+        """Date de dernière synchro (même si 0 devoirs), un commit pour tout le lot"""
+        if not users:
+            return
+        now = datetime.now()
+        ids = [user.id for user in users]
+
+        async def write(session):
+            await session.execute(update(User).where(User.id.in_(ids)).values(last_moodle_sync=now))
+
+        try:
+            await db_writer.submit(write)
+        except Exception as e:
+            logger.error(f"❌ Échec d'écriture des dates de synchro ({len(ids)} utilisateurs): {e}")
+            return
+        for user in users:
+            principal_cache.invalidate_subject(user.email)
+
+    def metrics(self) -> Dict:
+        return {"scans": self.scans, "last_scan": self.last_scan}
 
 scheduler_service = SchedulerService()
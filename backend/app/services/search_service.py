@@ -0,0 +1,113 @@
+"""
+Recherche plein texte dans l'historique des conversations (index FTS5
+`messages_fts`, créé par la migration 006).
+"""
+import html
+import re
+from typing import List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+SNIPPET_TOKENS = 12
+MAX_TERMS = 16
+
+_TERM = re.compile(r"\w+", re.UNICODE)
+
+# Marqueurs de surlignage posés par snippet() : caractères de contrôle absents
+# du texte, remplacés par <mark> une fois le texte échappé
+MARK_START = "\x02"
+MARK_END = "\x03"
+
+# Mots vides : sans intérêt pour le classement et présents dans presque tous
+# les messages (bm25 parcourt la liste complète de chaque terme pour son IDF)
+STOPWORDS = frozenset(
+    "a à au aux avec ce ces comment d dans de des du en est et il je l la le les "
+    "leur ma mais me mes mon ne nous on ou où par pas pour qu que quel quelle "
+    "quelles quels qui s sa se ses son sont sur t ta te tes ton tu un une vos "
+    "votre vous y".split()
+)
+
+SEARCH_SQL = text(
+    "SELECT m.id, m.conversation_id, c.title, m.role, m.timestamp, "
+    "snippet(messages_fts, 0, char(2), char(3), '…', :tokens) AS snippet, "
+    "bm25(messages_fts, 1.0, 0.0) AS score "
+    "FROM messages_fts "
+    "JOIN messages m ON m.rowid = messages_fts.rowid "
+    "JOIN conversations c ON c.id = m.conversation_id "
+    "WHERE messages_fts MATCH :query "
+    "ORDER BY score, m.rowid "
+    "LIMIT :limit OFFSET :offset"
+)
+
+
+def owner_token(user_id) -> str:
+    """Jeton `owner` de l'index (conversations.user_id sans tirets, cf. migration 006)"""
+    return str(user_id).replace("-", "")
+
+
+def build_match_query(user_id, query: str) -> Optional[str]:
+    """
+    Requête MATCH sûre : chaque mot saisi devient un terme entre guillemets
+    (pas de syntaxe FTS5 venant de l'utilisateur), tous requis, mots vides
+    ignorés ; restreinte aux messages de l'utilisateur. None si aucun mot.
+    """
+    words = _TERM.findall(query)
+    terms = [word for word in words if word.lower() not in STOPWORDS][:MAX_TERMS] or words[:MAX_TERMS]
+    if not terms:
+        return None
+    quoted = [f'"{term}"' for term in terms]
+    return f'owner : "{owner_token(user_id)}" AND content : ({" AND ".join(quoted)})'
+
+
+def render_snippet(snippet: Optional[str]) -> str:
+    """Extrait en HTML sûr : texte du message échappé, seuls les <mark> sont du balisage"""
+    if not snippet:
+        return ""
+    # Échapper avant de poser les balises : un marqueur présent dans le message
+    # lui-même ne peut produire qu'un <mark> de plus, jamais d'autre balise
+    escaped = html.escape(snippet)
+    return escaped.replace(MARK_START, "<mark>").replace(MARK_END, "</mark>")
+
+
+class SearchService:
+    """Service de recherche dans l'historique"""
+
+    @staticmethod
+    async def search_messages(
+        user_id,
+        query: str,
+        db: AsyncSession,
+        limit: int = 20,
+        offset: int = 0
+    ) -> Tuple[List[dict], Optional[int]]:
+        """
+        Messages de l'utilisateur correspondant à `query`, les plus pertinents
+        d'abord (BM25) ; retourne (résultats, offset de la page suivante)
+        """
+        match = build_match_query(user_id, query)
+        if match is None:
+            raise ValueError("Requête de recherche vide")
+
+        rows = (await db.execute(
+            SEARCH_SQL,
+            {"query": match, "tokens": SNIPPET_TOKENS, "limit": limit + 1, "offset": offset}
+        )).all()
+
+        next_offset = offset + limit if len(rows) > limit else None
+        return [
+            {
+                "message_id": row.id,
+                "conversation_id": row.conversation_id,
+                "conversation_title": row.title,
+                "role": row.role,
+                "timestamp": row.timestamp,
+                "snippet": render_snippet(row.snippet),
+                "score": round(-row.score, 4),
+            }
+            for row in rows[:limit]
+        ], next_offset
+
+
+# Instance globale
+search_service = SearchService()
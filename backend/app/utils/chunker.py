@@ -0,0 +1,198 @@
+"""
+Découpage de texte en chunks respectant la structure du document.
+
+Le texte est parcouru une seule fois : lignes -> paragraphes / titres -> phrases,
+puis les phrases sont regroupées jusqu'à un budget de tokens, avec un
+chevauchement exprimé lui aussi en tokens. Un titre ferme le chunk courant
+(s'il est assez long) et sert de préfixe aux chunks suivants de sa section.
+"""
+import re
+from typing import List, Tuple
+
+# Approximation des tokens : mots et signes de ponctuation
+TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+
+# Fin de phrase : ponctuation forte suivie d'un espace et d'un début de phrase
+SENTENCE_END_RE = re.compile(r"(?<=[.!?…])\s+(?=[«\"(\[0-9A-ZÀÂÄÉÈÊËÏÎÔÙÛÜŸÇ])")
+
+MARKDOWN_HEADING_RE = re.compile(r"^#{1,6}\s")
+# « 2. Inscriptions », « IV - Frais » : numérotation puis titre
+NUMBERED_HEADING_RE = re.compile(r"^(?:\d{1,2}(?:\.\d{1,2})*|[IVXLC]{1,6})(?:\s*[.)–-])?\s+(\S)")
+# « Article 12 », « CHAPITRE II : ... », « Annexe unique » : mot-clé puis identifiant
+KEYWORD_HEADING_RE = re.compile(
+    r"^(?i:article|chapitre|section|titre|annexe|partie)\s+"
+    r"(?:\d+|[IVXLC]+\b|[A-Z]\b|(?i:premier|première|unique)\b)"
+)
+HEADING_MAX_CHARS = 80
+
+
+def count_tokens(text: str) -> int:
+    """Estimation du nombre de tokens (mots + ponctuation)"""
+    return len(TOKEN_RE.findall(text))
+
+
+def is_heading(line: str) -> bool:
+    """
+    Ligne courte sans ponctuation finale : en majuscules, titre Markdown,
+    numérotée suivie d'un titre en majuscule, ou mot-clé (Article, Chapitre...)
+    suivi de son numéro. Une ligne de paragraphe coupée par la mise en page
+    (« 2 ans d'études... », « section de licence... ») n'en est pas un.
+    """
+    if len(line) > HEADING_MAX_CHARS or line[-1] in ".,;!?":
+        return False
+    letters = [c for c in line if c.isalpha()]
+    if letters and line.upper() == line and len(letters) >= 3:
+        return True
+    if MARKDOWN_HEADING_RE.match(line):
+        return True
+    numbered = NUMBERED_HEADING_RE.match(line)
+    if numbered:
+        return numbered.group(1).isupper()
+    return line[0].isupper() and bool(KEYWORD_HEADING_RE.match(line))
+
+
+class TextChunker:
+    """Regroupe les phrases d'un texte en chunks d'au plus `max_tokens` tokens"""
+
+    def __init__(self, max_tokens: int = 256, overlap_tokens: int = 48):
+        if overlap_tokens >= max_tokens:
+            raise ValueError("Le chevauchement doit être inférieur à la taille des chunks")
+        self.max_tokens = max_tokens
+        self.overlap_tokens = overlap_tokens
+        # En dessous de cette taille, un titre ne ferme pas le chunk courant
+        self.min_tokens = max_tokens // 4
+
+    def _blocks(self, text: str):
+        """
+        Génère ('heading', ligne) et ('paragraph', texte) : les lignes d'un même
+        paragraphe (retours à la ligne simples des PDFs) sont recollées.
+        """
+        paragraph: List[str] = []
+        for raw_line in text.split("\n"):
+            line = raw_line.strip()
+            if not line:
+                if paragraph:
+                    yield "paragraph", " ".join(paragraph)
+                    paragraph = []
+            elif is_heading(line):
+                if paragraph:
+                    yield "paragraph", " ".join(paragraph)
+                    paragraph = []
+                yield "heading", line
+            else:
+                paragraph.append(line)
+        if paragraph:
+            yield "paragraph", " ".join(paragraph)
+
+    def _words(self, sentence: str, limit: int):
+        """
+        Génère (mot, tokens) ; un mot de plus de `limit` tokens (URL longue,
+        tableau extrait sans espaces...) est coupé aux frontières de tokens
+        """
+        for word in sentence.split(" "):
+            tokens = count_tokens(word)
+            if tokens <= limit:
+                yield word, tokens
+                continue
+            start = 0
+            for index, match in enumerate(TOKEN_RE.finditer(word), 1):
+                if index % limit == 0:
+                    yield word[start:match.end()], limit
+                    start = match.end()
+            rest = word[start:]
+            if count_tokens(rest):
+                yield rest, count_tokens(rest)
+
+    def _sentences(self, paragraph: str, limit: int):
+        """Génère (phrase, tokens) ; une phrase de plus de `limit` tokens est coupée sur les mots"""
+        for sentence in SENTENCE_END_RE.split(paragraph):
+            tokens = count_tokens(sentence)
+            if tokens <= limit:
+                yield sentence, tokens
+                continue
+            piece: List[str] = []
+            piece_tokens = 0
+            for word, word_tokens in self._words(sentence, limit):
+                if piece and piece_tokens + word_tokens > limit:
+                    yield " ".join(piece), piece_tokens
+                    piece, piece_tokens = [], 0
+                piece.append(word)
+                piece_tokens += word_tokens
+            if piece:
+                yield " ".join(piece), piece_tokens
+
+    def chunk(self, text: str) -> List[str]:
+        chunks: List[str] = []
+        # Unités du chunk courant : (texte, tokens, début_de_paragraphe)
+        current: List[Tuple[str, int, bool]] = []
+        current_tokens = 0
+        # Titre de la section en cours, et titre préfixant le chunk courant
+        # (celui de la section où le chunk a commencé)
+        heading = ""
+        heading_tokens = 0
+        prefix = ""
+        prefix_tokens = 0
+
+        def emit():
+            parts = [prefix] if prefix else []
+            body = ""
+            for unit_text, _, starts_paragraph in current:
+                if body:
+                    body += "\n\n" if starts_paragraph else " "
+                body += unit_text
+            parts.append(body)
+            chunks.append("\n".join(parts))
+
+        def overlap_tail() -> List[Tuple[str, int, bool]]:
+            """Dernières phrases du chunk tenant dans le budget de chevauchement"""
+            tail: List[Tuple[str, int, bool]] = []
+            total = 0
+            for unit in reversed(current):
+                if total + unit[1] > self.overlap_tokens:
+                    break
+                tail.append(unit)
+                total += unit[1]
+            tail.reverse()
+            if tail:
+                tail[0] = (tail[0][0], tail[0][1], False)
+            return tail
+
+        def push(unit_text: str, tokens: int, starts_paragraph: bool):
+            nonlocal current, current_tokens, prefix, prefix_tokens
+            if current and current_tokens + tokens > self.max_tokens - prefix_tokens:
+                emit()
+                current = overlap_tail()
+                current_tokens = sum(unit[1] for unit in current)
+                prefix, prefix_tokens = heading, heading_tokens
+                # Le chevauchement cède la place si l'unité ne tient pas avec lui
+                while current and current_tokens + tokens > self.max_tokens - prefix_tokens:
+                    current_tokens -= current.pop(0)[1]
+            current.append((unit_text, tokens, starts_paragraph))
+            current_tokens += tokens
+
+        for kind, block in self._blocks(text):
+            if kind == "heading":
+                block_tokens = count_tokens(block)
+                if current_tokens >= self.min_tokens or not (prefix or current):
+                    # Coupure préférée : le titre ouvre un nouveau chunk
+                    if current:
+                        emit()
+                    current, current_tokens = [], 0
+                    prefix, prefix_tokens = block, block_tokens
+                else:
+                    # Chunk encore trop court (liste numérotée, sommaire...) : pas de
+                    # coupure, le titre reste dans le texte mais préfixera les chunks suivants
+                    push(block, block_tokens, True)
+                heading, heading_tokens = block, block_tokens
+                continue
+
+            # Chaque morceau doit tenir avec le titre qui préfixera son chunk
+            limit = max(1, self.max_tokens - max(prefix_tokens, heading_tokens))
+            starts_paragraph = True
+            for sentence, tokens in self._sentences(block, limit):
+                push(sentence, tokens, starts_paragraph)
+                starts_paragraph = False
+
+        if current:
+            emit()
+        return chunks
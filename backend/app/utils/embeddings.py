@@ -0,0 +1,158 @@
+"""
+Générateurs d'embeddings utilisés par le RAG.
+
+- GeminiEmbedder : API Gemini (text-embedding-004, repli sur embedding-001)
+- HashingEmbedder : embedding local déterministe (hachage de mots et trigrammes),
+  sans appel réseau, pour les benchmarks et le développement hors ligne
+"""
+import hashlib
+import logging
+import re
+import unicodedata
+from typing import List, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class Embedder:
+    """Interface commune : embeddings de documents et de requêtes"""
+
+    model_id: str = ""
+
+    def embed_document(self, text: str) -> List[float]:
+        raise NotImplementedError
+
+    def embed_document_with_model(self, text: str) -> Tuple[List[float], str]:
+        """Embedding d'un document et modèle qui l'a réellement produit"""
+        return self.embed_document(text), self.model_id
+
+    def embed_query(self, text: str) -> List[float]:
+        raise NotImplementedError
+
+
+class GeminiEmbedder(Embedder):
+    """Embeddings Gemini"""
+
+    model_id = "models/text-embedding-004"
+    fallback_model_id = "models/embedding-001"
+
+    def __init__(self, api_key: str):
+        import google.generativeai as genai
+        self.genai = genai
+        if api_key:
+            genai.configure(api_key=api_key)
+        else:
+            logger.warning("⚠️ GOOGLE_API_KEY manquant. Le RAG ne fonctionnera pas.")
+
+    def embed_document(self, text: str) -> List[float]:
+        """Génère un embedding avec Gemini"""
+        return self.embed_document_with_model(text)[0]
+
+    def embed_document_with_model(self, text: str) -> Tuple[List[float], str]:
+        """Embedding Gemini et modèle utilisé (celui de repli si le principal échoue)"""
+        try:
+            # Nettoyer et tronquer si nécessaire (limite Gemini)
+            if len(text) > 9000:
+                text = text[:9000]
+
+            # Utiliser le modèle d'embedding le plus récent
+            result = self.genai.embed_content(
+                model=self.model_id,
+                content=text,
+                task_type="retrieval_document",
+                title="Document chunk"
+            )
+            return result['embedding'], self.model_id
+        except Exception as e:
+            logger.warning(f"⚠️ Erreur embedding text-embedding-004, essai embedding-001: {str(e)}")
+            try:
+                # Fallback sur l'ancien modèle
+                result = self.genai.embed_content(
+                    model=self.fallback_model_id,
+                    content=text,
+                    task_type="retrieval_document",
+                    title="Document chunk"
+                )
+                return result['embedding'], self.fallback_model_id
+            except Exception as e2:
+                logger.error(f"❌ Erreur embedding persistante: {str(e2)}")
+                return [], self.model_id
+
+    def embed_query(self, text: str) -> List[float]:
+        """Génère un embedding pour une requête"""
+        try:
+            result = self.genai.embed_content(
+                model=self.model_id,
+                content=text,
+                task_type="retrieval_query"
+            )
+            return result['embedding']
+        except Exception as e:
+            try:
+                result = self.genai.embed_content(
+                    model=self.fallback_model_id,
+                    content=text,
+                    task_type="retrieval_query"
+                )
+                return result['embedding']
+            except Exception as e2:
+                logger.error(f"❌ Erreur embedding requête Gemini: {str(e2)}")
+                return []
+
+
+WORD_RE = re.compile(r"\w+")
+
+
+class HashingEmbedder(Embedder):
+    """
+    Sac de mots et de trigrammes de caractères haché dans `dim` dimensions
+    (signe aléatoire par trait, pondération log), normalisé L2.
+    Déterministe d'une machine et d'un processus à l'autre.
+    """
+
+    def __init__(self, dim: int = 768):
+        self.dim = dim
+        self.model_id = f"local/hashing-{dim}"
+
+    @staticmethod
+    def _normalize(text: str) -> str:
+        text = unicodedata.normalize("NFKD", text.lower())
+        return "".join(c for c in text if not unicodedata.combining(c))
+
+    def _features(self, text: str):
+        for word in WORD_RE.findall(self._normalize(text)):
+            yield "w:" + word
+            padded = f"#{word}#"
+            for i in range(len(padded) - 2):
+                yield "c:" + padded[i:i + 3]
+
+    def embed_document(self, text: str) -> List[float]:
+        counts = {}
+        for feature in self._features(text):
+            counts[feature] = counts.get(feature, 0) + 1
+
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for feature, count in counts.items():
+            digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+            value = int.from_bytes(digest, "little")
+            sign = 1.0 if value & 1 else -1.0
+            vector[(value >> 1) % self.dim] += sign * (1.0 + np.log(count))
+
+        norm = np.linalg.norm(vector)
+        if norm:
+            vector /= norm
+        return vector.tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_document(text)
+
+
+def create_embedder(backend: str, **options) -> Embedder:
+    """Instancie le générateur configuré (EMBEDDING_BACKEND)"""
+    if backend == "gemini":
+        return GeminiEmbedder(options.get("api_key", ""))
+    if backend == "hashing":
+        return HashingEmbedder(options.get("dim", 768))
+    raise ValueError(f"Générateur d'embeddings inconnu: {backend}")
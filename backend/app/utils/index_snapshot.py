@@ -0,0 +1,134 @@
+"""
+Instantanés de l'index vectoriel : un fichier compressé et versionné contenant
+les ids, vecteurs, textes et métadonnées des chunks, pour restaurer l'index
+sans réextraire ni réembedder les PDFs (démarrage à froid sur disque éphémère).
+
+Format (np.savez_compressed, lu sans pickle) :
+- header : JSON (format, version, modèle(s) d'embedding des vecteurs, dimension,
+  nombre, date)
+- vectors : float32 (n, dim)
+- records : JSON [{id, document, metadata}, ...]
+"""
+import json
+import logging
+import os
+import tempfile
+from datetime import datetime, timezone
+from typing import Dict, List
+
+import numpy as np
+
+from app.utils.vector_store import VectorStore
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FORMAT = "uvci-rag-snapshot"
+SNAPSHOT_VERSION = 1
+
+
+class SnapshotError(ValueError):
+    """Instantané illisible ou incompatible avec l'index courant"""
+
+
+def _encode_json(value) -> np.ndarray:
+    return np.frombuffer(json.dumps(value, ensure_ascii=False).encode("utf-8"), dtype=np.uint8)
+
+
+def _decode_json(array: np.ndarray):
+    return json.loads(array.tobytes().decode("utf-8"))
+
+
+def _vector_models(metadatas: List[Dict], default_model: str) -> List[str]:
+    """Modèles ayant produit les vecteurs (métadonnée `embedding_model` des chunks)"""
+    return sorted({(metadata or {}).get("embedding_model") or default_model for metadata in metadatas})
+
+
+def export_snapshot(store: VectorStore, path: str, embedding_model: str) -> Dict:
+    """
+    Écrit l'index dans `path` (écriture atomique), retourne l'en-tête.
+    `embedding_model` : modèle supposé des chunks indexés sans métadonnée
+    `embedding_model` (index antérieurs).
+    """
+    ids, vectors, documents, metadatas = store.get_all()
+    models = _vector_models(metadatas, embedding_model) if ids else [embedding_model]
+    header = {
+        "format": SNAPSHOT_FORMAT,
+        "version": SNAPSHOT_VERSION,
+        "embedding_model": "+".join(models),
+        "embedding_models": models,
+        "dim": int(vectors.shape[1]) if len(ids) else 0,
+        "count": len(ids),
+        "created_at": datetime.now(timezone.utc).isoformat(),
+    }
+    records = [
+        {"id": chunk_id, "document": document, "metadata": metadata}
+        for chunk_id, document, metadata in zip(ids, documents, metadatas)
+    ]
+
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".npz")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            np.savez_compressed(
+                f,
+                header=_encode_json(header),
+                vectors=np.asarray(vectors, dtype=np.float32),
+                records=_encode_json(records),
+            )
+        os.replace(tmp_path, path)
+    except Exception:
+        os.remove(tmp_path)
+        raise
+
+    logger.info(f"✅ Instantané exporté: {header['count']} chunks -> {path}")
+    return header
+
+
+def read_header(path: str) -> Dict:
+    """Lit et valide l'en-tête d'un instantané"""
+    try:
+        with np.load(path, allow_pickle=False) as data:
+            header = _decode_json(data["header"])
+    except Exception as e:
+        raise SnapshotError(f"Instantané illisible: {str(e)}")
+    if header.get("format") != SNAPSHOT_FORMAT:
+        raise SnapshotError("Ce fichier n'est pas un instantané d'index")
+    if header.get("version", 0) > SNAPSHOT_VERSION:
+        raise SnapshotError(f"Version d'instantané non supportée: {header.get('version')}")
+    return header
+
+
+def import_snapshot(store: VectorStore, path: str, embedding_model: str) -> Dict:
+    """
+    Remplace le contenu de l'index par celui de l'instantané.
+    Refuse un instantané dont les vecteurs ne viennent pas tous du modèle
+    d'embedding courant. L'index est reconstruit à part puis substitué :
+    en cas d'échec, l'index existant reste en place.
+    """
+    header = read_header(path)
+    models = header.get("embedding_models") or [header["embedding_model"]]
+    if models != [embedding_model]:
+        raise SnapshotError(
+            f"Modèle d'embedding incompatible: instantané {header['embedding_model']}, "
+            f"index {embedding_model}"
+        )
+
+    try:
+        with np.load(path, allow_pickle=False) as data:
+            vectors = data["vectors"]
+            records = _decode_json(data["records"])
+        ids = [record["id"] for record in records]
+        documents = [record["document"] for record in records]
+        metadatas = [record["metadata"] for record in records]
+    except (KeyError, TypeError, ValueError) as e:
+        raise SnapshotError(f"Instantané illisible: {str(e)}")
+    if len(records) != header["count"] or len(vectors) != header["count"]:
+        raise SnapshotError("Instantané incomplet")
+    if records and (vectors.ndim != 2 or vectors.shape[1] != header["dim"]):
+        raise SnapshotError(f"Dimension des vecteurs incohérente: {vectors.shape}, attendu {header['dim']}")
+
+    store.replace_all(ids, vectors, documents, metadatas)
+
+    logger.info(f"✅ Instantané importé: {header['count']} chunks depuis {path}")
+    return header
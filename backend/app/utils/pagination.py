@@ -0,0 +1,26 @@
+"""
+Curseurs de pagination par clé (keyset) : la page suivante reprend après le
+dernier couple (date, id) vu, sans OFFSET, donc en temps constant quelle que
+soit la profondeur. Le curseur est opaque pour le client (JSON en base64 URL).
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Optional, Tuple
+
+
+def encode_cursor(moment: datetime, row_id: str) -> str:
+    raw = json.dumps([moment.isoformat(), row_id], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[Tuple[datetime, str]]:
+    """(date, id) du curseur ; ValueError s'il est invalide"""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        moment, row_id = json.loads(raw)
+        return datetime.fromisoformat(moment), str(row_id)
+    except Exception:
+        raise ValueError("Curseur de pagination invalide")
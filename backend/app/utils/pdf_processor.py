@@ -2,63 +2,194 @@
 #### **15. Fichier `app/utils/pdf_processor.py`**
 import pypdf
 import pdfplumber
-from typing import List
+from typing import Dict, List, Tuple
+import hashlib
+import os
 import re
+import sqlite3
+import threading
+from app.config import settings
+from app.utils.chunker import TextChunker
+
+# En dessous de ce seuil, une page pypdf est considérée vide ou mal extraite
+MIN_PAGE_CHARS = 40
+# Part minimale de caractères "lisibles" (lettres, chiffres, espaces, ponctuation)
+MIN_CLEAN_RATIO = 0.85
+CLEAN_CHARS_RE = re.compile(r"[\w\s.,;:!?'’\"()«»\-/%€]")
+
+
+class ExtractionCache:
+    """Cache SQLite du texte extrait, indexé par empreinte du fichier et numéro de page"""
+    
+    def __init__(self, path: str):
+        self.path = path
+        self._conn = None
+        self._lock = threading.Lock()
+    
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS pages ("
+                "file_hash TEXT NOT NULL, page INTEGER NOT NULL, "
+                "extractor TEXT NOT NULL, text TEXT NOT NULL, "
+                "PRIMARY KEY (file_hash, page))"
+            )
+        return self._conn
+    
+    def get_pages(self, file_hash: str) -> Dict[int, str]:
+        with self._lock:
+            rows = self._connection().execute(
+                "SELECT page, text FROM pages WHERE file_hash = ?", (file_hash,)
+            ).fetchall()
+        return dict(rows)
+    
+    def put_pages(self, file_hash: str, pages: List[Tuple[int, str, str]]):
+        """pages: liste de (numéro, extracteur, texte)"""
+        if not pages:
+            return
+        with self._lock:
+            conn = self._connection()
+            conn.executemany(
+                "INSERT OR REPLACE INTO pages (file_hash, page, extractor, text) VALUES (?, ?, ?, ?)",
+                [(file_hash, page, extractor, text) for page, extractor, text in pages]
+            )
+            conn.commit()
+
+
+extraction_cache = ExtractionCache(settings.EXTRACTION_CACHE_PATH)
+
 
 class PDFProcessor:
     """Classe pour extraire et nettoyer le texte des PDFs"""
     
     @staticmethod
-    def extract_text(pdf_path: str, method: str = "pdfplumber") -> str:
+    def extract_text(pdf_path: str, method: str = "auto") -> str:
         """
         Extrait le texte d'un PDF
         
         Args:
             pdf_path: Chemin vers le fichier PDF
-            method: 'pdfplumber' (meilleur) ou 'pypdf' (fallback)
+            method: 'auto' (pypdf, pdfplumber pour les pages illisibles, avec cache),
+                    'pypdf' ou 'pdfplumber' (un seul extracteur, sans cache)
         """
         try:
-            if method == "pdfplumber":
-                return PDFProcessor._extract_with_pdfplumber(pdf_path)
-            else:
-                return PDFProcessor._extract_with_pypdf(pdf_path)
+            pages = PDFProcessor.extract_pages(pdf_path, method)
+            return "".join(page + "\n\n" for page in pages if page)
         except Exception as e:
             print(f"❌ Erreur extraction PDF: {str(e)}")
-            # Essayer la méthode alternative
+            return ""
+    
+    @staticmethod
+    def extract_pages(pdf_path: str, method: str = "auto") -> List[str]:
+        """Extrait le texte page par page"""
+        if method == "pypdf":
+            return PDFProcessor._extract_with_pypdf(pdf_path)
+        if method == "pdfplumber":
+            return PDFProcessor._extract_with_pdfplumber(pdf_path)
+        
+        file_hash = PDFProcessor.file_hash(pdf_path)
+        try:
+            return PDFProcessor._extract_auto(pdf_path, file_hash)
+        except Exception as e:
+            # PDF illisible par pypdf : tout extraire avec pdfplumber
+            print(f"⚠️ pypdf a échoué ({str(e)}), extraction complète avec pdfplumber")
+            pages = PDFProcessor._extract_with_pdfplumber(pdf_path)
+            extraction_cache.put_pages(
+                file_hash, [(i, "pdfplumber", text) for i, text in enumerate(pages)]
+            )
+            return pages
+    
+    @staticmethod
+    def file_hash(pdf_path: str) -> str:
+        """Empreinte SHA-256 du contenu du fichier (clé du cache)"""
+        digest = hashlib.sha256()
+        with open(pdf_path, 'rb') as file:
+            for block in iter(lambda: file.read(1 << 20), b""):
+                digest.update(block)
+        return digest.hexdigest()
+    
+    @staticmethod
+    def needs_fallback(text: str) -> bool:
+        """Page vide, trop courte ou illisible (glyphes non mappés, texte éclaté)"""
+        stripped = text.strip()
+        if len(stripped) < MIN_PAGE_CHARS:
+            return True
+        if "(cid:" in stripped or "\ufffd" in stripped:
+            return True
+        clean = len(CLEAN_CHARS_RE.findall(stripped))
+        if clean / len(stripped) < MIN_CLEAN_RATIO:
+            return True
+        # Texte éclaté lettre par lettre ("I n s c r i p t i o n")
+        words = stripped.split()
+        single = sum(1 for word in words if len(word) == 1)
+        return single / len(words) > 0.5
+    
+    @staticmethod
+    def _extract_auto(pdf_path: str, file_hash: str) -> List[str]:
+        """pypdf pour chaque page, pdfplumber seulement pour les pages illisibles"""
+        cached = extraction_cache.get_pages(file_hash)
+        
+        with open(pdf_path, 'rb') as file:
+            reader = pypdf.PdfReader(file)
+            page_count = len(reader.pages)
+            if len(cached) >= page_count:
+                return [cached.get(i, "") for i in range(page_count)]
+            
+            pages = []
+            extracted = []
+            plumber = None
             try:
-                alt_method = "pypdf" if method == "pdfplumber" else "pdfplumber"
-                return PDFProcessor.extract_text(pdf_path, alt_method)
-            except:
-                return ""
+                for i in range(page_count):
+                    if i in cached:
+                        pages.append(cached[i])
+                        continue
+                    
+                    try:
+                        text = reader.pages[i].extract_text() or ""
+                    except Exception:
+                        text = ""
+                    extractor = "pypdf"
+                    
+                    if PDFProcessor.needs_fallback(text):
+                        if plumber is None:
+                            plumber = pdfplumber.open(pdf_path)
+                        try:
+                            alt_text = plumber.pages[i].extract_text() or ""
+                        except Exception:
+                            alt_text = ""
+                        if len(CLEAN_CHARS_RE.findall(alt_text)) > len(CLEAN_CHARS_RE.findall(text)):
+                            text, extractor = alt_text, "pdfplumber"
+                    
+                    pages.append(text)
+                    extracted.append((i, extractor, text))
+            finally:
+                if plumber is not None:
+                    plumber.close()
+        
+        extraction_cache.put_pages(file_hash, extracted)
+        return pages
     
     @staticmethod
-    def _extract_with_pdfplumber(pdf_path: str) -> str:
-        """Extraction avec pdfplumber (meilleure qualité)"""
-        text = ""
+    def _extract_with_pdfplumber(pdf_path: str) -> List[str]:
+        """Extraction avec pdfplumber (meilleure qualité, lent)"""
         with pdfplumber.open(pdf_path) as pdf:
-            for page in pdf.pages:
-                page_text = page.extract_text()
-                if page_text:
-                    text += page_text + "\n\n"
-        return text
+            return [page.extract_text() or "" for page in pdf.pages]
     
     @staticmethod
-    def _extract_with_pypdf(pdf_path: str) -> str:
-        """Extraction avec pypdf (fallback)"""
-        text = ""
+    def _extract_with_pypdf(pdf_path: str) -> List[str]:
+        """Extraction avec pypdf (rapide sur les PDFs texte)"""
         with open(pdf_path, 'rb') as file:
             reader = pypdf.PdfReader(file)
-            for page in reader.pages:
-                page_text = page.extract_text()
-                if page_text:
-                    text += page_text + "\n\n"
-        return text
+            return [page.extract_text() or "" for page in reader.pages]
     
     @staticmethod
     def clean_text(text: str) -> str:
-        """Nettoie le texte extrait"""
-        # Supprimer les espaces multiples
-        text = re.sub(r'\s+', ' ', text)
+        """Nettoie le texte extrait en conservant les sauts de ligne (structure)"""
+        # Supprimer les espaces multiples (hors sauts de ligne)
+        text = re.sub(r'[ \t\r\f\v\xa0]{2,}|[\t\r\f\v\xa0]', ' ', text)
+        text = re.sub(r' ?\n ?', '\n', text)
         
         # Supprimer les caractères spéciaux problématiques
         text = re.sub(r'[^\w\s\-.,;:!?()«»""\'àâäéèêëïîôùûüÿçÀÂÄÉÈÊËÏÎÔÙÛÜŸÇ]', '', text)
@@ -69,36 +200,16 @@ class PDFProcessor:
         return text.strip()
     
     @staticmethod
-    def chunk_text(text: str, chunk_size: int = 1000, overlap: int = 200) -> List[str]:
+    def chunk_text(text: str, chunk_size: int = 256, overlap: int = 48) -> List[str]:
         """
-        Découpe le texte en chunks avec overlap
+        Découpe le texte en chunks (paragraphes, titres et phrases respectés)
         
         Args:
             text: Texte à découper
-            chunk_size: Taille de chaque chunk en caractères
-            overlap: Nombre de caractères de chevauchement
+            chunk_size: Taille maximale de chaque chunk en tokens
+            overlap: Nombre de tokens de chevauchement entre chunks
         """
-        chunks = []
-        start = 0
-        text_length = len(text)
-        
-        while start < text_length:
-            end = start + chunk_size
-            
-            # Si ce n'est pas le dernier chunk, trouver la fin du dernier mot
-            if end < text_length:
-                # Chercher le dernier espace dans les 100 derniers caractères
-                last_space = text.rfind(' ', end - 100, end)
-                if last_space > start:
-                    end = last_space
-            
-            chunk = text[start:end].strip()
-            if chunk:
-                chunks.append(chunk)
-            
-            start = end - overlap if end < text_length else text_length
-        
-        return chunks
+        return TextChunker(max_tokens=chunk_size, overlap_tokens=overlap).chunk(text)
 
 # Instance globale
 pdf_processor = PDFProcessor()
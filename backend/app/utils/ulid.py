@@ -0,0 +1,88 @@
+"""
+ULID : identifiant de 26 caractères (Crockford base32), 48 bits d'horodatage
+en millisecondes puis 80 bits aléatoires. Triable lexicographiquement dans
+l'ordre de création, généré côté application sans aller-retour en base.
+"""
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Optional
+
+CROCKFORD = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+_DECODE = {char: index for index, char in enumerate(CROCKFORD)}
+ULID_LENGTH = 26
+
+_lock = threading.Lock()
+_last_ms = -1
+_last_random = 0
+
+
+def _encode(value: int, length: int) -> str:
+    chars = []
+    for _ in range(length):
+        chars.append(CROCKFORD[value & 31])
+        value >>= 5
+    return "".join(reversed(chars))
+
+
+def new_ulid(timestamp_ms: Optional[int] = None) -> str:
+    """
+    Nouveau ULID. Monotone dans une même milliseconde (partie aléatoire
+    incrémentée) : deux ids générés à la suite restent dans l'ordre.
+    """
+    global _last_ms, _last_random
+    if timestamp_ms is not None:
+        return _encode(timestamp_ms, 10) + _encode(int.from_bytes(os.urandom(10), "big"), 16)
+
+    with _lock:
+        now_ms = time.time_ns() // 1_000_000
+        if now_ms <= _last_ms:
+            # Même milliseconde (ou horloge reculée) : rester strictement croissant
+            now_ms = _last_ms
+            _last_random = (_last_random + 1) & ((1 << 80) - 1)
+        else:
+            _last_random = int.from_bytes(os.urandom(10), "big")
+        _last_ms = now_ms
+        return _encode(now_ms, 10) + _encode(_last_random, 16)
+
+
+
+def decode(value: str) -> int:
+    """Entier 128 bits d'un ULID ; ValueError s'il est invalide"""
+    if len(value) != ULID_LENGTH:
+        raise ValueError(f"ULID invalide: {value!r}")
+    number = 0
+    for char in value.upper():
+        if char not in _DECODE:
+            raise ValueError(f"ULID invalide: {value!r}")
+        number = (number << 5) | _DECODE[char]
+    if number >> 128:
+        raise ValueError(f"ULID invalide: {value!r}")
+    return number
+
+
+def is_ulid(value: Optional[str]) -> bool:
+    try:
+        decode(value or "")
+        return True
+    except ValueError:
+        return False
+
+
+def ulid_from_datetime(moment: Optional[datetime], previous: Optional[str] = None) -> str:
+    """
+    ULID horodaté à `moment` (datetime naïf = UTC), pour réattribuer des ids à
+    des lignes existantes : strictement supérieur à `previous` si fourni, pour
+    conserver l'ordre de parcours (lignes de même milliseconde).
+    """
+    if moment is None:
+        timestamp_ms = 0
+    else:
+        if moment.tzinfo is None:
+            moment = moment.replace(tzinfo=timezone.utc)
+        timestamp_ms = max(0, int(moment.timestamp() * 1000))
+    number = (timestamp_ms << 80) | int.from_bytes(os.urandom(10), "big")
+    if previous is not None:
+        number = max(number, decode(previous) + 1)
+    return _encode(number, ULID_LENGTH)
@@ -0,0 +1,705 @@
+"""
+Backends de stockage vectoriel pour le RAG.
+
+- ChromaVectorStore : collection ChromaDB persistante (comportement historique)
+- FlatVectorStore : matrice en ajout seul mappée en mémoire, fichier annexe de
+  métadonnées, suppressions par tombstones et compaction périodique
+- QuantizedVectorStore : même index avec vecteurs quantifiés (float16 ou int8
+  + échelle par vecteur)
+"""
+import json
+import logging
+import os
+import shutil
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Nombre de lignes traitées à la fois lors du produit scalaire (borne la mémoire temporaire)
+SEARCH_BLOCK_ROWS = 8192
+
+
+class VectorStore:
+    """Interface commune des backends vectoriels utilisés par RAGService"""
+
+    def add(
+        self,
+        ids: List[str],
+        embeddings: List[List[float]],
+        documents: List[str],
+        metadatas: List[Dict]
+    ) -> None:
+        raise NotImplementedError
+
+    def query(
+        self,
+        embedding: List[float],
+        n_results: int,
+        where: Optional[Dict[str, List[str]]] = None
+    ) -> Tuple[List[str], List[Dict]]:
+        """
+        Retourne (documents, metadatas) des n_results chunks les plus proches.
+        
+        where: {clé: [valeurs acceptées]} - filtre de métadonnées appliqué dans la
+        recherche vectorielle (toutes les clés doivent correspondre)
+        """
+        raise NotImplementedError
+
+    def get_metadatas(self) -> List[Dict]:
+        raise NotImplementedError
+
+    def delete_document(self, document_id: str) -> int:
+        """Supprime les chunks d'un document, retourne le nombre de chunks supprimés"""
+        raise NotImplementedError
+
+    def count(self) -> int:
+        raise NotImplementedError
+
+    def get_all(self) -> Tuple[List[str], np.ndarray, List[str], List[Dict]]:
+        """Exporte (ids, vecteurs float32, documents, metadatas) de tous les chunks"""
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        """Vide l'index"""
+        raise NotImplementedError
+
+    def replace_all(
+        self,
+        ids: List[str],
+        embeddings: List[List[float]],
+        documents: List[str],
+        metadatas: List[Dict]
+    ) -> None:
+        """
+        Remplace tout le contenu de l'index. Le nouvel index est construit à
+        part puis substitué : en cas d'échec, l'index existant est intact.
+        """
+        raise NotImplementedError
+
+
+class ChromaVectorStore(VectorStore):
+    """Collection ChromaDB persistante"""
+
+    # Taille des lots pour les lectures et écritures en masse
+    BATCH_SIZE = 1000
+
+    def __init__(self, persist_directory: str, collection_name: str = "uvci_documents"):
+        import chromadb
+
+        os.makedirs(persist_directory, exist_ok=True)
+        self.client = chromadb.PersistentClient(path=persist_directory)
+        self.collection_name = collection_name
+
+        self.staging_name = f"{collection_name}_import"
+
+        try:
+            self.collection = self.client.get_collection(collection_name)
+            logger.info("✅ Collection ChromaDB existante récupérée")
+        except Exception:
+            try:
+                # Remplacement interrompu après suppression de l'ancienne collection
+                self.collection = self.client.get_collection(self.staging_name)
+                self.collection.modify(name=collection_name)
+                logger.warning("⚠️ Collection ChromaDB restaurée depuis un import interrompu")
+            except Exception:
+                self._create_collection()
+                logger.info("✅ Nouvelle collection ChromaDB créée")
+
+    def _create_collection(self, name: Optional[str] = None):
+        collection = self.client.create_collection(
+            name=name or self.collection_name,
+            metadata={"description": "Documents UVCI pour RAG"}
+        )
+        if name is None:
+            self.collection = collection
+        return collection
+
+    def _add_batches(self, collection, ids, embeddings, documents, metadatas):
+        for start in range(0, len(ids), self.BATCH_SIZE):
+            end = start + self.BATCH_SIZE
+            collection.add(
+                ids=ids[start:end],
+                embeddings=embeddings[start:end],
+                documents=documents[start:end],
+                metadatas=metadatas[start:end]
+            )
+
+    def add(self, ids, embeddings, documents, metadatas):
+        self._add_batches(self.collection, ids, embeddings, documents, metadatas)
+
+    @staticmethod
+    def _where(where: Optional[Dict[str, List[str]]]) -> Optional[Dict]:
+        """Traduit le filtre générique en clause `where` ChromaDB"""
+        if not where:
+            return None
+        clauses = [{key: {"$in": list(values)}} for key, values in where.items()]
+        return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+    def query(self, embedding, n_results, where=None):
+        results = self.collection.query(
+            query_embeddings=[embedding],
+            n_results=n_results,
+            where=self._where(where)
+        )
+        if not results['documents'] or not results['documents'][0]:
+            return [], []
+        return results['documents'][0], results['metadatas'][0]
+
+    def get_metadatas(self):
+        return self.collection.get(include=['metadatas'])['metadatas']
+
+    def delete_document(self, document_id):
+        results = self.collection.get(where={"document_id": document_id})
+        if results['ids']:
+            self.collection.delete(ids=results['ids'])
+        return len(results['ids'])
+
+    def count(self):
+        return self.collection.count()
+
+    def get_all(self):
+        ids, vectors, documents, metadatas = [], [], [], []
+        total = self.collection.count()
+        for offset in range(0, total, self.BATCH_SIZE):
+            results = self.collection.get(
+                include=["embeddings", "documents", "metadatas"],
+                limit=self.BATCH_SIZE,
+                offset=offset
+            )
+            ids.extend(results["ids"])
+            vectors.extend(results["embeddings"])
+            documents.extend(results["documents"])
+            metadatas.extend(results["metadatas"])
+        return ids, np.asarray(vectors, dtype=np.float32), documents, metadatas
+
+    def clear(self):
+        self.client.delete_collection(self.collection_name)
+        self._create_collection()
+
+    def replace_all(self, ids, embeddings, documents, metadatas):
+        """Remplit une collection temporaire, la vérifie, puis la renomme à la place de l'actuelle"""
+        try:
+            self.client.delete_collection(self.staging_name)
+        except Exception:
+            pass
+        staging = self._create_collection(self.staging_name)
+        try:
+            self._add_batches(staging, ids, np.asarray(embeddings, dtype=np.float32).tolist(), documents, metadatas)
+            if staging.count() != len(ids):
+                raise ValueError(f"Import incomplet: {staging.count()} chunks sur {len(ids)}")
+        except Exception:
+            self.client.delete_collection(self.staging_name)
+            raise
+        self.client.delete_collection(self.collection_name)
+        staging.modify(name=self.collection_name)
+        self.collection = staging
+
+
+def quantize(vectors: np.ndarray, dtype: str) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """
+    Normalise puis quantifie une matrice (N, D) de vecteurs float32.
+
+    Returns:
+        (codes, scales) - scales est None sauf en int8 (un float32 par ligne)
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    vectors = vectors / norms
+
+    if dtype == "float32":
+        return vectors, None
+    if dtype == "float16":
+        return vectors.astype(np.float16), None
+    if dtype == "int8":
+        scales = np.abs(vectors).max(axis=1) / 127.0
+        scales[scales == 0] = 1.0
+        codes = np.rint(vectors / scales[:, None]).astype(np.int8)
+        return codes, scales.astype(np.float32)
+    raise ValueError(f"Type de quantification inconnu: {dtype}")
+
+
+class FlatVectorStore(VectorStore):
+    """
+    Index plat en ajout seul, sans dépendance à ChromaDB.
+
+    - `vectors.bin` : matrice (N, D) brute mappée en mémoire (float32, float16 ou int8)
+    - `scales.bin` : échelle float32 par ligne (int8 uniquement)
+    - `meta.jsonl` : fichier annexe, une ligne (id, texte, métadonnées) par vecteur
+    - `tombstones.jsonl` : lignes supprimées, retirées physiquement à la compaction
+    - `compact.json` : présent pendant une compaction dont les fichiers `.tmp`
+      sont complets ; le chargement termine alors les remplacements
+
+    Les vecteurs sont normalisés à l'ajout : le score est la similarité cosinus,
+    calculée par produits matriciels NumPy par blocs. Un index inversé des
+    métadonnées restreint le calcul aux lignes correspondant au filtre.
+    """
+
+    DTYPES = ("float32", "float16", "int8")
+
+    def __init__(self, directory: str, dtype: str = "float32", compaction_ratio: float = 0.25):
+        if dtype not in self.DTYPES:
+            raise ValueError(f"Type de quantification inconnu: {dtype}")
+        self.directory = directory
+        self.dtype = dtype
+        self.compaction_ratio = compaction_ratio
+        # Répertoires voisins utilisés par replace_all (import d'un instantané)
+        self.staging_directory = directory.rstrip(os.sep) + ".import"
+        self.previous_directory = directory.rstrip(os.sep) + ".old"
+        self._recover_replace()
+        os.makedirs(directory, exist_ok=True)
+
+        self.header_path = os.path.join(directory, "header.json")
+        self.vectors_path = os.path.join(directory, "vectors.bin")
+        self.scales_path = os.path.join(directory, "scales.bin")
+        self.meta_path = os.path.join(directory, "meta.jsonl")
+        self.tombstones_path = os.path.join(directory, "tombstones.jsonl")
+        self.compact_path = os.path.join(directory, "compact.json")
+
+        self._open()
+        logger.info(f"✅ Index plat ({dtype}) chargé: {self.count()} chunks")
+
+    # --- Persistance -------------------------------------------------------
+
+    def _open(self):
+        """(Re)charge l'état en mémoire depuis les fichiers du répertoire"""
+        self.dim: Optional[int] = None
+        self.ids: List[str] = []
+        self.documents: List[str] = []
+        self.metadatas: List[Dict] = []
+        self.deleted: set = set()
+        # Index inversé des métadonnées textuelles : clé -> valeur -> lignes
+        self.postings: Dict[str, Dict[str, List[int]]] = {}
+        self.vectors: Optional[np.ndarray] = None
+        self.scales: Optional[np.ndarray] = None
+        self._load()
+
+    def _recover_replace(self):
+        """
+        replace_all interrompu : entre les deux renommages, seul l'ancien
+        répertoire existe encore et il est remis en place ; les restes
+        (import incomplet, ancien index déjà remplacé) sont supprimés.
+        """
+        if not os.path.exists(self.directory) and os.path.exists(self.previous_directory):
+            logger.warning(f"⚠️ Index {self.directory}: import interrompu, ancien index restauré")
+            os.rename(self.previous_directory, self.directory)
+        for path in (self.staging_directory, self.previous_directory):
+            if os.path.exists(path):
+                shutil.rmtree(path)
+
+    def _load(self):
+        self._migrate_legacy()
+        self._recover_compaction()
+        if os.path.exists(self.header_path):
+            with open(self.header_path, "r", encoding="utf-8") as f:
+                header = json.load(f)
+            if header["dtype"] != self.dtype:
+                raise ValueError(
+                    f"Index {self.directory} stocké en {header['dtype']}, "
+                    f"configuration demande {self.dtype}"
+                )
+            self.dim = header["dim"]
+
+        # Le fichier annexe fait foi : une ligne n'y est écrite qu'après son vecteur
+        meta_ends: List[int] = []
+        if os.path.exists(self.meta_path):
+            complete_bytes = 0
+            with open(self.meta_path, "rb") as f:
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break  # Écriture interrompue
+                    complete_bytes += len(line)
+                    meta_ends.append(complete_bytes)
+                    row = json.loads(line)
+                    self.ids.append(row["id"])
+                    self.documents.append(row["document"])
+                    self.metadatas.append(row["metadata"])
+            if os.path.getsize(self.meta_path) > complete_bytes:
+                with open(self.meta_path, "r+b") as f:
+                    f.truncate(complete_bytes)
+
+        if os.path.exists(self.tombstones_path):
+            with open(self.tombstones_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.endswith("\n"):
+                        self.deleted.update(json.loads(line))
+
+        self._truncate_files(meta_ends)
+        self._index_rows(0)
+        self._map()
+
+    def _truncate_files(self, meta_ends: List[int]):
+        """
+        Aligne les fichiers sur un même nombre de lignes : retire les vecteurs
+        orphelins d'un ajout interrompu avant l'écriture des métadonnées et, si
+        un fichier de vecteurs est plus court (fichier abîmé), les métadonnées
+        et tombstones au-delà (`meta_ends` : fin de chaque ligne de meta.jsonl)
+        """
+        if self.dim is None:
+            return
+        rows = len(self.ids)
+        for path, row_bytes in self._row_files():
+            size = os.path.getsize(path) if os.path.exists(path) else 0
+            rows = min(rows, size // row_bytes)
+        if rows < len(self.ids):
+            logger.warning(
+                f"⚠️ Index {self.directory}: {len(self.ids) - rows} lignes de métadonnées sans vecteur retirées"
+            )
+            with open(self.meta_path, "r+b") as f:
+                f.truncate(meta_ends[rows - 1] if rows else 0)
+            del self.ids[rows:], self.documents[rows:], self.metadatas[rows:]
+            self.deleted = {row for row in self.deleted if row < rows}
+        for path, row_bytes in self._row_files():
+            if os.path.exists(path) and os.path.getsize(path) > rows * row_bytes:
+                with open(path, "r+b") as f:
+                    f.truncate(rows * row_bytes)
+
+    def _recover_compaction(self):
+        """
+        Compaction interrompue : si `compact.json` existe, tous les fichiers
+        `.tmp` étaient écrits et on termine les remplacements ; sinon les `.tmp`
+        restants sont abandonnés et l'index d'avant la compaction reste valide.
+        """
+        paths = (self.vectors_path, self.scales_path, self.meta_path)
+        if os.path.exists(self.compact_path):
+            logger.warning(f"⚠️ Index {self.directory}: reprise d'une compaction interrompue")
+            for path in paths:
+                if os.path.exists(path + ".tmp"):
+                    os.replace(path + ".tmp", path)
+            if os.path.exists(self.tombstones_path):
+                os.remove(self.tombstones_path)
+            os.remove(self.compact_path)
+            return
+        for path in paths:
+            if os.path.exists(path + ".tmp"):
+                os.remove(path + ".tmp")
+
+    def _migrate_legacy(self):
+        """
+        Convertit un index à l'ancien format (`vectors.npy`, `scales.npy` et
+        `meta.json` d'un seul bloc) : les vecteurs, déjà normalisés et
+        quantifiés, sont recopiés en fichiers bruts. `meta.json` n'est supprimé
+        qu'à la fin : une conversion interrompue est refaite au démarrage suivant.
+        """
+        legacy_meta = os.path.join(self.directory, "meta.json")
+        if not os.path.exists(legacy_meta):
+            return
+        with open(legacy_meta, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("dtype") != self.dtype:
+            raise ValueError(
+                f"Index {self.directory} (ancien format) quantifié en {meta.get('dtype')}, "
+                f"configuration demande {self.dtype} : reconstruire l'index"
+            )
+        legacy_vectors = os.path.join(self.directory, "vectors.npy")
+        legacy_scales = os.path.join(self.directory, "scales.npy")
+        logger.warning(f"⚠️ Index {self.directory} à l'ancien format, conversion de {len(meta['ids'])} chunks")
+
+        dim = None
+        files = []
+        if meta["ids"]:
+            vectors = np.load(legacy_vectors)
+            if len(vectors) != len(meta["ids"]):
+                raise ValueError(
+                    f"Index {self.directory} (ancien format) incohérent: {len(vectors)} vecteurs "
+                    f"pour {len(meta['ids'])} chunks : reconstruire l'index"
+                )
+            dim = vectors.shape[1]
+            files.append((self.vectors_path, np.ascontiguousarray(vectors, dtype=self.dtype).tobytes()))
+            if self.dtype == "int8":
+                files.append((self.scales_path, np.load(legacy_scales).astype(np.float32).tobytes()))
+        meta_lines = "".join(
+            json.dumps({"id": chunk_id, "document": document, "metadata": metadata}, ensure_ascii=False) + "\n"
+            for chunk_id, document, metadata in zip(meta["ids"], meta["documents"], meta["metadatas"])
+        )
+        files.append((self.meta_path, meta_lines.encode("utf-8")))
+
+        for path, data in files:
+            with open(path + ".tmp", "wb") as f:
+                f.write(data)
+            os.replace(path + ".tmp", path)
+        for path in (self.tombstones_path, self.compact_path):
+            if os.path.exists(path):
+                os.remove(path)
+        if dim is not None:
+            self.dim = dim
+            self._write_header()
+            self.dim = None
+        elif os.path.exists(self.header_path):
+            os.remove(self.header_path)
+        for path in (legacy_vectors, legacy_scales, legacy_meta):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def _row_files(self):
+        files = [(self.vectors_path, self.dim * np.dtype(self.dtype).itemsize)]
+        if self.dtype == "int8":
+            files.append((self.scales_path, 4))
+        return files
+
+    def _map(self):
+        rows = len(self.ids)
+        if not rows:
+            self.vectors, self.scales = None, None
+            return
+        self.vectors = np.memmap(self.vectors_path, dtype=self.dtype, mode="r", shape=(rows, self.dim))
+        if self.dtype == "int8":
+            self.scales = np.fromfile(self.scales_path, dtype=np.float32, count=rows)
+
+    def _index_rows(self, start: int):
+        """Ajoute les lignes [start:] à l'index inversé des métadonnées"""
+        for row in range(start, len(self.metadatas)):
+            for key, value in self.metadatas[row].items():
+                if isinstance(value, str):
+                    self.postings.setdefault(key, {}).setdefault(value, []).append(row)
+
+    def _candidate_rows(self, where: Dict[str, List[str]]) -> np.ndarray:
+        """Lignes vivantes satisfaisant toutes les clés du filtre"""
+        rows = None
+        for key, values in where.items():
+            postings = self.postings.get(key, {})
+            matched = set()
+            for value in values:
+                matched.update(postings.get(value, ()))
+            rows = matched if rows is None else rows & matched
+            if not rows:
+                break
+        rows = (rows or set()) - self.deleted
+        return np.fromiter(sorted(rows), dtype=np.int64, count=len(rows))
+
+    def _write_header(self):
+        with open(self.header_path, "w", encoding="utf-8") as f:
+            json.dump({"format": 1, "dtype": self.dtype, "dim": self.dim}, f)
+
+    # --- API VectorStore ---------------------------------------------------
+
+    def add(self, ids, embeddings, documents, metadatas):
+        if not ids:
+            return
+        codes, scales = quantize(np.asarray(embeddings, dtype=np.float32), self.dtype)
+
+        if self.dim is None:
+            self.dim = codes.shape[1]
+            self._write_header()
+        elif codes.shape[1] != self.dim:
+            raise ValueError(f"Dimension {codes.shape[1]} incompatible avec l'index ({self.dim})")
+
+        # Vecteurs d'abord, métadonnées ensuite : une ligne annexe garantit son vecteur
+        with open(self.vectors_path, "ab") as f:
+            f.write(codes.tobytes())
+        if scales is not None:
+            with open(self.scales_path, "ab") as f:
+                f.write(scales.tobytes())
+        with open(self.meta_path, "a", encoding="utf-8") as f:
+            for chunk_id, document, metadata in zip(ids, documents, metadatas):
+                f.write(json.dumps(
+                    {"id": chunk_id, "document": document, "metadata": metadata},
+                    ensure_ascii=False
+                ) + "\n")
+
+        start = len(self.ids)
+        self.ids.extend(ids)
+        self.documents.extend(documents)
+        self.metadatas.extend(metadatas)
+        self._index_rows(start)
+        self._map()
+
+    def _scores(self, queries: np.ndarray, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Similarités (N, Q) des requêtes normalisées avec chaque ligne (ou avec
+        les seules lignes `rows`), par blocs
+        """
+        n = len(self.ids) if rows is None else len(rows)
+        scores = np.empty((n, len(queries)), dtype=np.float32)
+        queries_t = np.ascontiguousarray(queries.T)
+        for start in range(0, n, SEARCH_BLOCK_ROWS):
+            if rows is None:
+                block = self.vectors[start:start + SEARCH_BLOCK_ROWS]
+            else:
+                block = self.vectors[rows[start:start + SEARCH_BLOCK_ROWS]]
+            if block.dtype != np.float32:
+                block = block.astype(np.float32)
+            scores[start:start + len(block)] = block @ queries_t
+        if self.scales is not None:
+            scales = self.scales if rows is None else self.scales[rows]
+            scores *= scales[:, None]
+        if rows is None and self.deleted:
+            scores[list(self.deleted)] = -np.inf
+        return scores
+
+    def query_batch(
+        self,
+        embeddings: List[List[float]],
+        n_results: int,
+        where: Optional[Dict[str, List[str]]] = None
+    ) -> List[Tuple[List[str], List[Dict]]]:
+        """Recherche plusieurs requêtes en un seul passage sur la matrice"""
+        rows = self._candidate_rows(where) if where else None
+        live = self.count() if rows is None else len(rows)
+        if not live:
+            return [([], []) for _ in embeddings]
+
+        queries = np.asarray(embeddings, dtype=np.float32)
+        norms = np.linalg.norm(queries, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        scores = self._scores(queries / norms, rows)
+
+        k = min(n_results, live)
+        results = []
+        for column in scores.T:
+            top = np.argpartition(-column, k - 1)[:k]
+            top = top[np.argsort(-column[top])]
+            if rows is not None:
+                top = rows[top]
+            results.append(([self.documents[i] for i in top], [self.metadatas[i] for i in top]))
+        return results
+
+    def query(self, embedding, n_results, where=None):
+        if not np.any(embedding):
+            return [], []
+        return self.query_batch([embedding], n_results, where)[0]
+
+    def get_metadatas(self):
+        return [meta for i, meta in enumerate(self.metadatas) if i not in self.deleted]
+
+    def delete_document(self, document_id):
+        rows = [
+            i for i in self.postings.get("document_id", {}).get(document_id, [])
+            if i not in self.deleted
+        ]
+        if not rows:
+            return 0
+
+        with open(self.tombstones_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(rows) + "\n")
+        self.deleted.update(rows)
+
+        if len(self.deleted) >= self.compaction_ratio * len(self.ids):
+            self.compact()
+        return len(rows)
+
+    def compact(self):
+        """
+        Réécrit l'index sans les lignes supprimées. Les nouveaux fichiers sont
+        écrits en `.tmp`, puis `compact.json` valide la compaction avant les
+        remplacements : après un arrêt brutal, le chargement termine les
+        remplacements ou ignore les `.tmp`, jamais un mélange des deux.
+        """
+        if not self.deleted:
+            return
+        keep = [i for i in range(len(self.ids)) if i not in self.deleted]
+        logger.info(f"🧹 Compaction de l'index: {len(self.deleted)} lignes supprimées retirées")
+
+        files = [(self.vectors_path, np.asarray(self.vectors)[keep].tobytes() if keep else b"")]
+        if self.scales is not None:
+            files.append((self.scales_path, self.scales[keep].tobytes()))
+        meta_lines = "".join(
+            json.dumps(
+                {"id": self.ids[i], "document": self.documents[i], "metadata": self.metadatas[i]},
+                ensure_ascii=False
+            ) + "\n"
+            for i in keep
+        )
+        files.append((self.meta_path, meta_lines.encode("utf-8")))
+
+        self.vectors = None
+        for path, data in files:
+            with open(path + ".tmp", "wb") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+        with open(self.compact_path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump({"rows": len(keep)}, f)
+        os.replace(self.compact_path + ".tmp", self.compact_path)
+
+        for path, _ in files:
+            os.replace(path + ".tmp", path)
+        if os.path.exists(self.tombstones_path):
+            os.remove(self.tombstones_path)
+        os.remove(self.compact_path)
+
+        self.ids = [self.ids[i] for i in keep]
+        self.documents = [self.documents[i] for i in keep]
+        self.metadatas = [self.metadatas[i] for i in keep]
+        self.deleted = set()
+        self.postings = {}
+        self._index_rows(0)
+        self._map()
+
+    def count(self):
+        return len(self.ids) - len(self.deleted)
+
+    def get_all(self):
+        keep = [i for i in range(len(self.ids)) if i not in self.deleted]
+        if not keep:
+            return [], np.zeros((0, self.dim or 0), dtype=np.float32), [], []
+        vectors = np.asarray(self.vectors[keep], dtype=np.float32)
+        if self.scales is not None:
+            vectors *= self.scales[keep][:, None]
+        return (
+            [self.ids[i] for i in keep],
+            vectors,
+            [self.documents[i] for i in keep],
+            [self.metadatas[i] for i in keep]
+        )
+
+    def clear(self):
+        self.vectors, self.scales = None, None
+        for path in (self.header_path, self.vectors_path, self.scales_path,
+                     self.meta_path, self.tombstones_path, self.compact_path):
+            if os.path.exists(path):
+                os.remove(path)
+        self.dim = None
+        self.ids, self.documents, self.metadatas = [], [], []
+        self.deleted = set()
+        self.postings = {}
+
+    def replace_all(self, ids, embeddings, documents, metadatas):
+        """Construit le nouvel index dans un répertoire voisin, le vérifie, puis le substitue par renommage"""
+        for path in (self.staging_directory, self.previous_directory):
+            if os.path.exists(path):
+                shutil.rmtree(path)
+        try:
+            staged = type(self)(self.staging_directory, dtype=self.dtype, compaction_ratio=self.compaction_ratio)
+            staged.add(ids, embeddings, documents, metadatas)
+            if staged.count() != len(ids):
+                raise ValueError(f"Import incomplet: {staged.count()} chunks sur {len(ids)}")
+            staged.vectors, staged.scales = None, None
+        except Exception:
+            shutil.rmtree(self.staging_directory, ignore_errors=True)
+            raise
+
+        self.vectors, self.scales = None, None
+        os.rename(self.directory, self.previous_directory)
+        os.rename(self.staging_directory, self.directory)
+        shutil.rmtree(self.previous_directory)
+        self._open()
+
+    def memory_bytes(self) -> int:
+        """Taille des vecteurs stockés (hors textes)"""
+        size = self.vectors.nbytes if self.vectors is not None else 0
+        if self.scales is not None:
+            size += self.scales.nbytes
+        return size
+
+
+class QuantizedVectorStore(FlatVectorStore):
+    """Index plat quantifié (float16, ou int8 avec échelle par vecteur)"""
+
+    def __init__(self, directory: str, dtype: str = "int8", **options):
+        if dtype not in ("float16", "int8"):
+            raise ValueError(f"Type de quantification inconnu: {dtype}")
+        super().__init__(directory, dtype=dtype, **options)
+
+
+def create_vector_store(backend: str, **options) -> VectorStore:
+    """Instancie le backend configuré (VECTOR_STORE_BACKEND)"""
+    if backend == "chroma":
+        return ChromaVectorStore(options["chroma_directory"])
+    if backend == "flat":
+        return FlatVectorStore(options["directory"], dtype="float32")
+    if backend == "quantized":
+        return QuantizedVectorStore(options["directory"], dtype=options.get("dtype", "int8"))
+    raise ValueError(f"Backend vectoriel inconnu: {backend}")
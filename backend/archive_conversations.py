@@ -0,0 +1,66 @@
+"""
+Archivage des conversations inactives (stockage froid compressé).
+
+Usage:
+    python archive_conversations.py [jours] [--vacuum]
+
+`jours` : inactivité minimale (défaut ARCHIVE_IDLE_DAYS). Les pages libérées
+sont réutilisées par SQLite ; --vacuum réduit aussi la taille du fichier
+(verrouille la base pendant l'opération).
+"""
+import asyncio
+import json
+import os
+import sys
+
+from sqlalchemy import text
+
+from app.database import engine
+from app.migrations import run_migrations
+from app.services.archive_service import archive_service
+from app.services.db_writer import db_writer
+
+
+async def archive(idle_days):
+    try:
+        return await archive_service.archive_idle_conversations(idle_days)
+    finally:
+        await db_writer.stop()
+
+
+def database_size(path):
+    """Fichier principal + journal WAL"""
+    return sum(os.path.getsize(p) for p in (path, path + "-wal") if os.path.exists(p))
+
+
+def vacuum():
+    """VACUUM puis reconstruction de l'index plein texte (VACUUM peut renuméroter les rowid)"""
+    path = engine.url.database
+    before = database_size(path)
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("VACUUM"))
+        has_fts = conn.execute(text(
+            "SELECT 1 FROM sqlite_master WHERE name = 'messages_fts'"
+        )).first()
+        if has_fts:
+            conn.execute(text("INSERT INTO messages_fts (messages_fts) VALUES ('rebuild')"))
+        # En WAL, la copie compactée passe par le journal : le reporter dans le fichier
+        conn.execute(text("PRAGMA wal_checkpoint(TRUNCATE)"))
+    return {"file_bytes_before": before, "file_bytes_after": database_size(path)}
+
+
+def main():
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    if args and not args[0].isdigit():
+        print(__doc__)
+        sys.exit(1)
+
+    run_migrations()
+    report = asyncio.run(archive(int(args[0]) if args else None))
+    if "--vacuum" in sys.argv:
+        report.update(vacuum())
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Archivage des conversations inactives : octets récupérés dans la table chaude,
+taux de compression, durée du job et latence de réhydratation.
+
+Usage:
+    python benchmarks/bench_archival.py --conversations 2000 --messages 40 --idle-ratio 0.8
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+TMP_DIR = tempfile.mkdtemp()
+os.environ.setdefault("GOOGLE_API_KEY", "")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(TMP_DIR, 'archival.db')}"
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BACKEND_DIR)
+
+from sqlalchemy import insert
+
+from app.database import AsyncSessionLocal, engine
+from app.migrations import run_migrations
+from app.models.conversation import Conversation
+from app.models.message import Message
+from app.services.archive_service import archive_service, default_codec
+from app.services.conversation_service import conversation_service
+from app.services.db_writer import db_writer
+from app.utils.ulid import new_ulid
+
+SENTENCES = [
+    "Les frais de scolarité pour la licence sont payables en deux tranches.",
+    "La session d'examens du premier semestre commence le 15 janvier.",
+    "Connectez-vous à la plateforme Moodle avec votre identifiant étudiant.",
+    "L'attestation d'inscription est disponible dans votre espace personnel.",
+    "Le dépôt du mémoire se fait au plus tard deux semaines avant la soutenance.",
+]
+
+
+def populate(conversations, messages, idle_ratio, seed=0):
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    conversation_rows, message_rows = [], []
+    for i in range(conversations):
+        idle = i < conversations * idle_ratio
+        updated_at = now - timedelta(days=365 if idle else 1)
+        conversation_id = new_ulid()
+        conversation_rows.append({
+            "id": conversation_id, "title": f"Conversation {i}", "user_id": str(i % 100),
+            "updated_at": updated_at, "created_at": updated_at, "message_count": messages,
+        })
+        for j in range(messages):
+            message_rows.append({
+                "id": new_ulid(), "conversation_id": conversation_id,
+                "role": "user" if j % 2 == 0 else "assistant",
+                "content": " ".join(rng.choices(SENTENCES, k=4 if j % 2 else 1)),
+                "timestamp": updated_at - timedelta(minutes=messages - j),
+            })
+    with engine.begin() as conn:
+        conn.execute(insert(Conversation), conversation_rows)
+        for i in range(0, len(message_rows), 10000):
+            conn.execute(insert(Message), message_rows[i:i + 10000])
+    return [row["id"] for row in conversation_rows[: int(conversations * idle_ratio)]]
+
+
+async def run(args, idle_ids):
+    report = await archive_service.archive_idle_conversations(idle_days=30)
+
+    durations = []
+    for conversation_id in idle_ids[: args.rehydrate]:
+        async with AsyncSessionLocal() as db:
+            start = time.perf_counter()
+            conversation = await conversation_service.get_conversation(conversation_id, db)
+            await archive_service.ensure_hot(conversation, db)
+            await conversation_service.get_conversation_messages(conversation_id, db)
+            durations.append(time.perf_counter() - start)
+    await db_writer.stop()
+    durations.sort()
+    return report, {
+        "rehydrated": len(durations),
+        "rehydrate_ms_p50": round(durations[len(durations) // 2] * 1000, 3) if durations else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--conversations", type=int, default=2000)
+    parser.add_argument("--messages", type=int, default=40, help="Messages par conversation")
+    parser.add_argument("--idle-ratio", type=float, default=0.8, help="Part de conversations inactives")
+    parser.add_argument("--rehydrate", type=int, default=50, help="Conversations réouvertes après archivage")
+    args = parser.parse_args()
+
+    run_migrations(engine)
+    idle_ids = populate(args.conversations, args.messages, args.idle_ratio)
+    report, rehydration = asyncio.run(run(args, idle_ids))
+    report["compression_ratio"] = round(report["raw_bytes"] / report["archive_bytes"], 2) if report["archive_bytes"] else None
+    engine.dispose()
+    shutil.rmtree(TMP_DIR, ignore_errors=True)
+
+    print(json.dumps({"codec": default_codec(), "archive": report, "rehydration": rehydration}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+Notifications de devoirs sur plusieurs scans : chaque scan, une petite part
+des devoirs apparaît, disparaît ou voit son échéance déplacée.
+
+- legacy : liste complète envoyée à chaque scan dès qu'elle n'est pas vide
+- tracker : assignment_tracker.diff (nouveaux devoirs, échéances modifiées
+  ou proches), état par utilisateur en base
+
+Usage:
+    python benchmarks/bench_assignment_changes.py --users 200 --assignments 15 --scans 10
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+os.environ.setdefault("GOOGLE_API_KEY", "")
+_tmp = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp, 'changes.db')}"
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BACKEND_DIR)
+
+from app.database import SessionLocal
+from app.migrations import run_migrations
+from app.models.assignment_snapshot import AssignmentSnapshot
+from app.models.user import User
+from app.services.assignment_tracker import assignment_tracker
+from app.services.db_writer import db_writer
+
+MONTHS = ["janvier", "février", "mars", "avril", "mai", "juin", "juillet",
+          "août", "septembre", "octobre", "novembre", "décembre"]
+START = datetime(2025, 1, 6, 8, 0)
+
+
+def due_text(due: datetime) -> str:
+    return f"{due.day} {MONTHS[due.month - 1]}, {due:%H:%M}"
+
+
+class Calendar:
+    """Calendrier simulé d'un utilisateur : devoirs à venir, quelques changements par scan"""
+
+    def __init__(self, rng, size):
+        self.rng = rng
+        self.next_id = 0
+        self.items = {}
+        for _ in range(size):
+            self.add(START)
+
+    def add(self, now):
+        self.next_id += 1
+        self.items[self.next_id] = now + timedelta(days=self.rng.uniform(1, 30))
+
+    def step(self, now, rate):
+        for item_id in list(self.items):
+            roll = self.rng.random()
+            if self.items[item_id] < now or roll < rate / 2:
+                del self.items[item_id]
+                self.add(now)
+            elif roll < rate:
+                self.items[item_id] += timedelta(days=self.rng.choice([-2, 1, 3]))
+
+    def assignments(self, user_id):
+        return [
+            {"title": f"Devoir {item_id}", "due_date": due_text(due),
+             "link": f"https://licences5.uvci.online/mod/assign/view.php?id={user_id}-{item_id}"}
+            for item_id, due in sorted(self.items.items(), key=lambda item: item[1])
+        ]
+
+
+async def run(users, size, scans, rate, seed):
+    calendars = {user_id: Calendar(random.Random(seed + user_id), size) for user_id in users}
+    legacy = {"emails": 0, "items": 0}
+    tracker = {"emails": 0, "items": 0}
+    changes = {"new": 0, "changed": 0, "due_soon": 0}
+    per_scan = []
+    for scan in range(scans):
+        # Un scan toutes les 6 heures
+        now = START + timedelta(hours=6 * scan)
+        start = time.perf_counter()
+        for user_id in users:
+            calendar = calendars[user_id]
+            if scan:
+                calendar.step(now, rate)
+            assignments = calendar.assignments(user_id)
+            if assignments:
+                legacy["emails"] += 1
+                legacy["items"] += len(assignments)
+            notify, pending = await assignment_tracker.diff(user_id, assignments, now=now)
+            await assignment_tracker.commit(pending)
+            if notify:
+                tracker["emails"] += 1
+                tracker["items"] += len(notify)
+                for item in notify:
+                    changes[item["change"]] += 1
+        await db_writer.flush()
+        per_scan.append(time.perf_counter() - start)
+
+    checks = len(users) * scans
+    stats = assignment_tracker.metrics()
+    return {
+        "checks": checks,
+        "legacy": {**legacy, "items_per_check": round(legacy["items"] / checks, 2)},
+        "tracker": {
+            **tracker,
+            "items_per_check": round(tracker["items"] / checks, 2),
+            "changes": changes,
+            # Lignes insérées, modifiées ou supprimées (aucune pour un devoir inchangé)
+            "rows_written": sum(stats[key] for key in ("new", "changed", "due_soon", "removed")),
+            "unchanged": stats["unchanged"],
+            "first_scan_ms": round(per_scan[0] * 1000, 1),
+            "steady_scan_ms": round(sum(per_scan[1:]) / max(len(per_scan) - 1, 1) * 1000, 1),
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--assignments", type=int, default=15)
+    parser.add_argument("--scans", type=int, default=10)
+    parser.add_argument("--change-rate", type=float, default=0.02, help="Part des devoirs modifiés par scan")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    run_migrations()
+    with SessionLocal() as db:
+        db.add_all(User(email=f"etu{i}@uvci.edu.ci", password_hash="x") for i in range(args.users))
+        db.commit()
+        users = [user.id for user in db.query(User).order_by(User.id)]
+
+    async def bench():
+        result = await run(users, args.assignments, args.scans, args.change_rate, args.seed)
+        await db_writer.stop()
+        return result
+
+    result = asyncio.run(bench())
+    with SessionLocal() as db:
+        result["tracker"]["snapshots"] = db.query(AssignmentSnapshot).count()
+    print(json.dumps({"users": args.users, "assignments": args.assignments, "scans": args.scans,
+                      "change_rate": args.change_rate, **result}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Résolution de l'utilisateur courant (get_current_user) : latence et requêtes
+SQL par requête authentifiée.
+
+- cold : cache vidé avant chaque appel (décodage JWT + SELECT users)
+- cached : jeton déjà résolu (principal_cache)
+
+Usage:
+    python benchmarks/bench_auth_cache.py --requests 5000 --users 100
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("GOOGLE_API_KEY", "")
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BACKEND_DIR)
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base, configure_sqlite
+from app.models.user import User
+from app.services.auth_service import auth_service
+from app.services.principal_cache import principal_cache
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] if values else 0.0
+
+
+def populate(path, users):
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+    with Session() as db:
+        db.add_all(
+            User(email=f"user{i}@uvci.edu.ci", full_name=f"Utilisateur {i}", password_hash="x")
+            for i in range(users)
+        )
+        db.commit()
+    engine.dispose()
+    return [auth_service.create_access_token({"sub": f"user{i}@uvci.edu.ci"}) for i in range(users)]
+
+
+async def run(mode, path, tokens, requests):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    configure_sqlite(engine.sync_engine)
+    counter = {"queries": 0}
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def on_execute(*args):
+        counter["queries"] += 1
+
+    factory = async_sessionmaker(engine, expire_on_commit=False)
+    principal_cache.clear()
+    principal_cache.stats = dict.fromkeys(principal_cache.stats, 0)
+    if mode == "cached":
+        async with factory() as db:
+            for token in tokens:
+                await auth_service.get_current_user(token, db)
+    counter["queries"] = 0
+
+    durations = []
+    for i in range(requests):
+        token = tokens[i % len(tokens)]
+        if mode == "cold":
+            principal_cache.clear()
+        start = time.perf_counter()
+        # Une session par requête, comme la dépendance get_async_db
+        async with factory() as db:
+            await auth_service.get_current_user(token, db)
+        durations.append(time.perf_counter() - start)
+    await engine.dispose()
+
+    return {
+        "mode": mode,
+        "requests": requests,
+        "ms_p50": round(percentile(durations, 0.5) * 1000, 4),
+        "ms_p95": round(percentile(durations, 0.95) * 1000, 4),
+        "requests_per_s": round(requests / sum(durations)),
+        "queries_per_request": round(counter["queries"] / requests, 3),
+        "hit_rate": principal_cache.metrics()["hit_rate"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--users", type=int, default=100)
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "auth.db")
+        tokens = populate(path, args.users)
+        for mode in ("cold", "cached"):
+            results.append(asyncio.run(run(mode, path, tokens, args.requests)))
+
+    print(json.dumps({"users": args.users, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
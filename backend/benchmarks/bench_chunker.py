@@ -0,0 +1,125 @@
+"""
+Débit du découpage en chunks : implémentation historique (caractères)
+contre le découpage par phrases / budget de tokens.
+
+Usage:
+    python benchmarks/bench_chunker.py --size-mb 20
+    python benchmarks/bench_chunker.py --files document1.txt document2.txt
+"""
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("GOOGLE_API_KEY", "")
+
+from app.utils.chunker import TextChunker, count_tokens
+from app.utils.pdf_processor import pdf_processor
+
+
+def legacy_clean_text(text: str) -> str:
+    """Ancien PDFProcessor.clean_text (écrase tous les sauts de ligne)"""
+    text = re.sub(r'\s+', ' ', text)
+    text = re.sub(r'[^\w\s\-.,;:!?()«»""\'àâäéèêëïîôùûüÿçÀÂÄÉÈÊËÏÎÔÙÛÜŸÇ]', '', text)
+    text = re.sub(r'\n{3,}', '\n\n', text)
+    return text.strip()
+
+
+def legacy_chunk_text(text: str, chunk_size: int = 1000, overlap: int = 200):
+    """Ancien PDFProcessor.chunk_text (fenêtre de caractères)"""
+    chunks = []
+    start = 0
+    text_length = len(text)
+    while start < text_length:
+        end = start + chunk_size
+        if end < text_length:
+            last_space = text.rfind(' ', end - 100, end)
+            if last_space > start:
+                end = last_space
+        chunk = text[start:end].strip()
+        if chunk:
+            chunks.append(chunk)
+        start = end - overlap if end < text_length else text_length
+    return chunks
+
+
+WORDS = (
+    "étudiant inscription université virtuelle licence master examen session "
+    "paiement frais scolarité calendrier plateforme cours devoir semestre crédit "
+    "validation diplôme administration formation numérique tuteur évaluation"
+).split()
+
+
+def synthetic_document(size_bytes: int, seed: int = 0) -> str:
+    """Document type règlement : titres, paragraphes sur plusieurs lignes, pages"""
+    rng = random.Random(seed)
+    parts = []
+    size = 0
+    article = 0
+    while size < size_bytes:
+        article += 1
+        lines = [f"ARTICLE {article} - {rng.choice(WORDS).upper()}"]
+        for _ in range(rng.randint(2, 5)):
+            sentences = []
+            for _ in range(rng.randint(2, 6)):
+                words = [rng.choice(WORDS) for _ in range(rng.randint(6, 25))]
+                sentences.append(words[0].capitalize() + " " + " ".join(words[1:]) + ".")
+            paragraph = " ".join(sentences)
+            # Retours à la ligne d'une mise en page PDF
+            lines.extend(paragraph[i:i + 90] for i in range(0, len(paragraph), 90))
+            lines.append("")
+        block = "\n".join(lines) + "\n"
+        parts.append(block)
+        size += len(block.encode("utf-8"))
+    return "".join(parts)
+
+
+def measure(name, clean, chunk, text, repeat):
+    size_mb = len(text.encode("utf-8")) / 1e6
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        chunks = chunk(clean(text))
+        best = min(best, time.perf_counter() - start)
+    tokens = [count_tokens(c) for c in chunks]
+    return {
+        "implementation": name,
+        "mb_per_s": size_mb / best,
+        "seconds": best,
+        "chunks": len(chunks),
+        "avg_tokens": sum(tokens) / len(tokens) if tokens else 0,
+        "max_tokens": max(tokens) if tokens else 0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size-mb", type=float, default=10)
+    parser.add_argument("--files", nargs="*", help="Fichiers texte à découper (au lieu du document synthétique)")
+    parser.add_argument("--chunk-tokens", type=int, default=256)
+    parser.add_argument("--overlap-tokens", type=int, default=48)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.files:
+        text = "\n\n".join(open(path, encoding="utf-8").read() for path in args.files)
+    else:
+        text = synthetic_document(int(args.size_mb * 1e6))
+
+    chunker = TextChunker(args.chunk_tokens, args.overlap_tokens)
+    report = {
+        "input_mb": len(text.encode("utf-8")) / 1e6,
+        "results": [
+            measure("legacy_chars", legacy_clean_text, legacy_chunk_text, text, args.repeat),
+            measure("sentence_tokens", pdf_processor.clean_text, chunker.chunk, text, args.repeat),
+        ]
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Lecture du contexte à chaque tour de chat : requêtes SQL et latence,
+base de données seule vs cache mémoire des conversations.
+
+Simule des conversations entrelacées (chaque tour : lecture du contexte puis
+écriture du tour via l'écrivain unique, comme l'API).
+
+Usage:
+    python benchmarks/bench_context_cache.py --conversations 200 --turns 10
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("GOOGLE_API_KEY", "")
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BACKEND_DIR)
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.database import configure_sqlite
+from app.migrations import run_migrations
+from app.services.context_cache import context_cache
+from app.services.conversation_service import conversation_service
+from app.services.db_writer import DBWriter
+from app.services import conversation_service as conversation_module
+
+QUESTION = "Quelles sont les dates de la session d'examens ?"
+ANSWER = "La session d'examens se déroule du 15 au 30 janvier. " * 12
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] if values else 0.0
+
+
+async def run(mode, path, args):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    configure_sqlite(engine.sync_engine)
+    factory = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+    writer = DBWriter(session_factory=factory)
+    conversation_module.db_writer = writer
+    context_cache.clear()
+    context_cache.hits = context_cache.misses = 0
+    context_cache.capacity = args.conversations if mode == "cache" else 0
+
+    async with factory() as db:
+        conversation_ids = [
+            (await conversation_service.create_conversation(f"Conversation {i}", None, db)).id
+            for i in range(args.conversations)
+        ]
+
+    counter = {"reads": 0}
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def on_execute(conn, cursor, statement, *rest):
+        if statement.lstrip().upper().startswith("SELECT"):
+            counter["reads"] += 1
+
+    durations = []
+    for _ in range(args.turns):
+        for conversation_id in conversation_ids:
+            async with factory() as db:
+                start = time.perf_counter()
+                await conversation_service.get_conversation_context(conversation_id, db, limit=6)
+                durations.append(time.perf_counter() - start)
+            writer.enqueue(
+                lambda write_db, cid=conversation_id: conversation_service.record_turn(
+                    cid, QUESTION, ANSWER, [], write_db, commit=False
+                ),
+                key=conversation_id
+            )
+            context_cache.append_turn(conversation_id, QUESTION, ANSWER)
+    await writer.stop()
+    await engine.dispose()
+
+    turns = len(durations)
+    return {
+        "mode": mode,
+        "turns": turns,
+        "context_ms_p50": round(percentile(durations, 0.5) * 1000, 3),
+        "context_ms_p95": round(percentile(durations, 0.95) * 1000, 3),
+        "history_queries_per_turn": round(counter["reads"] / turns, 3),
+        "cache": context_cache.metrics(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--conversations", type=int, default=200)
+    parser.add_argument("--turns", type=int, default=10, help="Tours par conversation")
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in ("db", "cache"):
+            path = os.path.join(tmp, f"{mode}.db")
+            engine = create_engine(f"sqlite:///{path}")
+            run_migrations(engine)
+            engine.dispose()
+            results.append(asyncio.run(run(mode, path, args)))
+
+    print(json.dumps({"results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
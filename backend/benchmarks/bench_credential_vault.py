@@ -0,0 +1,70 @@
+"""
+Déchiffrement des mots de passe UVCI pour un scan du scheduler.
+
+- legacy : Fernet reconstruit (dérivation SHA-256 de SECRET_KEY) à chaque appel
+- vault : credential_vault.decrypt, chiffrement construit une fois
+- decrypt_many : un appel pour toute la liste
+- rotated : secrets encore chiffrés avec l'ancienne clé (2 clés configurées)
+
+Usage:
+    python benchmarks/bench_credential_vault.py --users 10000
+"""
+import argparse
+import base64
+import hashlib
+import json
+import os
+import sys
+import time
+
+os.environ.setdefault("GOOGLE_API_KEY", "")
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BACKEND_DIR)
+
+from cryptography.fernet import Fernet
+
+from app.services.credential_vault import CredentialVault
+
+
+def legacy_decrypt(token):
+    secret = os.getenv("SECRET_KEY", "dev-secret-key").encode()
+    key = base64.urlsafe_b64encode(hashlib.sha256(secret).digest())
+    return Fernet(key).decrypt(token.encode()).decode()
+
+
+def timed(name, func, count):
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    return {"mode": name, "total_ms": round(elapsed * 1000, 1), "us_per_secret": round(elapsed / count * 1e6, 2)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=10000)
+    args = parser.parse_args()
+
+    old_key, new_key = Fernet.generate_key(), Fernet.generate_key()
+    secret = os.getenv("SECRET_KEY", "dev-secret-key").encode()
+    derived = base64.urlsafe_b64encode(hashlib.sha256(secret).digest())
+    passwords = [f"motdepasse-{i}" for i in range(args.users)]
+
+    vault = CredentialVault([derived])
+    tokens = [vault.encrypt(p) for p in passwords]
+    rotating = CredentialVault([new_key, old_key])
+    old_tokens = [CredentialVault([old_key]).encrypt(p) for p in passwords]
+
+    results = [
+        timed("legacy", lambda: [legacy_decrypt(t) for t in tokens], args.users),
+        timed("vault", lambda: [vault.decrypt(t) for t in tokens], args.users),
+        timed("decrypt_many", lambda: vault.decrypt_many(tokens), args.users),
+        timed("decrypt_many_old_key", lambda: rotating.decrypt_many(old_tokens), args.users),
+        timed("rotate", lambda: [rotating.rotate(t) for t in old_tokens], args.users),
+    ]
+    assert vault.decrypt_many(tokens) == passwords == rotating.decrypt_many(old_tokens)
+    print(json.dumps({"users": args.users, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""
+Test de charge de la couche base de données du chat : N flux concurrents.
+
+Chaque flux rejoue un tour de chat (création de conversation, contexte,
+streaming simulé, enregistrement des deux messages) :
+- sync : sessions SQLAlchemy synchrones appelées depuis la boucle (ancien code)
+- async : conversation_service sur aiosqlite
+
+Mesures : tours/s, latence par tour et retard de la boucle d'événements
+(un ticker toutes les 5 ms) : en mode sync, chaque requête SQLite bloque
+tous les flux en cours.
+
+Usage:
+    python benchmarks/bench_db_concurrency.py --streams 50 --turns 5
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+os.environ.setdefault("GOOGLE_API_KEY", "")
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BACKEND_DIR)
+
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models.conversation import Conversation
+from app.models.message import Message
+from app.services.conversation_service import conversation_service
+
+TICK = 0.005
+
+
+def legacy_turn(db, conversation_id):
+    """Début d'un tour de l'ancien code : requêtes synchrones sur la boucle"""
+    if conversation_id is None:
+        conversation = Conversation(title="Bench", user_id=None)
+        db.add(conversation)
+        db.commit()
+        db.refresh(conversation)
+        conversation_id = conversation.id
+    db.query(Message).filter(Message.conversation_id == conversation_id).order_by(
+        Message.timestamp.desc()
+    ).limit(6).all()
+    return conversation_id
+
+
+def legacy_save(db, conversation_id, role, content):
+    db.add(Message(conversation_id=conversation_id, role=role, content=content))
+    conversation = db.query(Conversation).filter(Conversation.id == conversation_id).first()
+    conversation.updated_at = datetime.utcnow()
+    db.commit()
+
+
+async def stream_sync(SessionLocal, turns, chunks, chunk_delay, latencies):
+    db = SessionLocal()
+    conversation_id = None
+    try:
+        for turn in range(turns):
+            start = time.perf_counter()
+            conversation_id = legacy_turn(db, conversation_id)
+            db.close()
+            for _ in range(chunks):
+                await asyncio.sleep(chunk_delay)
+            legacy_save(db, conversation_id, "user", f"question {turn}")
+            legacy_save(db, conversation_id, "assistant", "réponse " * 50)
+            latencies.append(time.perf_counter() - start)
+    finally:
+        db.close()
+
+
+async def stream_async(AsyncSessionLocal, turns, chunks, chunk_delay, latencies):
+    async with AsyncSessionLocal() as db:
+        conversation = None
+        for turn in range(turns):
+            start = time.perf_counter()
+            if conversation is None:
+                conversation = await conversation_service.create_conversation("Bench", None, db)
+            await conversation_service.get_conversation_context(conversation.id, db, limit=6)
+            await db.close()
+            for _ in range(chunks):
+                await asyncio.sleep(chunk_delay)
+            await conversation_service.add_message(conversation.id, "user", f"question {turn}", None, db)
+            await conversation_service.add_message(conversation.id, "assistant", "réponse " * 50, [], db)
+            latencies.append(time.perf_counter() - start)
+
+
+async def ticker(lags, stop):
+    """Retard de réveil de la boucle : temps pendant lequel elle était bloquée"""
+    while not stop.is_set():
+        expected = time.perf_counter() + TICK
+        await asyncio.sleep(TICK)
+        lags.append(max(0.0, time.perf_counter() - expected))
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] if values else 0.0
+
+
+async def run(mode, path, args):
+    url = f"sqlite:///{path}"
+    create_all_engine = create_engine(url)
+    Base.metadata.create_all(bind=create_all_engine)
+    create_all_engine.dispose()
+
+    if mode == "sync":
+        engine = create_engine(url, connect_args={"check_same_thread": False})
+        factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        stream = stream_sync
+    else:
+        engine = create_async_engine("sqlite+aiosqlite:///" + path)
+        factory = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+        stream = stream_async
+
+    latencies, lags = [], []
+    stop = asyncio.Event()
+    tick_task = asyncio.create_task(ticker(lags, stop))
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        stream(factory, args.turns, args.chunks, args.chunk_delay, latencies)
+        for _ in range(args.streams)
+    ))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await tick_task
+
+    if mode == "sync":
+        engine.dispose()
+    else:
+        await engine.dispose()
+
+    # Durée minimale d'un tour : le streaming simulé seul
+    floor = args.chunks * args.chunk_delay
+    return {
+        "mode": mode,
+        "turns": len(latencies),
+        "elapsed_s": round(elapsed, 3),
+        "turns_per_s": round(len(latencies) / elapsed, 1),
+        "turn_ms_p50": round(percentile(latencies, 0.5) * 1000, 1),
+        "turn_ms_p95": round(percentile(latencies, 0.95) * 1000, 1),
+        "turn_overhead_ms_p50": round((percentile(latencies, 0.5) - floor) * 1000, 1),
+        "loop_lag_ms_p50": round(percentile(lags, 0.5) * 1000, 2),
+        "loop_lag_ms_p95": round(percentile(lags, 0.95) * 1000, 2),
+        "loop_lag_ms_max": round(max(lags, default=0.0) * 1000, 2),
+        "loop_lag_ms_mean": round(statistics.fmean(lags) * 1000, 2) if lags else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--streams", type=int, default=50, help="Flux de chat concurrents")
+    parser.add_argument("--turns", type=int, default=5, help="Tours par flux")
+    parser.add_argument("--chunks", type=int, default=20, help="Chunks streamés par réponse")
+    parser.add_argument("--chunk-delay", type=float, default=0.01, help="Délai entre chunks (s)")
+    parser.add_argument("--modes", default="sync,async")
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in args.modes.split(","):
+            path = os.path.join(tmp, f"{mode}.db")
+            results.append(asyncio.run(run(mode, path, args)))
+
+    print(json.dumps({
+        "streams": args.streams,
+        "turns_per_stream": args.turns,
+        "results": results
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Messages persistés par seconde sous écritures concurrentes.
+
+Modes :
+- default : SQLite par défaut (journal rollback), un commit par message
+- wal : pragmas de app.database.configure_sqlite, un commit par message
+- writer : pragmas + écrivain unique (DBWriter), commits groupés
+
+Usage:
+    python benchmarks/bench_db_writes.py --producers 50 --messages 40
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("GOOGLE_API_KEY", "")
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BACKEND_DIR)
+
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.database import Base, configure_sqlite
+from app.models.conversation import Conversation
+from app.services.conversation_service import conversation_service
+from app.services.db_writer import DBWriter
+
+MODES = ("default", "wal", "writer")
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] if values else 0.0
+
+
+async def producer(mode, factory, writer, conversation_id, messages, latencies, errors):
+    content = "réponse " * 60
+    for i in range(messages):
+        start = time.perf_counter()
+        try:
+            if mode == "writer":
+                await writer.submit(lambda db: conversation_service.add_message(
+                    conversation_id, "assistant", content, [], db, commit=False
+                ))
+            else:
+                async with factory() as db:
+                    await conversation_service.add_message(conversation_id, "assistant", content, [], db)
+        except Exception:
+            errors.append(i)
+            continue
+        latencies.append(time.perf_counter() - start)
+
+
+async def run(mode, path, args):
+    create_all_engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=create_all_engine)
+    create_all_engine.dispose()
+
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}", pool_size=args.producers)
+    if mode != "default":
+        configure_sqlite(engine.sync_engine)
+    factory = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+    writer = DBWriter(session_factory=factory) if mode == "writer" else None
+
+    conversation_ids = []
+    async with factory() as db:
+        for i in range(args.producers):
+            conversation = Conversation(title=f"Bench {i}")
+            db.add(conversation)
+            conversation_ids.append(conversation)
+        await db.commit()
+    conversation_ids = [conversation.id for conversation in conversation_ids]
+
+    latencies, errors = [], []
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        producer(mode, factory, writer, conversation_id, args.messages, latencies, errors)
+        for conversation_id in conversation_ids
+    ))
+    elapsed = time.perf_counter() - start
+    if writer:
+        await writer.stop()
+    await engine.dispose()
+
+    result = {
+        "mode": mode,
+        "messages": len(latencies),
+        "errors": len(errors),
+        "elapsed_s": round(elapsed, 3),
+        "messages_per_s": round(len(latencies) / elapsed, 1),
+        "latency_ms_p50": round(percentile(latencies, 0.5) * 1000, 2),
+        "latency_ms_p95": round(percentile(latencies, 0.95) * 1000, 2),
+    }
+    if writer:
+        result["commits"] = writer.stats["batches"]
+        result["messages_per_commit"] = round(writer.stats["ops"] / max(1, writer.stats["batches"]), 1)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--producers", type=int, default=50, help="Écrivains concurrents")
+    parser.add_argument("--messages", type=int, default=40, help="Messages par écrivain")
+    parser.add_argument("--modes", default=",".join(MODES))
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in args.modes.split(","):
+            results.append(asyncio.run(run(mode, os.path.join(tmp, f"{mode}.db"), args)))
+
+    print(json.dumps({
+        "producers": args.producers,
+        "messages_per_producer": args.messages,
+        "results": results
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
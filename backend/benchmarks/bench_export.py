@@ -0,0 +1,130 @@
+"""
+Export des conversations : mémoire de pointe (tracemalloc) et débit, chargement
+complet par l'ORM vs export en flux par lots, pour des volumes croissants.
+Le débit est mesuré sous tracemalloc (sous-estimé, comparable entre modes).
+
+Usage:
+    python benchmarks/bench_export.py --messages 20000,100000,400000
+"""
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+TMP_DIR = tempfile.mkdtemp()
+os.environ.setdefault("GOOGLE_API_KEY", "")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(TMP_DIR, 'export.db')}"
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BACKEND_DIR)
+
+from sqlalchemy import delete, insert, select
+from sqlalchemy.orm import selectinload
+
+from app.database import AsyncSessionLocal, async_engine, engine
+from app.migrations import run_migrations
+from app.models.conversation import Conversation
+from app.models.message import Message
+from app.services.export_service import export_service
+from app.utils.ulid import new_ulid
+
+MESSAGES_PER_CONVERSATION = 20
+CONTENT = "La session d'examens du premier semestre commence le 15 janvier. " * 6
+
+
+def populate(messages):
+    with engine.begin() as conn:
+        conn.execute(delete(Message))
+        conn.execute(delete(Conversation))
+        start = datetime(2024, 1, 1)
+        for offset in range(0, messages, 10000):
+            conversation_rows, message_rows = [], []
+            for i in range(offset, min(messages, offset + 10000)):
+                if i % MESSAGES_PER_CONVERSATION == 0:
+                    conversation_rows.append({
+                        "id": new_ulid(), "title": f"Conversation {i}", "user_id": str(i % 50),
+                        "updated_at": start + timedelta(minutes=i), "message_count": MESSAGES_PER_CONVERSATION,
+                    })
+                message_rows.append({
+                    "id": new_ulid(), "conversation_id": conversation_rows[-1]["id"],
+                    "role": "user" if i % 2 == 0 else "assistant", "content": CONTENT,
+                    "timestamp": start + timedelta(minutes=i),
+                })
+            conn.execute(insert(Conversation), conversation_rows)
+            conn.execute(insert(Message), message_rows)
+
+
+async def orm_export(output):
+    """Ancienne approche : toutes les conversations et leurs messages en mémoire"""
+    async with AsyncSessionLocal() as db:
+        conversations = (await db.execute(
+            select(Conversation).options(selectinload(Conversation.messages))
+        )).scalars().all()
+        for conversation in conversations:
+            for msg in conversation.messages:
+                output.write((json.dumps({
+                    "conversation_id": conversation.id, "message_id": msg.id,
+                    "content": msg.content, "timestamp": msg.timestamp.isoformat(),
+                }, ensure_ascii=False) + "\n").encode("utf-8"))
+
+
+async def stream_export(output, fmt, compress):
+    async for chunk in export_service.stream(fmt, compress):
+        output.write(chunk)
+
+
+def measure(name, coroutine_factory, path):
+    tracemalloc.start()
+    start = time.perf_counter()
+    with open(path, "wb") as output:
+        asyncio.run(coroutine_factory(output))
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    size = os.path.getsize(path)
+    return {
+        "mode": name,
+        "seconds": round(elapsed, 2),
+        "peak_mb": round(peak / 1e6, 1),
+        "output_mb": round(size / 1e6, 1),
+        "messages_per_s": None,
+    }
+
+
+async def dispose():
+    await async_engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", default="20000,100000,400000", help="Volumes (liste)")
+    args = parser.parse_args()
+
+    run_migrations(engine)
+    results = []
+    for messages in [int(m) for m in args.messages.split(",")]:
+        populate(messages)
+        path = os.path.join(TMP_DIR, "out")
+        runs = [
+            measure("orm_load_all", orm_export, path),
+            measure("stream_ndjson", lambda out: stream_export(out, "ndjson", False), path),
+            measure("stream_csv_gzip", lambda out: stream_export(out, "csv", True), path),
+        ]
+        for run in runs:
+            run["messages_per_s"] = round(messages / run["seconds"]) if run["seconds"] else None
+        results.append({"messages": messages, "runs": runs})
+
+    asyncio.run(dispose())
+    engine.dispose()
+    shutil.rmtree(TMP_DIR, ignore_errors=True)
+    print(json.dumps({"results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
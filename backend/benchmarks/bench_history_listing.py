@@ -0,0 +1,113 @@
+"""
+Liste d'historique : requêtes SQL et latence en fonction de la longueur des conversations.
+
+- legacy : len(conv.messages) par conversation (chargement paresseux, N+1)
+- current : conversation_service.get_all_conversations (compteurs dénormalisés)
+
+Usage:
+    python benchmarks/bench_history_listing.py --conversations 50 --messages 10,100,400
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("GOOGLE_API_KEY", "")
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BACKEND_DIR)
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models.conversation import Conversation
+from app.models.message import Message
+from app.services.conversation_service import conversation_service
+
+
+def populate(engine, conversations, messages):
+    Session = sessionmaker(bind=engine)
+    with Session() as db:
+        for i in range(conversations):
+            conversation = Conversation(title=f"Conversation {i}", message_count=messages)
+            db.add(conversation)
+            db.flush()
+            db.add_all(
+                Message(conversation_id=conversation.id, role="user", content="message " * 80)
+                for _ in range(messages)
+            )
+        db.commit()
+
+
+def count_queries(engine):
+    counter = {"queries": 0}
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def on_execute(*args):
+        counter["queries"] += 1
+
+    return counter
+
+
+def legacy_listing(engine):
+    Session = sessionmaker(bind=engine)
+    with Session() as db:
+        conversations = db.query(Conversation).order_by(Conversation.updated_at.desc()).limit(50).all()
+        return [len(conv.messages) for conv in conversations]
+
+
+async def current_listing(factory):
+    async with factory() as db:
+        conversations = await conversation_service.get_all_conversations(db)
+        return [conv.message_count for conv in conversations]
+
+
+def measure(path, args):
+    sync_engine = create_engine(f"sqlite:///{path}")
+    counter = count_queries(sync_engine)
+    counter["queries"] = 0
+    start = time.perf_counter()
+    legacy_listing(sync_engine)
+    legacy = {"queries": counter["queries"], "ms": round((time.perf_counter() - start) * 1000, 2)}
+    sync_engine.dispose()
+
+    async def run_current():
+        engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+        counter = count_queries(engine.sync_engine)
+        factory = async_sessionmaker(engine, expire_on_commit=False)
+        start = time.perf_counter()
+        await current_listing(factory)
+        elapsed = time.perf_counter() - start
+        await engine.dispose()
+        return {"queries": counter["queries"], "ms": round(elapsed * 1000, 2)}
+
+    return legacy, asyncio.run(run_current())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--conversations", type=int, default=50)
+    parser.add_argument("--messages", default="10,100,400", help="Messages par conversation (liste)")
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for messages in [int(m) for m in args.messages.split(",")]:
+            path = os.path.join(tmp, f"history_{messages}.db")
+            engine = create_engine(f"sqlite:///{path}")
+            Base.metadata.create_all(bind=engine)
+            populate(engine, args.conversations, messages)
+            engine.dispose()
+            legacy, current = measure(path, args)
+            results.append({"messages_per_conversation": messages, "legacy": legacy, "current": current})
+
+    print(json.dumps({"conversations": args.conversations, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+Recherche dans l'historique : latence FTS5 (search_service) vs LIKE sur
+messages.content, en fonction du volume total de messages.
+
+Usage:
+    python benchmarks/bench_history_search.py --messages 1000000 --users 2000
+"""
+import argparse
+import asyncio
+import json
+import os
+import itertools
+import random
+import re
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+os.environ.setdefault("GOOGLE_API_KEY", "")
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BACKEND_DIR)
+
+from sqlalchemy import create_engine, insert, text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.migrations import run_migrations
+from app.models.conversation import Conversation
+from app.models.message import Message
+from app.services import search_service as search_module
+from app.services.search_service import search_service
+from app.utils.ulid import new_ulid
+
+DOMAIN_WORDS = (
+    "inscription frais scolarité examen session calendrier diplôme licence master "
+    "cours module devoir note bourse paiement attestation stage soutenance emploi "
+    "temps salle plateforme moodle identifiant mot passe réinscription semestre"
+).split()
+STOPWORDS = "de la le les des et à en pour du un une est que qui sur dans".split()
+# Distribution de Zipf : mots vides en tête, vocabulaire métier ensuite, longue traîne
+VOCABULARY = STOPWORDS + DOMAIN_WORDS + [f"terme{i}" for i in range(5000)]
+CUM_WEIGHTS = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(VOCABULARY))))
+QUERIES = [
+    "les frais de scolarité",
+    "session d'examen",
+    "attestation",
+    "mot de passe moodle",
+    "soutenance du stage",
+    "terme4242 terme4343",  # rare : LIKE parcourt tout l'historique de l'utilisateur
+]
+CONVERSATIONS_PER_USER = 5
+
+
+def populate(engine, messages, users, seed=0):
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1)
+    conversations = []
+    with engine.begin() as conn:
+        for user in range(users):
+            for _ in range(CONVERSATIONS_PER_USER):
+                conversations.append({"id": new_ulid(), "user_id": str(user + 1), "title": "Bench"})
+        conn.execute(insert(Conversation), conversations)
+        batch = []
+        for i in range(messages):
+            batch.append({
+                "id": new_ulid(),
+                "conversation_id": conversations[i % len(conversations)]["id"],
+                "role": "user" if i % 2 == 0 else "assistant",
+                "content": " ".join(rng.choices(VOCABULARY, cum_weights=CUM_WEIGHTS, k=30)),
+                "timestamp": start + timedelta(seconds=i),
+            })
+            if len(batch) == 10000:
+                conn.execute(insert(Message), batch)
+                batch = []
+        if batch:
+            conn.execute(insert(Message), batch)
+
+
+def like_search(conn, user_id, query, limit):
+    words = [w for w in re.findall(r"\w+", query) if w.lower() not in search_module.STOPWORDS]
+    clauses = " AND ".join(f"m.content LIKE :w{i}" for i in range(len(words)))
+    params = {f"w{i}": f"%{word}%" for i, word in enumerate(words)}
+    return conn.execute(text(
+        "SELECT m.id FROM messages m JOIN conversations c ON c.id = m.conversation_id "
+        f"WHERE c.user_id = :user AND {clauses} ORDER BY m.timestamp DESC LIMIT :limit"
+    ), {**params, "user": user_id, "limit": limit}).all()
+
+
+def best_ms(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return round(best * 1000, 3)
+
+
+async def fts_ms(path, user_id, query, limit, repeat):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    factory = async_sessionmaker(engine)
+    best = float("inf")
+    async with factory() as db:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            await search_service.search_messages(user_id, query, db, limit)
+            best = min(best, time.perf_counter() - start)
+    await engine.dispose()
+    return round(best * 1000, 3)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=200000)
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "search.db")
+        engine = create_engine(f"sqlite:///{path}")
+        run_migrations(engine)
+        start = time.perf_counter()
+        populate(engine, args.messages, args.users)
+        populate_s = time.perf_counter() - start
+
+        results = []
+        with engine.connect() as conn:
+            for query in QUERIES:
+                results.append({
+                    "query": query,
+                    "like_ms": best_ms(lambda: like_search(conn, "1", query, args.limit), args.repeat),
+                    "fts_ms": asyncio.run(fts_ms(path, 1, query, args.limit, args.repeat)),
+                })
+        engine.dispose()
+
+    print(json.dumps({
+        "messages": args.messages,
+        "users": args.users,
+        "messages_per_user": args.messages // args.users,
+        "populate_s": round(populate_s, 1),
+        "results": results,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""
+Scan des devoirs du scheduler sur un Moodle simulé (latence fixe par requête,
+une partie des utilisateurs en erreur réseau ou sans réponse).
+
+- sequential : ancienne boucle (un utilisateur après l'autre, un commit chacun)
+- concurrent-N : scheduler_service.check_all_homeworks avec N workers,
+  délai max par utilisateur, dates de synchro écrites par lots
+
+Usage:
+    python benchmarks/bench_homework_scan.py --users 500 --concurrency 1,10,50
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("GOOGLE_API_KEY", "")
+_tmp = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp, 'scan.db')}"
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BACKEND_DIR)
+
+import httpx
+from sqlalchemy import event, update
+
+from app.config import settings
+from app.database import SessionLocal, async_engine, engine
+from app.migrations import run_migrations
+from app.models.user import User
+from app.services.credential_vault import credential_vault
+from app.services.db_writer import db_writer
+from app.services.email_service import email_service
+from app.services.moodle_service import moodle_service
+from app.services.scheduler_service import scheduler_service
+
+CALENDAR_HTML = '<html>Déconnexion<div class="event"><h3 class="name">Devoir</h3><div class="date">Lundi 6 janvier, 23:59</div></div></html>'
+
+
+class FakeMoodle:
+    """Session acceptée dès qu'un cookie est présent ; utilisateurs en panne ou bloqués selon leur numéro"""
+
+    def __init__(self, latency, fail_every, hang_every, hang_seconds):
+        self.latency = latency
+        self.fail_every = fail_every
+        self.hang_every = hang_every
+        self.hang_seconds = hang_seconds
+        self.requests = 0
+
+    async def handler(self, request: httpx.Request) -> httpx.Response:
+        self.requests += 1
+        await asyncio.sleep(self.latency)
+        if request.url.path == "/login/index.php" and request.method == "GET":
+            return httpx.Response(200, html='<input name="logintoken" value="t">',
+                                  headers={"Set-Cookie": "MoodleSession=s; path=/"})
+        if request.url.path == "/login/index.php":
+            number = int(dict(p.split("=") for p in request.content.decode().split("&"))["username"][3:])
+            if self.fail_every and number % self.fail_every == 0:
+                raise httpx.ConnectError("connexion refusée", request=request)
+            if self.hang_every and number % self.hang_every == 0:
+                await asyncio.sleep(self.hang_seconds)
+            return httpx.Response(303, headers={"Location": "/my/"})
+        if request.url.path == "/my/":
+            return httpx.Response(200, html="Tableau de bord Déconnexion")
+        return httpx.Response(200, html=CALENDAR_HTML)
+
+
+async def sequential_scan():
+    """Ancienne boucle : un utilisateur à la fois, un commit par utilisateur"""
+    from datetime import datetime
+    db = SessionLocal()
+    try:
+        for user in db.query(User).filter(User.uvci_username != None).all():
+            plain_password = credential_vault.decrypt(user.uvci_password_encrypted)
+            assignments = await moodle_service.get_assignments(user.uvci_username, plain_password, user.id)
+            if assignments:
+                await email_service.send_assignment_notification(user.email, assignments)
+            user.last_moodle_sync = datetime.now()
+            db.commit()
+    finally:
+        db.close()
+
+
+def count_commits():
+    counter = {"commits": 0}
+
+    def on_commit(*args):
+        counter["commits"] += 1
+
+    for target in (engine, async_engine.sync_engine):
+        event.listen(target, "commit", on_commit)
+    return counter
+
+
+async def run(mode, concurrency, moodle, counter):
+    moodle_service.sessions._sessions.clear()
+    with SessionLocal() as db:
+        db.execute(update(User).values(moodle_session_encrypted=None, moodle_session_expires=None, last_moodle_sync=None))
+        db.commit()
+    moodle_service.sessions.transport = httpx.MockTransport(moodle.handler)
+    await moodle_service.close()
+    moodle.requests = 0
+    counter["commits"] = 0
+
+    start = time.perf_counter()
+    if mode == "sequential":
+        await sequential_scan()
+        report = None
+    else:
+        settings.MOODLE_SCAN_CONCURRENCY = concurrency
+        report = await scheduler_service.check_all_homeworks()
+    await db_writer.flush()
+    elapsed = time.perf_counter() - start
+    commits = counter["commits"]
+
+    with SessionLocal() as db:
+        synced = db.query(User).filter(User.last_moodle_sync != None).count()
+    return {
+        "mode": mode if mode == "sequential" else f"concurrent-{concurrency}",
+        "scan_s": round(elapsed, 2),
+        "users_per_s": round(synced / elapsed, 1),
+        "synced": synced,
+        "http_requests": moodle.requests,
+        "scan_commits": commits,
+        "report": report,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--concurrency", default="1,10,50")
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--fail-every", type=int, default=25, help="Un utilisateur sur N en erreur réseau")
+    parser.add_argument("--hang-every", type=int, default=33, help="Un utilisateur sur N sans réponse")
+    parser.add_argument("--hang-seconds", type=float, default=5.0)
+    parser.add_argument("--user-timeout", type=float, default=2.0)
+    parser.add_argument("--skip-sequential", action="store_true")
+    args = parser.parse_args()
+
+    run_migrations()
+    with SessionLocal() as db:
+        db.add_all(
+            User(email=f"etu{i}@uvci.edu.ci", password_hash="x", uvci_username=f"etu{i}",
+                 uvci_password_encrypted=credential_vault.encrypt("secret"))
+            for i in range(1, args.users + 1)
+        )
+        db.commit()
+
+    settings.MOODLE_SCAN_USER_TIMEOUT_SECONDS = args.user_timeout
+    moodle = FakeMoodle(args.latency_ms / 1000, args.fail_every, args.hang_every, args.hang_seconds)
+    counter = count_commits()
+
+    async def bench():
+        modes = [] if args.skip_sequential else [("sequential", 1)]
+        modes += [("concurrent", int(c)) for c in args.concurrency.split(",")]
+        results = [await run(mode, concurrency, moodle, counter) for mode, concurrency in modes]
+        await moodle_service.close()
+        await db_writer.stop()
+        return results
+
+    results = asyncio.run(bench())
+    print(json.dumps({"users": args.users, "latency_ms": args.latency_ms, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""
+Scan Moodle du scheduler : requêtes HTTP, connexions et durée, sur un Moodle
+simulé (httpx.MockTransport, latence réseau fixe par requête).
+
+- legacy : nouveau client et connexion complète à chaque vérification
+- sessions : moodle_service (client partagé, session réutilisée tant que
+  Moodle ne redirige pas vers le login, persistée chiffrée en base)
+
+Le Moodle simulé expire les sessions après --session-scans scans, même
+utilisées (cas pessimiste : le vrai délai Moodle est compté depuis la
+dernière requête).
+
+Usage:
+    python benchmarks/bench_moodle_sessions.py --users 50 --scans 6 --latency-ms 80
+"""
+import argparse
+import asyncio
+import json
+import os
+import secrets
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("GOOGLE_API_KEY", "")
+_tmp = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp, 'moodle.db')}"
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BACKEND_DIR)
+
+import httpx
+from bs4 import BeautifulSoup
+
+from app.database import SessionLocal
+from app.migrations import run_migrations
+from app.models.user import User
+from app.services.db_writer import db_writer
+from app.services.moodle_service import MoodleService
+
+CALENDAR_HTML = """<html><body><a>Déconnexion</a>
+<div class="event"><h3 class="name"><a href="https://licences5.uvci.online/mod/assign/view.php?id={i}">Devoir {i}</a></h3>
+<div class="date">Vendredi 20 décembre, 23:59</div></div></body></html>"""
+
+
+class FakeMoodle:
+    """Login en deux étapes (logintoken), cookie MoodleSession, redirection vers le login sans session"""
+
+    def __init__(self, latency, session_scans):
+        self.latency = latency
+        self.session_scans = session_scans
+        self.sessions = {}  # id de session -> (utilisateur, scan de création)
+        self.scan = 0
+        self.requests = 0
+        self.logins = 0
+
+    async def handler(self, request: httpx.Request) -> httpx.Response:
+        self.requests += 1
+        await asyncio.sleep(self.latency)
+        session_id = request.headers.get("Cookie", "").partition("MoodleSession=")[2].split(";")[0]
+        path = request.url.path
+        if path == "/login/index.php" and request.method == "GET":
+            if "testsession" in request.url.query.decode():
+                return httpx.Response(303, headers={"Location": "/my/"})
+            new_id = secrets.token_hex(8)
+            self.sessions[new_id] = (None, self.scan)
+            return httpx.Response(
+                200,
+                html='<form><input name="logintoken" value="tok"></form>',
+                headers={"Set-Cookie": f"MoodleSession={new_id}; path=/; HttpOnly"},
+            )
+        if path == "/login/index.php":
+            form = dict(pair.split("=") for pair in request.content.decode().split("&"))
+            if form.get("password") != "secret" or session_id not in self.sessions:
+                return httpx.Response(200, html='<form><input name="logintoken" value="tok"></form>')
+            self.logins += 1
+            self.sessions[session_id] = (form["username"], self.scan)
+            return httpx.Response(303, headers={"Location": "/login/index.php?testsession=1"})
+        user, created = self.sessions.get(session_id, (None, 0))
+        if user is None or self.scan - created >= self.session_scans:
+            return httpx.Response(303, headers={"Location": "/login/index.php"})
+        if path == "/my/":
+            return httpx.Response(200, html="<html>Tableau de bord Déconnexion</html>")
+        return httpx.Response(200, html=CALENDAR_HTML.format(i=user))
+
+
+async def legacy_check(transport, base, username, password):
+    # Ancien comportement : client jetable, login complet, puis calendrier
+    async with httpx.AsyncClient(transport=transport) as client:
+        page = await client.get(f"{base}/login/index.php")
+        token = BeautifulSoup(page.text, "html.parser").find("input", {"name": "logintoken"})["value"]
+        await client.post(
+            f"{base}/login/index.php",
+            data={"username": username, "password": password, "logintoken": token},
+            follow_redirects=True,
+        )
+        response = await client.get(f"{base}/calendar/view.php?view=upcoming")
+        return MoodleService().parse_assignments(response.text)
+
+
+async def run(mode, users, scans, latency, session_scans):
+    moodle = FakeMoodle(latency, session_scans)
+    transport = httpx.MockTransport(moodle.handler)
+    service = MoodleService(transport=transport)
+    found = 0
+    start = time.perf_counter()
+    for scan in range(scans):
+        moodle.scan = scan
+        for user_id in users:
+            if mode == "legacy":
+                assignments = await legacy_check(transport, service.BASE_URL, f"etu{user_id}", "secret")
+            else:
+                assignments = await service.get_assignments(f"etu{user_id}", "secret", user_id)
+            found += len(assignments)
+    elapsed = time.perf_counter() - start
+    await service.close()
+    await db_writer.flush()
+    checks = len(users) * scans
+    return {
+        "mode": mode,
+        "checks": checks,
+        "assignments_found": found,
+        "http_requests": moodle.requests,
+        "requests_per_check": round(moodle.requests / checks, 2),
+        "logins": moodle.logins,
+        "scan_s": round(elapsed / scans, 2),
+        "client_stats": service.metrics() if mode == "sessions" else None,
+    }
+
+
+async def restart_check(users, latency):
+    """Nouveau processus : sessions relues (chiffrées) depuis la base, sans login"""
+    moodle = FakeMoodle(latency, session_scans=10**6)
+    transport = httpx.MockTransport(moodle.handler)
+    first = MoodleService(transport=transport)
+    for user_id in users:
+        await first.get_assignments(f"etu{user_id}", "secret", user_id)
+    await first.close()
+    await db_writer.flush()
+    logins_before = moodle.logins
+    second = MoodleService(transport=transport)
+    for user_id in users:
+        await second.get_assignments(f"etu{user_id}", "secret", user_id)
+    await second.close()
+    return {"logins_after_restart": moodle.logins - logins_before, "client_stats": second.metrics()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--scans", type=int, default=6)
+    parser.add_argument("--latency-ms", type=float, default=80.0)
+    parser.add_argument("--session-scans", type=int, default=3, help="Durée de vie d'une session Moodle, en scans")
+    args = parser.parse_args()
+
+    run_migrations()
+    with SessionLocal() as db:
+        db.add_all(User(email=f"etu{i}@uvci.edu.ci", password_hash="x") for i in range(args.users))
+        db.commit()
+        users = [user.id for user in db.query(User).order_by(User.id)]
+
+    async def bench():
+        results = [
+            await run(mode, users, args.scans, args.latency_ms / 1000, args.session_scans)
+            for mode in ("legacy", "sessions")
+        ]
+        restart = await restart_check(users, args.latency_ms / 1000)
+        await db_writer.stop()
+        return results, restart
+
+    results, restart = asyncio.run(bench())
+    print(json.dumps({"users": args.users, "scans": args.scans, "results": results, "restart": restart}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
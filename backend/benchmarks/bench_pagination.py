@@ -0,0 +1,114 @@
+"""
+Latence d'une page de messages selon sa profondeur dans la conversation.
+
+- offset : LIMIT/OFFSET (SQLite parcourt et jette toutes les lignes sautées)
+- keyset : conversation_service.get_messages_page, curseur = id (ULID) du dernier message vu
+
+Usage:
+    python benchmarks/bench_pagination.py --messages 100000 --page-size 50
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+os.environ.setdefault("GOOGLE_API_KEY", "")
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BACKEND_DIR)
+
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.migrations import run_migrations
+from app.models.conversation import Conversation
+from app.models.message import Message
+from app.services.conversation_service import conversation_service
+from app.utils.ulid import new_ulid
+
+
+def populate(engine, messages):
+    start = datetime(2024, 1, 1)
+    with engine.begin() as conn:
+        conversation_id = new_ulid()
+        conn.execute(insert(Conversation), [{"id": conversation_id, "title": "Bench", "message_count": messages}])
+        rows = [
+            {
+                "id": new_ulid(),
+                "conversation_id": conversation_id,
+                "role": "user" if i % 2 == 0 else "assistant",
+                "content": "message " * 40,
+                "timestamp": start + timedelta(seconds=i),
+            }
+            for i in range(messages)
+        ]
+        for i in range(0, len(rows), 5000):
+            conn.execute(insert(Message), rows[i:i + 5000])
+    return conversation_id
+
+
+async def run(path, conversation_id, args):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    factory = async_sessionmaker(engine, expire_on_commit=False)
+    results = []
+    async with factory() as db:
+        for depth in [int(d) for d in args.depths.split(",")]:
+            if depth + args.page_size > args.messages:
+                continue
+            offset_ms = float("inf")
+            keyset_ms = float("inf")
+            # Curseur équivalent à OFFSET depth : la ligne juste avant la page
+            boundary = args.messages - depth
+            cursor = (await db.execute(
+                select(Message.id)
+                .where(Message.conversation_id == conversation_id)
+                .order_by(Message.id.asc())
+                .offset(boundary).limit(1)
+            )).scalar_one() if depth else None
+            for _ in range(args.repeat):
+                t = time.perf_counter()
+                await db.execute(
+                    select(Message)
+                    .where(Message.conversation_id == conversation_id)
+                    .order_by(Message.id.desc())
+                    .offset(depth).limit(args.page_size)
+                )
+                offset_ms = min(offset_ms, time.perf_counter() - t)
+
+                t = time.perf_counter()
+                await conversation_service.get_messages_page(conversation_id, db, args.page_size, cursor)
+                keyset_ms = min(keyset_ms, time.perf_counter() - t)
+            results.append({
+                "depth": depth,
+                "offset_ms": round(offset_ms * 1000, 3),
+                "keyset_ms": round(keyset_ms * 1000, 3),
+            })
+    await engine.dispose()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=100000)
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--depths", default="0,1000,10000,50000,99000", help="Profondeurs (liste)")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "pagination.db")
+        engine = create_engine(f"sqlite:///{path}")
+        run_migrations(engine)
+        conversation_id = populate(engine, args.messages)
+        engine.dispose()
+        results = asyncio.run(run(path, conversation_id, args))
+
+    print(json.dumps({"messages": args.messages, "page_size": args.page_size, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
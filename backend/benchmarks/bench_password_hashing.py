@@ -0,0 +1,107 @@
+"""
+Connexions par seconde (vérification Argon2) et latence de la boucle d'événements
+pendant une rafale de connexions.
+
+- inline : vérification synchrone dans la coroutine (bloque la boucle)
+- pool : password_hasher (pool de threads borné, 503 au-delà de la file)
+
+Un ticker mesure le retard de la boucle (ce que subissent les autres requêtes).
+
+Usage:
+    python benchmarks/bench_password_hashing.py --logins 200 --costs 65536:3:4,19456:2:1
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+os.environ.setdefault("GOOGLE_API_KEY", "")
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BACKEND_DIR)
+
+from app.services.password_hasher import HasherSaturated, PasswordHasher, build_context
+
+PASSWORD = "motdepasse-examen-2024"
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] if values else 0.0
+
+
+async def ticker(lags, stop, interval=0.005):
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        expected = loop.time() + interval
+        await asyncio.sleep(interval)
+        lags.append(max(0.0, loop.time() - expected))
+
+
+async def burst(mode, context, stored_hash, logins, workers, max_pending):
+    hasher = PasswordHasher(context, workers=workers, max_pending=max_pending)
+    lags, stop = [], asyncio.Event()
+    tick = asyncio.create_task(ticker(lags, stop))
+    await asyncio.sleep(0.02)
+
+    async def login():
+        if mode == "inline":
+            return context.verify(PASSWORD, stored_hash)
+        try:
+            valid, _ = await hasher.verify(PASSWORD, stored_hash)
+            return valid
+        except HasherSaturated:
+            return None
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(login() for _ in range(logins)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await tick
+    hasher.shutdown()
+
+    accepted = sum(1 for r in results if r)
+    return {
+        "mode": mode,
+        "workers": workers if mode == "pool" else 1,
+        "accepted": accepted,
+        "rejected_503": sum(1 for r in results if r is None),
+        "logins_per_s": round(accepted / elapsed, 1),
+        "logins_per_s_per_core": round(accepted / elapsed / (os.cpu_count() or 1), 1),
+        "loop_lag_ms_p50": round(percentile(lags, 0.5) * 1000, 2),
+        "loop_lag_ms_max": round(max(lags, default=0.0) * 1000, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=200, help="Connexions simultanées de la rafale")
+    parser.add_argument("--costs", default="65536:3:4,19456:2:1", help="memoire_ko:temps:parallelisme (liste)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--max-pending", type=int, default=32)
+    args = parser.parse_args()
+
+    results = []
+    for cost in args.costs.split(","):
+        memory_cost, time_cost, parallelism = (int(v) for v in cost.split(":"))
+        context = build_context(time_cost, memory_cost, parallelism)
+        stored_hash = context.hash(PASSWORD)
+        start = time.perf_counter()
+        context.verify(PASSWORD, stored_hash)
+        single_ms = (time.perf_counter() - start) * 1000
+        runs = [
+            asyncio.run(burst("inline", context, stored_hash, args.logins, 1, 0)),
+            # File assez longue pour toute la rafale : débit du pool
+            asyncio.run(burst("pool", context, stored_hash, args.logins, args.workers, args.logins)),
+            # File bornée : les demandes en trop sont refusées en 503
+            asyncio.run(burst("pool", context, stored_hash, args.logins, args.workers, args.max_pending)),
+        ]
+        results.append({"cost": cost, "verify_ms": round(single_ms, 1), "runs": runs})
+
+    print(json.dumps({"cpu_count": os.cpu_count(), "logins": args.logins, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Pages/seconde par stratégie d'extraction PDF : pypdf, pdfplumber,
+sélection automatique par page (cache froid) et cache chaud.
+
+Usage:
+    python benchmarks/bench_pdf_extraction.py                # jeu de PDFs synthétiques
+    python benchmarks/bench_pdf_extraction.py --dir ./uploads  # PDFs réels
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("GOOGLE_API_KEY", "")
+
+from fixtures import build_fixture_set
+import app.utils.pdf_processor as pdf_module
+from app.utils.pdf_processor import ExtractionCache, PDFProcessor
+
+
+def run(paths, method):
+    pages = 0
+    fallback_pages = 0
+    start = time.perf_counter()
+    for path in paths:
+        texts = PDFProcessor.extract_pages(path, method)
+        pages += len(texts)
+    elapsed = time.perf_counter() - start
+    if method == "auto":
+        for path in paths:
+            rows = pdf_module.extraction_cache._connection().execute(
+                "SELECT COUNT(*) FROM pages WHERE file_hash = ? AND extractor = 'pdfplumber'",
+                (PDFProcessor.file_hash(path),)
+            ).fetchone()
+            fallback_pages += rows[0]
+    return {"pages": pages, "seconds": elapsed, "pages_per_s": pages / elapsed, "pdfplumber_pages": fallback_pages}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--dir", help="Répertoire de PDFs (défaut: jeu synthétique)")
+    parser.add_argument("--documents", type=int, default=5)
+    parser.add_argument("--articles", type=int, default=40)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.dir:
+            paths = sorted(glob.glob(os.path.join(args.dir, "*.pdf")))
+        else:
+            paths = build_fixture_set(os.path.join(tmp, "pdfs"), args.documents, args.articles)
+
+        # Cache isolé pour que la mesure "froide" le soit vraiment
+        pdf_module.extraction_cache = ExtractionCache(os.path.join(tmp, "cache.db"))
+
+        report = {
+            "documents": len(paths),
+            "strategies": {
+                "pypdf": run(paths, "pypdf"),
+                "pdfplumber": run(paths, "pdfplumber"),
+                "auto_cold_cache": run(paths, "auto"),
+                "auto_warm_cache": run(paths, "auto"),
+            }
+        }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Clés primaires des messages : uuid4 aléatoires vs ULID ordonnés dans le temps.
+
+Insère des messages (conversations entrelacées, lots commités) et mesure le
+débit d'insertion, la taille de l'index de clé primaire et de l'index
+secondaire des messages d'une conversation (dbstat), et la taille du fichier.
+
+- uuid4 : index (conversation_id, timestamp, id), tri sur timestamp
+- ulid  : index (conversation_id, id), tri sur la clé primaire
+
+Usage:
+    python benchmarks/bench_primary_keys.py --messages 500000
+"""
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BACKEND_DIR)
+
+from app.utils.ulid import new_ulid
+
+SCHEMAS = {
+    "uuid4": (
+        lambda: str(uuid.uuid4()),
+        "CREATE INDEX ix_messages_secondary ON messages (conversation_id, timestamp, id)",
+    ),
+    "ulid": (
+        new_ulid,
+        "CREATE INDEX ix_messages_secondary ON messages (conversation_id, id)",
+    ),
+}
+CONTENT = "La session d'examens du premier semestre commence le 15 janvier. " * 3
+
+
+def run(key, path, args):
+    make_id, index_ddl = SCHEMAS[key]
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA cache_size=-16384")
+    conn.execute(
+        "CREATE TABLE messages (id VARCHAR NOT NULL PRIMARY KEY, conversation_id VARCHAR NOT NULL, "
+        "role VARCHAR(50) NOT NULL, content TEXT NOT NULL, timestamp DATETIME, sources TEXT)"
+    )
+    conn.execute(index_ddl)
+    conversations = [make_id() for _ in range(args.conversations)]
+    start_time = datetime(2024, 1, 1)
+
+    durations = []
+    inserted = 0
+    while inserted < args.messages:
+        rows = []
+        for i in range(inserted, min(args.messages, inserted + args.batch)):
+            rows.append((
+                make_id(), conversations[i % len(conversations)], "user", CONTENT,
+                (start_time + timedelta(milliseconds=i)).isoformat(sep=" "),
+            ))
+        start = time.perf_counter()
+        conn.executemany(
+            "INSERT INTO messages (id, conversation_id, role, content, timestamp) VALUES (?, ?, ?, ?, ?)", rows
+        )
+        conn.commit()
+        durations.append(time.perf_counter() - start)
+        inserted += len(rows)
+
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    sizes = dict(conn.execute(
+        "SELECT name, SUM(pgsize) FROM dbstat WHERE name IN "
+        "('sqlite_autoindex_messages_1', 'ix_messages_secondary', 'messages') GROUP BY name"
+    ).fetchall())
+    conn.close()
+
+    # Débit sur le dernier quart : table et index déjà plus grands que le cache
+    tail = durations[len(durations) * 3 // 4:]
+    return {
+        "key": key,
+        "inserts_per_s": round(args.messages / sum(durations)),
+        "inserts_per_s_last_quarter": round(len(tail) * args.batch / sum(tail)),
+        "pk_index_mb": round(sizes.get("sqlite_autoindex_messages_1", 0) / 1e6, 1),
+        "secondary_index_mb": round(sizes.get("ix_messages_secondary", 0) / 1e6, 1),
+        "table_mb": round(sizes.get("messages", 0) / 1e6, 1),
+        "file_mb": round(os.path.getsize(path) / 1e6, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=500000)
+    parser.add_argument("--conversations", type=int, default=2000)
+    parser.add_argument("--batch", type=int, default=500, help="Messages par commit")
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for key in SCHEMAS:
+            results.append(run(key, os.path.join(tmp, f"{key}.db"), args))
+
+    print(json.dumps({"messages": args.messages, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
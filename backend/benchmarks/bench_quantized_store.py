@@ -0,0 +1,105 @@
+"""
+Benchmark de l'index quantifié (float16 / int8) contre la référence float32.
+
+Mesure le rappel@k par rapport à la recherche exacte float32, la taille des
+vecteurs et la latence de requête.
+
+Usage:
+    python benchmarks/bench_quantized_store.py --chroma-dir ./data/chroma
+    python benchmarks/bench_quantized_store.py --synthetic 20000
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.vector_store import QuantizedVectorStore
+
+
+def load_chroma_vectors(chroma_dir: str) -> np.ndarray:
+    """Charge les embeddings float32 du corpus réel depuis ChromaDB"""
+    import chromadb
+    client = chromadb.PersistentClient(path=chroma_dir)
+    collection = client.get_collection("uvci_documents")
+    results = collection.get(include=["embeddings"])
+    return np.asarray(results["embeddings"], dtype=np.float32)
+
+
+def synthetic_vectors(n: int, dim: int, seed: int = 0) -> np.ndarray:
+    """Vecteurs regroupés en thèmes, plus proches d'un vrai corpus qu'un bruit uniforme"""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(max(n // 50, 1), dim)).astype(np.float32)
+    labels = rng.integers(0, len(centers), size=n)
+    return centers[labels] + 0.5 * rng.normal(size=(n, dim)).astype(np.float32)
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chroma-dir", help="Répertoire ChromaDB du corpus réel")
+    parser.add_argument("--synthetic", type=int, default=20000, help="Taille du corpus synthétique")
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.chroma_dir:
+        corpus = load_chroma_vectors(args.chroma_dir)
+    else:
+        corpus = synthetic_vectors(args.synthetic, args.dim)
+
+    # Requêtes: chunks du corpus légèrement bruités (paraphrases)
+    rng = np.random.default_rng(1)
+    picks = rng.choice(len(corpus), size=min(args.queries, len(corpus)), replace=False)
+    queries = corpus[picks] + 0.3 * rng.normal(size=(len(picks), corpus.shape[1])).astype(np.float32)
+
+    exact_scores = normalize(queries) @ normalize(corpus).T
+    exact_top = np.argsort(-exact_scores, axis=1)[:, :args.k]
+
+    report = {
+        "corpus_size": int(len(corpus)),
+        "dim": int(corpus.shape[1]),
+        "k": args.k,
+        "float32_bytes": int(corpus.astype(np.float32).nbytes),
+        "backends": {}
+    }
+
+    ids = [str(i) for i in range(len(corpus))]
+    documents = [""] * len(corpus)
+    metadatas = [{"row": i} for i in range(len(corpus))]
+
+    for dtype in ("float16", "int8"):
+        with tempfile.TemporaryDirectory() as directory:
+            store = QuantizedVectorStore(directory, dtype=dtype)
+            store.add(ids, corpus, documents, metadatas)
+
+            hits = 0
+            latencies = []
+            for query, expected in zip(queries, exact_top):
+                start = time.perf_counter()
+                _, found = store.query(query, n_results=args.k)
+                latencies.append(time.perf_counter() - start)
+                hits += len({meta["row"] for meta in found} & set(expected.tolist()))
+
+            report["backends"][dtype] = {
+                "recall_at_k": hits / (len(queries) * args.k),
+                "vector_bytes": store.memory_bytes(),
+                "compression": report["float32_bytes"] / store.memory_bytes(),
+                "query_p50_ms": float(np.percentile(latencies, 50) * 1000),
+                "query_p95_ms": float(np.percentile(latencies, 95) * 1000)
+            }
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""
+Benchmark hors ligne de la qualité et de la latence du RAG.
+
+Construit un corpus PDF à partir de benchmarks/retrieval/corpus/*.txt, l'indexe
+via RAGService (embeddings locaux déterministes par défaut), puis pose les
+questions étiquetées de benchmarks/retrieval/questions.json. Un chunk est
+pertinent s'il contient le passage attendu.
+
+Rapporte recall@k, MRR, débit d'ingestion et latences p50/p95 en JSON,
+comparable d'un commit à l'autre.
+
+Usage:
+    python benchmarks/bench_retrieval.py --output results.json
+    python benchmarks/bench_retrieval.py --backend quantized --chunk-tokens 128
+"""
+import argparse
+import atexit
+import glob
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "retrieval")
+sys.path.append(BACKEND_DIR)
+
+TMP_DIR = tempfile.mkdtemp(prefix="bench_retrieval_")
+atexit.register(shutil.rmtree, TMP_DIR, True)
+# Configuration isolée, fixée avant l'import de l'application
+os.environ.setdefault("GOOGLE_API_KEY", "")
+os.environ.setdefault("EMBEDDING_BACKEND", "hashing")
+os.environ["EXTRACTION_CACHE_PATH"] = os.path.join(TMP_DIR, "extraction_cache.db")
+
+import numpy as np
+
+from fixtures import paginate, write_pdf
+from app.config import settings
+from app.services.rag_service import RAGService
+from app.utils.embeddings import create_embedder
+from app.utils.vector_store import create_vector_store
+
+
+def normalize(text: str) -> str:
+    return re.sub(r"\s+", " ", text).strip().lower()
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, cwd=BACKEND_DIR, check=True
+        ).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+def build_corpus(directory: str):
+    """Convertit chaque texte du corpus en PDF, retourne [(chemin, nom, pages)]"""
+    os.makedirs(directory, exist_ok=True)
+    documents = []
+    for source in sorted(glob.glob(os.path.join(DATA_DIR, "corpus", "*.txt"))):
+        with open(source, encoding="utf-8") as f:
+            pages = paginate(f.read())
+        name = os.path.splitext(os.path.basename(source))[0] + ".pdf"
+        path = os.path.join(directory, name)
+        write_pdf(path, pages)
+        documents.append((path, name, len(pages)))
+    return documents
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--backend", default="flat", help="chroma, flat ou quantized")
+    parser.add_argument("--dtype", default=settings.VECTOR_STORE_DTYPE)
+    parser.add_argument("--embedder", default=settings.EMBEDDING_BACKEND, help="hashing ou gemini")
+    parser.add_argument("--chunk-tokens", type=int, default=settings.CHUNK_TOKENS)
+    parser.add_argument("--overlap-tokens", type=int, default=settings.CHUNK_OVERLAP_TOKENS)
+    parser.add_argument("--k", default="1,3,5", help="Valeurs de k pour recall@k")
+    parser.add_argument("--output", help="Fichier JSON de résultats")
+    args = parser.parse_args()
+
+    ks = sorted(int(k) for k in args.k.split(","))
+    settings.CHUNK_TOKENS = args.chunk_tokens
+    settings.CHUNK_OVERLAP_TOKENS = args.overlap_tokens
+
+    store_dir = os.path.join(TMP_DIR, "store")
+    rag = RAGService(
+        embedder=create_embedder(args.embedder, api_key=settings.GOOGLE_API_KEY),
+        store=create_vector_store(
+            args.backend, chroma_directory=store_dir, directory=store_dir, dtype=args.dtype
+        )
+    )
+
+    # 1. Ingestion
+    documents = build_corpus(os.path.join(TMP_DIR, "pdfs"))
+    total_bytes = sum(os.path.getsize(path) for path, _, _ in documents)
+    total_pages = sum(pages for _, _, pages in documents)
+    start = time.perf_counter()
+    total_chunks = 0
+    for i, (path, name, _) in enumerate(documents):
+        total_chunks += rag.index_document(f"doc{i}", path, name)
+    ingest_seconds = time.perf_counter() - start
+
+    # 2. Questions étiquetées
+    with open(os.path.join(DATA_DIR, "questions.json"), encoding="utf-8") as f:
+        questions = json.load(f)
+
+    hits = {k: 0 for k in ks}
+    reciprocal_ranks = []
+    latencies = []
+    misses = []
+    for item in questions:
+        t0 = time.perf_counter()
+        chunks, _ = rag.search(item["question"], top_k=max(ks))
+        latencies.append(time.perf_counter() - t0)
+
+        expected = normalize(item["expected"])
+        rank = next((r for r, chunk in enumerate(chunks, start=1) if expected in normalize(chunk)), None)
+        reciprocal_ranks.append(1.0 / rank if rank else 0.0)
+        for k in ks:
+            if rank and rank <= k:
+                hits[k] += 1
+        if not rank:
+            misses.append(item["question"])
+
+    report = {
+        "commit": git_commit(),
+        "config": {
+            "backend": args.backend,
+            "dtype": args.dtype if args.backend == "quantized" else None,
+            "embedder": rag.embedder.model_id,
+            "chunk_tokens": args.chunk_tokens,
+            "overlap_tokens": args.overlap_tokens,
+        },
+        "corpus": {"documents": len(documents), "pages": total_pages, "chunks": total_chunks},
+        "ingest": {
+            "seconds": ingest_seconds,
+            "pages_per_s": total_pages / ingest_seconds,
+            "chunks_per_s": total_chunks / ingest_seconds,
+            "mb_per_s": total_bytes / 1e6 / ingest_seconds,
+        },
+        "quality": {
+            "questions": len(questions),
+            **{f"recall@{k}": hits[k] / len(questions) for k in ks},
+            "mrr": sum(reciprocal_ranks) / len(questions),
+            "misses": misses,
+        },
+        "latency_ms": {
+            "p50": float(np.percentile(latencies, 50) * 1000),
+            "p95": float(np.percentile(latencies, 95) * 1000),
+        },
+    }
+
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
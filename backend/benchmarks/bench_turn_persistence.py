@@ -0,0 +1,107 @@
+"""
+Temps base de données par tour de chat (question + réponse).
+
+- legacy : deux add_message (add, relecture de la conversation, commit, refresh chacun)
+- record_turn : une transaction, une écriture groupée, sans relecture
+
+Usage:
+    python benchmarks/bench_turn_persistence.py --turns 500
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("GOOGLE_API_KEY", "")
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BACKEND_DIR)
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.database import Base, configure_sqlite
+from app.models.conversation import Conversation
+from app.services.conversation_service import conversation_service
+
+QUESTION = "Quelles sont les dates de la session d'examens ?"
+ANSWER = "La session d'examens se déroule du 15 au 30 janvier. " * 12
+
+
+async def legacy_turn(db, conversation_id):
+    await conversation_service.add_message(conversation_id, "user", QUESTION, None, db)
+    await conversation_service.add_message(conversation_id, "assistant", ANSWER, [], db)
+
+
+async def record_turn(db, conversation_id):
+    await conversation_service.record_turn(conversation_id, QUESTION, ANSWER, [], db)
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] if values else 0.0
+
+
+async def run(mode, path, turns):
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    engine.dispose()
+
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    configure_sqlite(engine.sync_engine)
+    counter = {"statements": 0, "commits": 0}
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def on_execute(*args):
+        counter["statements"] += 1
+
+    @event.listens_for(engine.sync_engine, "commit")
+    def on_commit(*args):
+        counter["commits"] += 1
+
+    factory = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+    async with factory() as db:
+        conversation = Conversation(title="Bench")
+        db.add(conversation)
+        await db.commit()
+        conversation_id = conversation.id
+
+    turn = legacy_turn if mode == "legacy" else record_turn
+    counter["statements"] = counter["commits"] = 0
+    durations = []
+    async with factory() as db:
+        for _ in range(turns):
+            start = time.perf_counter()
+            await turn(db, conversation_id)
+            durations.append(time.perf_counter() - start)
+    await engine.dispose()
+
+    return {
+        "mode": mode,
+        "turns": turns,
+        "turn_ms_p50": round(percentile(durations, 0.5) * 1000, 3),
+        "turn_ms_p95": round(percentile(durations, 0.95) * 1000, 3),
+        "turns_per_s": round(turns / sum(durations), 1),
+        "statements_per_turn": round(counter["statements"] / turns, 2),
+        "commits_per_turn": round(counter["commits"] / turns, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=500)
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in ("legacy", "record_turn"):
+            results.append(asyncio.run(run(mode, os.path.join(tmp, f"{mode}.db"), args.turns)))
+
+    print(json.dumps({"results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
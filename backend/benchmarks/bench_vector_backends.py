@@ -0,0 +1,126 @@
+"""
+Compare les backends vectoriels : ChromaDB, index plat float32 et index quantifié int8.
+
+Chaque backend est mesuré dans un processus séparé pour obtenir un démarrage
+à froid (import + ouverture + première requête) et une mémoire résidente réalistes.
+
+Usage:
+    python benchmarks/bench_vector_backends.py --size 20000
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BACKEND_DIR)
+
+BACKENDS = {
+    "chroma": {},
+    "flat": {},
+    "quantized": {"dtype": "int8"},
+}
+
+
+def open_store(backend: str, directory: str):
+    from app.utils.vector_store import create_vector_store
+    return create_vector_store(
+        backend,
+        chroma_directory=directory,
+        directory=directory,
+        **BACKENDS[backend]
+    )
+
+
+def build(backend: str, directory: str, size: int, dim: int):
+    """Remplit un index avec un corpus synthétique (hors mesure)"""
+    import numpy as np
+    rng = np.random.default_rng(0)
+    store = open_store(backend, directory)
+    batch = 1000  # Limite de lot ChromaDB
+    for start in range(0, size, batch):
+        n = min(batch, size - start)
+        store.add(
+            ids=[f"doc_chunk_{start + i}" for i in range(n)],
+            embeddings=rng.normal(size=(n, dim)).astype(np.float32).tolist(),
+            documents=["x" * 800] * n,
+            metadatas=[{"document_id": f"doc{(start + i) // 50}", "filename": "bench.pdf"} for i in range(n)]
+        )
+
+
+def peak_rss_mb() -> float:
+    """Pic de mémoire résidente du processus (VmHWM, non hérité du parent contrairement à ru_maxrss)"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def worker(backend: str, directory: str, queries: int, dim: int, k: int):
+    """Mesures exécutées dans un processus neuf"""
+    start = time.perf_counter()
+    import numpy as np
+    store = open_store(backend, directory)
+    rng = np.random.default_rng(1)
+    query_vectors = rng.normal(size=(queries, dim)).astype(np.float32)
+    store.query(query_vectors[0].tolist(), n_results=k)
+    cold_start = time.perf_counter() - start
+
+    latencies = []
+    for vector in query_vectors:
+        t0 = time.perf_counter()
+        store.query(vector.tolist(), n_results=k)
+        latencies.append(time.perf_counter() - t0)
+
+    result = {
+        "cold_start_s": cold_start,
+        "query_p50_ms": float(np.percentile(latencies, 50) * 1000),
+        "query_p95_ms": float(np.percentile(latencies, 95) * 1000),
+    }
+    if hasattr(store, "query_batch"):
+        t0 = time.perf_counter()
+        store.query_batch(query_vectors.tolist(), n_results=k)
+        result["batched_queries_per_s"] = queries / (time.perf_counter() - t0)
+
+    result["max_rss_mb"] = peak_rss_mb()
+    print(json.dumps(result))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--backends", default=",".join(BACKENDS))
+    parser.add_argument("--worker", nargs=2, metavar=("BACKEND", "DIR"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        worker(args.worker[0], args.worker[1], args.queries, args.dim, args.k)
+        return
+
+    report = {"size": args.size, "dim": args.dim, "backends": {}}
+    for backend in args.backends.split(","):
+        with tempfile.TemporaryDirectory() as directory:
+            build(backend, directory, args.size, args.dim)
+            output = subprocess.run(
+                [sys.executable, __file__, "--worker", backend, directory,
+                 "--queries", str(args.queries), "--dim", str(args.dim), "--k", str(args.k)],
+                capture_output=True, text=True, check=True, cwd=BACKEND_DIR
+            ).stdout
+            report["backends"][backend] = json.loads(output.strip().splitlines()[-1])
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Vérifie le découpage en chunks sur des cas de régression : détection des
+titres (lignes de paragraphe coupées par la mise en page), titre préfixant
+les chunks de sa section et budget de tokens tenu même pour un mot plus long
+que ce budget. Code de sortie 1 si un cas échoue.
+
+Usage:
+    python benchmarks/check_chunker.py
+"""
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.chunker import TextChunker, count_tokens, is_heading
+
+# (ligne, titre attendu)
+HEADING_CASES = [
+    ("ARTICLE 3 - INSCRIPTIONS", True),
+    ("Article 12", True),
+    ("Chapitre II : Frais de scolarité", True),
+    ("Section 1 - Conditions d'accès", True),
+    ("2. Inscriptions pédagogiques", True),
+    ("IV - Examens", True),
+    ("## Calendrier", True),
+    # Lignes de paragraphe coupées par la mise en page du PDF
+    ("2 ans d'études supérieures, les candidats titulaires d'une licence", False),
+    ("section de la licence professionnelle peuvent demander une dérogation", False),
+    ("partie des frais est remboursée aux étudiants qui annulent leur", False),
+    ("titre provisoire délivré par la scolarité en attendant le diplôme", False),
+    ("Le paiement des frais se fait en ligne.", False),
+]
+
+SENTENCE = "Les étudiants consultent le calendrier des examens sur la plateforme numérique."
+
+
+def section_prefix_case() -> bool:
+    """Un titre arrivé sur un chunk trop court préfixe quand même les chunks suivants de sa section"""
+    chunker = TextChunker(max_tokens=40, overlap_tokens=8)
+    text = "\n".join([
+        "ARTICLE 1 - ADMISSION",
+        "Admission sur dossier.",
+        "ARTICLE 2 - EXAMENS",
+        *([SENTENCE] * 6),
+    ])
+    chunks = chunker.chunk(text)
+    # Le premier chunk réunit la fin de l'article 1 et le titre de l'article 2
+    later = [chunk for chunk in chunks[1:] if SENTENCE in chunk]
+    return (
+        len(chunks) > 2
+        and chunks[0].startswith("ARTICLE 1 - ADMISSION\n")
+        and bool(later)
+        and all(chunk.startswith("ARTICLE 2 - EXAMENS\n") for chunk in later)
+    )
+
+
+def long_word_case() -> bool:
+    """Un mot de plus de max_tokens tokens (URL, tableau sans espaces) est coupé, titre compris"""
+    chunker = TextChunker(max_tokens=40, overlap_tokens=8)
+    url = "https://scolarite.uvci.edu.ci/" + "/".join(f"dossier{i}" for i in range(60))
+    text = "\n".join(["ARTICLE 4 - PIÈCES À FOURNIR", f"Le formulaire est disponible à l'adresse {url} avant la rentrée."])
+    chunks = chunker.chunk(text)
+    body_tokens = sum(count_tokens(chunk) - count_tokens("ARTICLE 4 - PIÈCES À FOURNIR") for chunk in chunks)
+    return (
+        len(chunks) > 1
+        and all(count_tokens(chunk) <= chunker.max_tokens for chunk in chunks)
+        and all(chunk.startswith("ARTICLE 4 - PIÈCES À FOURNIR\n") for chunk in chunks)
+        # Rien n'est perdu (le chevauchement peut seulement répéter des tokens)
+        and body_tokens >= count_tokens(text) - count_tokens("ARTICLE 4 - PIÈCES À FOURNIR")
+    )
+
+
+def main():
+    ok = True
+    for line, expected in HEADING_CASES:
+        passed = is_heading(line) == expected
+        ok = ok and passed
+        print(f"{'✅' if passed else '❌'} is_heading({line!r}) == {expected}")
+
+    passed = section_prefix_case()
+    ok = ok and passed
+    print(f"{'✅' if passed else '❌'} titre de section en préfixe après un chunk trop court")
+
+    passed = long_word_case()
+    ok = ok and passed
+    print(f"{'✅' if passed else '❌'} mot plus long que max_tokens coupé sous le budget")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Vérifie (EXPLAIN QUERY PLAN) que les requêtes fréquentes utilisent leurs index
+sur une base créée par les migrations. Code de sortie 1 si une requête
+parcourt la table ou trie en mémoire.
+
+Usage:
+    python benchmarks/check_query_plans.py
+"""
+import os
+import sys
+import tempfile
+
+os.environ.setdefault("GOOGLE_API_KEY", "")
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BACKEND_DIR)
+
+from datetime import datetime
+
+from sqlalchemy import create_engine, select, text, tuple_
+from sqlalchemy.dialects import sqlite
+
+from app.migrations import run_migrations
+from app.models.conversation import Conversation
+from app.models.message import Message
+
+CURSOR_DATE = datetime(2024, 1, 1)
+
+# (nom, requête, index attendu)
+HOT_QUERIES = [
+    (
+        "messages d'une conversation (chronologique)",
+        select(Message).where(Message.conversation_id == "c").order_by(Message.id.asc()),
+        "ix_messages_conversation_id",
+    ),
+    (
+        "contexte récent d'une conversation",
+        select(Message).where(Message.conversation_id == "c").order_by(Message.id.desc()).limit(6),
+        "ix_messages_conversation_id",
+    ),
+    (
+        "historique global trié",
+        select(Conversation).order_by(Conversation.updated_at.desc()).limit(50),
+        "ix_conversations_updated",
+    ),
+    (
+        "historique d'un utilisateur trié",
+        select(Conversation).where(Conversation.user_id == "u").order_by(Conversation.updated_at.desc()).limit(50),
+        "ix_conversations_user_updated",
+    ),
+    (
+        "page suivante de l'historique (curseur)",
+        select(Conversation)
+        .where(tuple_(Conversation.updated_at, Conversation.id) < tuple_(CURSOR_DATE, "z"))
+        .order_by(Conversation.updated_at.desc(), Conversation.id.desc())
+        .limit(51),
+        "ix_conversations_updated",
+    ),
+    (
+        "page de messages plus anciens (curseur)",
+        select(Message)
+        .where(Message.conversation_id == "c", Message.id < "01HK153X00TKR6P58YKQ0CAF0H")
+        .order_by(Message.id.desc())
+        .limit(51),
+        "ix_messages_conversation_id",
+    ),
+]
+
+
+def query_plan(conn, statement):
+    sql = str(statement.compile(dialect=sqlite.dialect(), compile_kwargs={"literal_binds": True}))
+    return [row[-1] for row in conn.execute(text("EXPLAIN QUERY PLAN " + sql))]
+
+
+def check(engine) -> bool:
+    ok = True
+    with engine.connect() as conn:
+        for name, statement, index in HOT_QUERIES:
+            plan = query_plan(conn, statement)
+            uses_index = any(index in step for step in plan)
+            sorts = any("TEMP B-TREE" in step for step in plan)
+            passed = uses_index and not sorts
+            ok = ok and passed
+            print(f"{'✅' if passed else '❌'} {name}: {' | '.join(plan)}")
+    return ok
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'plans.db')}")
+        run_migrations(engine)
+        ok = check(engine)
+        engine.dispose()
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
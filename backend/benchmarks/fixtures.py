@@ -0,0 +1,99 @@
+"""
+Génération de PDFs de test sans dépendance (texte natif, police Helvetica).
+"""
+import os
+import random
+from typing import List
+
+LINES_PER_PAGE = 48
+LINE_WIDTH = 90
+
+WORDS = (
+    "étudiant inscription université virtuelle licence master examen session "
+    "paiement frais scolarité calendrier plateforme cours devoir semestre crédit "
+    "validation diplôme administration formation numérique tuteur évaluation"
+).split()
+
+
+def _escape(line: str) -> bytes:
+    data = line.encode("cp1252", errors="replace")
+    return data.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)")
+
+
+def write_pdf(path: str, pages: List[str]):
+    """Écrit un PDF dont chaque page contient le texte donné (une ligne par '\\n')"""
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # Pages, rempli une fois les pages connues
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+    ]
+    page_refs = []
+    for text in pages:
+        stream = b"BT /F1 10 Tf 14 TL 50 800 Td\n"
+        for line in text.split("\n"):
+            stream += b"(" + _escape(line) + b") Tj T*\n"
+        stream += b"ET"
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        content_ref = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_ref
+        )
+        page_refs.append(len(objects))
+    kids = b" ".join(b"%d 0 R" % ref for ref in page_refs)
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(page_refs))
+
+    output = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(output))
+        output += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref_offset = len(output)
+    output += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        output += b"%010d 00000 n \n" % offset
+    output += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref_offset)
+
+    with open(path, "wb") as f:
+        f.write(output)
+
+
+def paginate(text: str) -> List[str]:
+    """Coupe un texte en lignes de LINE_WIDTH caractères puis en pages"""
+    lines: List[str] = []
+    for paragraph in text.split("\n"):
+        if not paragraph:
+            lines.append("")
+        while paragraph:
+            cut = paragraph.rfind(" ", 0, LINE_WIDTH) if len(paragraph) > LINE_WIDTH else len(paragraph)
+            cut = cut if cut > 0 else LINE_WIDTH
+            lines.append(paragraph[:cut])
+            paragraph = paragraph[cut:].lstrip()
+    return ["\n".join(lines[i:i + LINES_PER_PAGE]) for i in range(0, len(lines), LINES_PER_PAGE)]
+
+
+def random_regulation(articles: int, seed: int = 0) -> str:
+    """Texte de règlement synthétique : articles, paragraphes et phrases"""
+    rng = random.Random(seed)
+    parts = []
+    for article in range(1, articles + 1):
+        parts.append(f"ARTICLE {article} - {rng.choice(WORDS).upper()}")
+        for _ in range(rng.randint(2, 4)):
+            sentences = []
+            for _ in range(rng.randint(2, 5)):
+                words = [rng.choice(WORDS) for _ in range(rng.randint(6, 20))]
+                sentences.append(words[0].capitalize() + " " + " ".join(words[1:]) + ".")
+            parts.append(" ".join(sentences))
+            parts.append("")
+    return "\n".join(parts)
+
+
+def build_fixture_set(directory: str, documents: int = 5, articles: int = 40) -> List[str]:
+    """Crée un jeu de PDFs synthétiques, retourne leurs chemins"""
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for i in range(documents):
+        path = os.path.join(directory, f"fixture_{i}.pdf")
+        write_pdf(path, paginate(random_regulation(articles, seed=i)))
+        paths.append(path)
+    return paths
@@ -0,0 +1,49 @@
+"""
+Export des conversations et messages pour l'analyse (NDJSON ou CSV).
+
+Usage:
+    python export_conversations.py [--format ndjson|csv] [--gzip]
+                                   [--start 2024-09-01] [--end 2025-01-01]
+                                   [--user ID] [--output fichier]
+
+Sans --output, l'export est écrit sur la sortie standard.
+"""
+import argparse
+import asyncio
+import sys
+from datetime import datetime
+
+from app.services.export_service import export_service, FORMATS
+
+
+async def export(args, output):
+    async for chunk in export_service.stream(
+        args.format,
+        args.gzip,
+        args.start,
+        args.end,
+        args.user
+    ):
+        output.write(chunk)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--format", choices=FORMATS, default="ndjson")
+    parser.add_argument("--gzip", action="store_true")
+    parser.add_argument("--start", type=datetime.fromisoformat, help="Messages à partir de (inclus)")
+    parser.add_argument("--end", type=datetime.fromisoformat, help="Messages avant (exclu)")
+    parser.add_argument("--user", help="Conversations d'un utilisateur")
+    parser.add_argument("--output", "-o", help="Fichier de sortie")
+    args = parser.parse_args()
+
+    if args.output:
+        with open(args.output, "wb") as output:
+            asyncio.run(export(args, output))
+        print(f"✅ Export écrit dans {args.output}", file=sys.stderr)
+    else:
+        asyncio.run(export(args, sys.stdout.buffer))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+"""
+Export / import de l'index vectoriel RAG.
+
+Usage:
+    python index_snapshot.py export [chemin]
+    python index_snapshot.py import [chemin]
+
+Le chemin par défaut est INDEX_SNAPSHOT_PATH.
+"""
+import sys
+
+from app.config import settings
+from app.services.rag_service import rag_service
+
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] not in ("export", "import"):
+        print(__doc__)
+        sys.exit(1)
+
+    action = sys.argv[1]
+    path = sys.argv[2] if len(sys.argv) > 2 else settings.INDEX_SNAPSHOT_PATH
+
+    if action == "export":
+        header = rag_service.export_snapshot(path)
+        print(f"✅ {header['count']} chunks exportés vers {path} ({header['embedding_model']})")
+    else:
+        header = rag_service.import_snapshot(path)
+        print(f"✅ {header['count']} chunks importés depuis {path} ({header['embedding_model']})")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,36 +1,26 @@
+"""
+Migrations du schéma (base de DATABASE_URL).
 
-import sqlite3
-import os
+Usage:
+    python migrate_db.py           # applique les migrations en attente
+    python migrate_db.py status    # versions appliquées / en attente
+"""
+import logging
+import sys
 
-# Chemin vers la base de donnée
-DB_PATH = "uvci_chatbot.db"
+from app.migrations import run_migrations, status
 
-def migrate():
-    print(f"🔍 Vérification de la base de données: {DB_PATH}")
-    if not os.path.exists(DB_PATH):
-        print("❌ Base de données introuvable localement.")
-        return
 
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
+def migrate():
+    """Applique les migrations en attente"""
+    return run_migrations()
 
-    try:
-        # Vérifier si la colonne existe déjà
-        cursor.execute("PRAGMA table_info(users)")
-        columns = [column[1] for column in cursor.fetchall()]
-        
-        if "last_moodle_sync" not in columns:
-            print("➕ Ajout de la colonne last_moodle_sync...")
-            cursor.execute("ALTER TABLE users ADD COLUMN last_moodle_sync DATETIME")
-            conn.commit()
-            print("✅ Migration réussie !")
-        else:
-            print("ℹ️ La colonne last_moodle_sync existe déjà.")
-            
-    except Exception as e:
-        print(f"❌ Erreur pendant la migration: {e}")
-    finally:
-        conn.close()
 
 if __name__ == "__main__":
-    migrate()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    if len(sys.argv) > 1 and sys.argv[1] == "status":
+        for version, description, applied in status():
+            print(f"{'✅' if applied else '⏳'} {version:03d} {description}")
+    else:
+        applied = migrate()
+        print(f"✅ {len(applied)} migration(s) appliquée(s)")
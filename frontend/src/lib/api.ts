@@ -166,7 +166,7 @@ export const chatAPI = {
 export const historyAPI = {
   getConversations: async (): Promise<Conversation[]> => {
     const response = await api.get('/api/history/conversations');
-    return response.data;
+    return response.data.conversations;
   },
 
   getConversationDetail: async (conversationId: string): Promise<Conversation> => {